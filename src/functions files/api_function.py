@@ -1,3 +1,22 @@
+import os
+
+import pandas as pd
+
+from checkpoint import Checkpoint, stream_with_checkpoint
+from fetch_engine import DEFAULT_MAX_IN_FLIGHT, DEFAULT_RATE, host_of
+from instrumentation import instrumented_stage
+from omdb_client import OMDB_URL, OMDbClient, OMDbQuotaExceeded, parse_omdb
+
+API_KEY = os.environ.get('OMDB_API_KEY', '')
+
+FILM_COLUMNS = [
+    'filmid', 'title', 'runtime', 'genre', 'director', 'actors',
+    'language', 'country', 'imdbRating', 'metascore', 'imdbVotes'
+]
+
+_client = None
+
+
 def film_data(imdb_id):
     """
     Fetches movie data from the OMDB API for a given IMDb ID.
@@ -19,75 +38,171 @@ def film_data(imdb_id):
             - metascore (str): The Metascore of the movie.
             - imdbVotes (str): The number of votes on IMDb.
 
-    If the API request fails, it prints an error message and returns None.
+    If the movie is not found or the API request fails after the retries, it returns None (failures
+    are recorded in the run metrics).
     """
-    url = 'http://www.omdbapi.com/'
-    params = {
-        'apikey': API_KEY,
-        'i': imdb_id
-    }
-    
-    response = requests.get(url, params=params)
-    
-    print(f"Consulting information for IMDb ID: {imdb_id}")
-    
-    if response.status_code == 200:
-        print(f"Successful response received for IMDb ID: {imdb_id}")
-        data = response.json()
-        
-        imdb_rating = float(data.get('imdbRating')) if data.get('imdbRating') != 'N/A' else None
-        title = data.get('Title')  # Movie title
-        runtime = data.get('Runtime')  # Movie runtime
-        genre = data.get('Genre')  # Genre(s)
-        director = data.get('Director')  # Director(s)
-        actors = data.get('Actors')  # Main actors
-        language = data.get('Language')  # Language(s)
-        country = data.get('Country')  # Country/countries of production
-        metascore = data.get('Metascore')  # Metascore
-        imdb_votes = data.get('imdbVotes')  # Number of IMDb votes
-
-        return {
-            'filmid': imdb_id,
-            'title': title,
-            'runtime': runtime,
-            'genre': genre,
-            'director': director,
-            'actors': actors,
-            'language': language,
-            'country': country,
-            'imdbRating': imdb_rating,
-            'metascore': metascore,
-            'imdbVotes': imdb_votes
-        }
-    else:
-        print(f"Error fetching data for IMDb ID: {imdb_id}, status code: {response.status_code}")
+    client = get_client()
+    try:
+        data = client.get(imdb_id)
+    except OMDbQuotaExceeded:
         return None
+
+    return parse_omdb(imdb_id, data, parse_film_data) or None
+
+
+def parse_film_data(imdb_id, data):
+    """
+    Extracts the movie details used by the project from an OMDb JSON answer.
+
+    Args:
+        imdb_id (str): The IMDb ID of the movie.
+        data (dict): The JSON answer of the OMDb API.
+
+    Returns:
+        dict: The movie details described in `film_data`.
+    """
+    imdb_rating = float(data.get('imdbRating')) if data.get('imdbRating') not in (None, 'N/A') else None
+    title = data.get('Title')  # Movie title
+    runtime = data.get('Runtime')  # Movie runtime
+    genre = data.get('Genre')  # Genre(s)
+    director = data.get('Director')  # Director(s)
+    actors = data.get('Actors')  # Main actors
+    language = data.get('Language')  # Language(s)
+    country = data.get('Country')  # Country/countries of production
+    metascore = data.get('Metascore')  # Metascore
+    imdb_votes = data.get('imdbVotes')  # Number of IMDb votes
+
+    return {
+        'filmid': imdb_id,
+        'title': title,
+        'runtime': runtime,
+        'genre': genre,
+        'director': director,
+        'actors': actors,
+        'language': language,
+        'country': country,
+        'imdbRating': imdb_rating,
+        'metascore': metascore,
+        'imdbVotes': imdb_votes
+    }
+
+
+def get_client(max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+    """
+    Returns the OMDb client shared by `film_data` and `films_df_imdb`, created with `API_KEY`.
+    """
+    global _client
+    if _client is None or _client.api_key != API_KEY or _client.pool_size < max_in_flight:
+        _client = OMDbClient(API_KEY, pool_size=max_in_flight)
+    return _client
     
 
-def films_df_imdb(df, archivo_salida='df_imdb.csv'):
+@instrumented_stage()
+def films_df_imdb(df, archivo_salida='df_imdb.csv', max_in_flight=DEFAULT_MAX_IN_FLIGHT, rate=DEFAULT_RATE, retry_passes=1,
+                  checkpoint=None):
     """
     Fetches movie data from the OMDb API for a list of IMDb IDs, creates a DataFrame, and saves it to a CSV file.
 
+    The IDs are fetched in concurrent batches through the shared `OMDbClient`. IDs that fail are retried
+    in up to `retry_passes` extra passes that skip the ones already fetched, and the run stops early if
+    the daily quota is reached. IDs that OMDb does not know are stored in the checkpoint as done with an
+    empty record, so they are not requested again; they and the failed IDs are left out of the DataFrame
+    instead of producing empty rows.
+
     Args:
         df (pd.DataFrame): DataFrame containing a column 'filmid' with IMDb IDs.
         archivo_salida (str): Path to save the resulting DataFrame as a CSV file.
+        max_in_flight (int): Maximum number of simultaneous requests to the OMDb API.
+        rate (float): Maximum number of requests per second to the OMDb API.
+        retry_passes (int): Number of extra passes over the IDs that failed.
+        checkpoint (str | Checkpoint): Optional JSONL file where each result is saved as it arrives;
+            IDs already done in it are skipped and failed or expired ones are fetched again.
 
     Returns:
         pd.DataFrame: DataFrame containing movie details fetched from the OMDb API.
     """
-    datos = []
     ids = df['filmid'].unique()
     total = len(ids)
+    client = get_client(max_in_flight)
+    client.quota_exceeded.clear()
+    registros, hechos, on_result = {}, set(), None
+    if checkpoint:
+        checkpoint = Checkpoint(checkpoint) if isinstance(checkpoint, str) else checkpoint
+        registros = checkpoint.records()
+        hechos = set(registros) - checkpoint.stale
+        on_result = lambda imdb_id, registro: checkpoint.append(imdb_id, registro, registro is not None)
 
-    print(f"📡 Starting query for {total} unique titles from OMDb...")
+    print(f"📡 Starting query for {total} unique titles from OMDb ({len(hechos.intersection(ids))} already in checkpoint)...")
 
-    for i, imdb_id in enumerate(ids, start=1):
-        print(f"🔍 ({i}/{total}) Querying IMDb ID: {imdb_id}")
-        datos.append(film_data(imdb_id))
-        time.sleep(0.25)  # Pause to avoid API rate limits
+    for pasada in range(retry_passes + 1):
+        if pasada:
+            print(f"🔁 Retry pass {pasada}: {len(set(ids) - hechos)} titles pending")
+        resultados = client.fetch_many(
+            ids, parse_film_data, done=hechos, max_in_flight=max_in_flight, rate=rate, on_result=on_result
+        )
+        nuevos = {imdb_id: registro for imdb_id, registro in resultados.items() if registro is not None}
+        registros.update(nuevos)
+        hechos.update(nuevos)
+        if client.quota_exceeded.is_set() or hechos.issuperset(ids):
+            break
 
-    print("✅ Query completed. Generating DataFrame...")
-    df_info = pd.DataFrame(datos)
+    datos = [registros[imdb_id] for imdb_id in ids if registros.get(imdb_id)]
+    print(f"✅ Query completed ({len(datos)}/{total} titles). Generating DataFrame...")
+    df_info = pd.DataFrame(datos, columns=FILM_COLUMNS)
     print(f"💾 Saving results to file: {archivo_salida}")
     df_info.to_csv(archivo_salida, index=False)
-    return df_info
\ No newline at end of file
+    return df_info
+
+
+def iter_films_imdb(ids, max_in_flight=DEFAULT_MAX_IN_FLIGHT, rate=DEFAULT_RATE, checkpoint=None, reset_quota=True):
+    """
+    Generator version of `films_df_imdb`: yields the OMDb record of each IMDb ID as soon as it is
+    ready instead of building a list of all of them, for the streaming build. IDs that fail or
+    that OMDb does not know are left out. Once the daily quota is reached it stops sending requests
+    and raises, so a build does not go on with the films of the remaining IDs missing; with a
+    checkpoint, the records already fetched are kept and the next run resumes from them.
+
+    Args:
+        ids (iterable): IMDb IDs. Can be a generator.
+        max_in_flight (int): Maximum number of simultaneous requests to the OMDb API.
+        rate (float): Maximum number of requests per second to the OMDb API.
+        checkpoint (str | Checkpoint): Optional JSONL checkpoint, as in `films_df_imdb`.
+        reset_quota (bool): Whether to forget a quota reached before this call. A build that calls
+            it once per batch resets it once at the start instead (see `reset_omdb_quota`).
+
+    Yields:
+        dict: The movie details described in `film_data`, in the order of `ids`.
+
+    Raises:
+        OMDbQuotaExceeded: When the daily quota is reached, after yielding the records fetched before it.
+    """
+    client = get_client(max_in_flight)
+    if reset_quota:
+        client.quota_exceeded.clear()
+
+    def fetch_one(imdb_id):
+        try:
+            data = client.get(imdb_id)
+        except OMDbQuotaExceeded:
+            return None
+        return parse_omdb(imdb_id, data, parse_film_data)
+
+    registros = stream_with_checkpoint(
+        ids, fetch_one, host_of(OMDB_URL), checkpoint, max_in_flight=max_in_flight, rate=rate
+    )
+    for imdb_id, registro in registros:
+        if registro:
+            yield registro
+        if client.quota_exceeded.is_set():
+            # Cerrar el generador deja de enviar peticiones; los IDs pendientes quedan para otra ejecución
+            print("⚠️ OMDb daily request limit reached: the remaining IDs will be fetched on the next run")
+            registros.close()
+            raise OMDbQuotaExceeded(imdb_id)
+
+
+def reset_omdb_quota(max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+    """
+    Forgets the OMDb daily quota reached by a previous run of the shared client, e.g. at the start
+    of a build that fetches its IDs in several `iter_films_imdb` calls.
+    """
+    get_client(max_in_flight).quota_exceeded.clear()
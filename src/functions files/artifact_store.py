@@ -0,0 +1,290 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow es opcional: sin él los artefactos se guardan en CSV con el mismo esquema
+    pyarrow = pq = None
+
+from normalize import FIELD_KINDS, parse_field
+
+ARTIFACTS_DIR = 'artifacts'
+DEFAULT_FORMAT = 'parquet' if pyarrow is not None else 'csv'
+FORMATS = {'parquet': '.parquet', 'feather': '.feather', 'csv': '.csv'}
+
+# Tipos lógicos: además de los dtypes de pandas, los tipos de campo de `normalize` convierten
+# textos como "$5,408,467", "261,019", "154 min" o "N/A" a números
+MONEY = 'money'
+COUNT = 'count'
+MINUTES = 'minutes'
+METASCORE = 'metascore'
+RATING = 'rating'
+
+_REVENUE = {'domestic boxoffice': MONEY, 'international boxoffice': MONEY, 'Worlwide boxoffice': MONEY}
+_FILM_INFO = {
+    'filmid': 'string', 'title': 'string', 'runtime': MINUTES, 'genre': 'string', 'director': 'string',
+    'actors': 'string', 'language': 'string', 'country': 'string', 'imdbRating': RATING,
+    'metascore': METASCORE, 'imdbVotes': COUNT,
+}
+
+# Esquema de cada artefacto del pipeline (columna -> tipo). Las columnas no declaradas se guardan tal cual.
+SCHEMAS = {
+    'kaggle_clean': {
+        'year': 'int16', 'canonicalcategory': 'category', 'category': 'category', 'film': 'string',
+        'filmid': 'string', 'winner': 'category',
+    },
+    'imdb_data': _FILM_INFO,
+    'domestic_boxoffice': {'IMDb ID': 'string', 'title': 'string', 'domestic boxoffice': MONEY},
+    'international_boxoffice': {'IMDb ID': 'string', 'title': 'string', 'international boxoffice': MONEY},
+    'worlwide_boxoffice': {'IMDb ID': 'string', 'title': 'string', 'Worlwide boxoffice': MONEY},
+    'boxoffice_data': {'filmid': 'string', 'title': 'string', **_REVENUE},
+    'movie_budgets': {'IMDb ID': 'string', 'title': 'string', 'budget': MONEY},
+    'movie_budgets_clean': {'filmid': 'string', 'title': 'string', 'budget': MONEY},
+    'financial_data': {'filmid': 'string', 'title': 'string', **_REVENUE, 'budget': MONEY, 'ROI': 'float64'},
+    'final_dataset': {
+        **_FILM_INFO, 'genre': 'category', 'country': 'category', 'Worlwide boxoffice': MONEY,
+        'budget': MONEY, 'ROI': 'float64', 'year': 'int16', 'winner': 'category', 'category': 'category',
+    },
+    # Tablas puente de las columnas con varios valores (ver `bridge_tables.py`)
+    'film_genre': {'filmid': 'string', 'genre': 'category', 'position': 'int8'},
+    'film_country': {'filmid': 'string', 'country': 'category', 'position': 'int8'},
+    'film_actor': {'filmid': 'string', 'actor': 'string', 'position': 'int8'},
+    'film_director': {'filmid': 'string', 'director': 'category', 'position': 'int8'},
+    'film_language': {'filmid': 'string', 'language': 'category', 'position': 'int8'},
+}
+
+
+def coerce_column(series, dtype):
+    """
+    Converts a column to a type of the schema.
+
+    Args:
+        series (pd.Series): Column to convert.
+        dtype (str): pandas dtype or a type of field of `normalize.FIELD_KINDS` (`MONEY`, `COUNT`,
+            `MINUTES`, `METASCORE`, `RATING`). Values rejected by the parser become null.
+
+    Returns:
+        pd.Series: The converted column.
+    """
+    if dtype in FIELD_KINDS:
+        return parse_field(series, dtype)[0]
+    if dtype in ('int16', 'int32', 'int64') and series.isna().any():
+        return series.astype(dtype.capitalize())
+    return series.astype(dtype)
+
+
+def apply_schema(df, name):
+    """
+    Returns a copy of a DataFrame with the columns converted to the schema of an artifact.
+
+    Args:
+        df (pd.DataFrame): DataFrame to convert.
+        name (str): Name of the artifact (a key of `SCHEMAS`).
+
+    Returns:
+        pd.DataFrame: The typed DataFrame.
+    """
+    schema = SCHEMAS[name]
+    return df.assign(**{
+        column: coerce_column(df[column], dtype) for column, dtype in schema.items() if column in df.columns
+    })
+
+
+def artifact_path(name, directory=ARTIFACTS_DIR, fmt=DEFAULT_FORMAT):
+    """
+    Returns the path of the file of an artifact in a format.
+    """
+    return os.path.join(directory, name + FORMATS[fmt])
+
+
+def stored_format(name, directory=ARTIFACTS_DIR):
+    """
+    Returns the format in which an artifact is stored, or None if it has not been written.
+    """
+    for fmt in FORMATS:
+        if os.path.exists(artifact_path(name, directory, fmt)):
+            return fmt
+    return None
+
+
+def write_artifact(df, name, directory=ARTIFACTS_DIR, fmt=DEFAULT_FORMAT, csv_path=None):
+    """
+    Saves a DataFrame as a typed columnar artifact.
+
+    Args:
+        df (pd.DataFrame): DataFrame to save.
+        name (str): Name of the artifact (a key of `SCHEMAS`).
+        directory (str): Folder of the artifacts.
+        fmt (str): 'parquet', 'feather' or 'csv'.
+        csv_path (str): Optional path where a CSV export of the artifact is written too.
+
+    Returns:
+        pd.DataFrame: The typed DataFrame that was saved.
+    """
+    df = apply_schema(df, name)
+    # El CSV se escribe antes para que el artefacto nunca parezca más antiguo que su exportación
+    if csv_path:
+        if os.path.dirname(csv_path):
+            os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+        df.to_csv(csv_path, index=False)
+
+    os.makedirs(directory, exist_ok=True)
+    path = artifact_path(name, directory, fmt)
+    if fmt == 'parquet':
+        df.to_parquet(path, index=False)
+    elif fmt == 'feather':
+        df.reset_index(drop=True).to_feather(path)
+    else:
+        df.to_csv(path, index=False)
+    # Un formato distinto guardado antes quedaría obsoleto
+    for otro in FORMATS:
+        if otro != fmt and os.path.exists(artifact_path(name, directory, otro)):
+            os.remove(artifact_path(name, directory, otro))
+    return df
+
+
+class ArtifactWriter:
+    """
+    Writes an artifact incrementally, one block of rows at a time, so a build that produces its
+    rows in batches never holds the whole artifact in memory. With Parquet every block becomes a
+    row group. The file (and its CSV export) replaces the previous one only when the writer is
+    closed without errors.
+
+    Usage:
+        with ArtifactWriter('final_dataset') as writer:
+            for bloque in bloques:
+                writer.write(bloque)
+
+    Args:
+        name (str): Name of the artifact (a key of `SCHEMAS`).
+        directory (str): Folder of the artifacts.
+        fmt (str): 'parquet' or 'csv'.
+        csv_path (str): Optional path where a CSV export of the artifact is written too.
+
+    Raises:
+        ValueError: If the format cannot be written incrementally.
+    """
+
+    def __init__(self, name, directory=ARTIFACTS_DIR, fmt=DEFAULT_FORMAT, csv_path=None):
+        if fmt not in ('parquet', 'csv') or (fmt == 'parquet' and pq is None):
+            raise ValueError(f"Format {fmt} cannot be written incrementally (use 'parquet' or 'csv')")
+        self.name = name
+        self.directory = directory
+        self.fmt = fmt
+        self.csv_path = csv_path
+        self.path = artifact_path(name, directory, fmt)
+        self.rows = 0
+        self._started = False
+        self._schema = None
+        self._writer = None
+
+    def __enter__(self):
+        os.makedirs(self.directory, exist_ok=True)
+        if self.csv_path and os.path.dirname(self.csv_path):
+            os.makedirs(os.path.dirname(self.csv_path), exist_ok=True)
+        return self
+
+    def write(self, df):
+        """
+        Appends a block of rows, converted to the schema of the artifact.
+        """
+        df = apply_schema(df, self.name)
+        primero = not self._started
+        if self.csv_path:
+            df.to_csv(self.csv_path + '.tmp', mode='w' if primero else 'a', header=primero, index=False)
+        if self.fmt == 'csv':
+            df.to_csv(self.path + '.tmp', mode='w' if primero else 'a', header=primero, index=False)
+        else:
+            if primero:
+                tabla = pyarrow.Table.from_pandas(df, preserve_index=False)
+                # Las categorías de cada bloque son distintas: se guardan como diccionarios de texto
+                self._schema = pyarrow.schema([
+                    field.with_type(pyarrow.dictionary(pyarrow.int32(), pyarrow.string()))
+                    if pyarrow.types.is_dictionary(field.type) else field
+                    for field in tabla.schema
+                ], metadata=tabla.schema.metadata)
+                self._writer = pq.ParquetWriter(self.path + '.tmp', self._schema)
+            self._writer.write_table(pyarrow.Table.from_pandas(df, schema=self._schema, preserve_index=False))
+        self._started = True
+        self.rows += len(df)
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._writer is not None:
+            self._writer.close()
+        temporales = [p + '.tmp' for p in (self.csv_path, self.path) if p]
+        if exc_type is not None:
+            for temporal in temporales:
+                if os.path.exists(temporal):
+                    os.remove(temporal)
+            return False
+        if not self._started:
+            # Sin filas: un artefacto vacío con las columnas del esquema
+            write_artifact(pd.DataFrame(columns=list(SCHEMAS[self.name])), self.name, self.directory, self.fmt,
+                           self.csv_path)
+            return False
+        # El CSV se mueve antes para que el artefacto nunca parezca más antiguo que su exportación
+        for temporal in temporales:
+            os.replace(temporal, temporal[:-len('.tmp')])
+        for otro in FORMATS:
+            if otro != self.fmt and os.path.exists(artifact_path(self.name, self.directory, otro)):
+                os.remove(artifact_path(self.name, self.directory, otro))
+        return False
+
+
+def read_artifact(name, columns=None, directory=ARTIFACTS_DIR):
+    """
+    Loads an artifact, reading only the requested columns.
+
+    Args:
+        name (str): Name of the artifact.
+        columns (list): Columns to read. Defaults to all of them.
+        directory (str): Folder of the artifacts.
+
+    Returns:
+        pd.DataFrame: The typed DataFrame.
+
+    Raises:
+        FileNotFoundError: If the artifact has not been written.
+    """
+    fmt = stored_format(name, directory)
+    if fmt is None:
+        raise FileNotFoundError(f"Artifact not found: {artifact_path(name, directory)}")
+    path = artifact_path(name, directory, fmt)
+    if fmt == 'parquet':
+        return pd.read_parquet(path, columns=columns)
+    if fmt == 'feather':
+        return pd.read_feather(path, columns=columns)
+    return apply_schema(pd.read_csv(path, usecols=columns), name)
+
+
+def load_artifact(name, csv_path=None, columns=None, directory=ARTIFACTS_DIR, fmt=DEFAULT_FORMAT):
+    """
+    Loads an artifact, importing it from a CSV file the first time (or when the CSV is newer),
+    so the next loads read the columnar copy.
+
+    Args:
+        name (str): Name of the artifact.
+        csv_path (str): CSV file the artifact comes from (e.g. 'csv/raw/movie_budgets.csv').
+        columns (list): Columns to read. Defaults to all of them.
+        directory (str): Folder of the artifacts.
+        fmt (str): Format used when the CSV is imported.
+
+    Returns:
+        pd.DataFrame: The typed DataFrame.
+    """
+    stored = stored_format(name, directory)
+    if csv_path and os.path.exists(csv_path):
+        if stored is None or os.path.getmtime(csv_path) > os.path.getmtime(artifact_path(name, directory, stored)):
+            df = write_artifact(pd.read_csv(csv_path), name, directory, fmt)
+            return df[columns] if columns else df
+    return read_artifact(name, columns, directory)
+
+
+def memory_usage(df):
+    """
+    Returns the memory used by a DataFrame in megabytes, including the contents of text columns.
+    """
+    return round(float(np.sum(df.memory_usage(deep=True))) / 1024 ** 2, 3)
@@ -0,0 +1,309 @@
+import argparse
+import glob
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+
+import api_function
+import http_cache
+import omdb_client
+import scrape_pipeline
+import slug_index
+import web_scraping_functions
+from extractors import FIXTURES_DIR
+from instrumentation import METRICS
+
+
+class _Server(ThreadingHTTPServer):
+    # La cola por defecto (5) descarta conexiones con muchas peticiones en vuelo y añade reintentos TCP de 1 s
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class FixtureServer:
+    """
+    Local stand-in for Box Office Mojo, The Numbers and OMDb that replays the stored fixtures.
+
+    It answers the URL shapes used by the fetchers:
+        - /title/{imdb_id}/   -> fixtures/boxofficemojo/{imdb_id}.html
+        - /movie/{slug}       -> fixtures/the-numbers/{slug}.html
+        - /?i={imdb_id}       -> fixtures/omdb/{imdb_id}.json
+    Unknown IDs and slugs get one of the stored fixtures (always the same one for the same ID),
+    so a benchmark can use any number of synthetic IDs.
+
+    Args:
+        fixtures_dir (str): Folder with the fixtures.
+        latency (float): Mean latency in seconds added to every response (exponentially distributed).
+        error_rate (float): Fraction of requests answered with a 500 error.
+        throttle_rate (float): Fraction of requests answered with a 429 and a Retry-After header.
+        retry_after (int): Value of the Retry-After header of the 429 responses.
+        seed (int): Seed of the random generator, for reproducible runs.
+    """
+
+    def __init__(self, fixtures_dir=FIXTURES_DIR, latency=0.0, error_rate=0.0, throttle_rate=0.0,
+                 retry_after=1, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {'requests': 0, 'errors': 0, 'throttled': 0}
+        self.fixtures = {}
+        for folder, extension in [('boxofficemojo', 'html'), ('the-numbers', 'html'), ('omdb', 'json')]:
+            self.fixtures[folder] = {}
+            for path in sorted(glob.glob(os.path.join(fixtures_dir, folder, f'*.{extension}'))):
+                with open(path, 'rb') as f:
+                    self.fixtures[folder][os.path.basename(path).rsplit('.', 1)[0]] = f.read()
+        self.server = None
+
+    def _pick(self, folder, name):
+        pages = self.fixtures[folder]
+        if name in pages:
+            return pages[name]
+        keys = list(pages)
+        return pages[keys[zlib.crc32(name.encode('utf-8')) % len(keys)]] if keys else None
+
+    def _fault(self):
+        # Devuelve (status, headers) del fallo a inyectar, o None
+        with self.lock:
+            self.counts['requests'] += 1
+            draw = self.random.random()
+            delay = self.random.expovariate(1 / self.latency) if self.latency else 0
+            if draw < self.throttle_rate:
+                self.counts['throttled'] += 1
+                fault = (429, {'Retry-After': str(self.retry_after)})
+            elif draw < self.throttle_rate + self.error_rate:
+                self.counts['errors'] += 1
+                fault = (500, {})
+            else:
+                fault = None
+        if delay:
+            time.sleep(delay)
+        return fault
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body=b'', content_type='text/html; charset=utf-8', headers=None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                fault = server._fault()
+                if fault:
+                    self._send(fault[0], b'', headers=fault[1])
+                    return
+                parts = urlsplit(self.path)
+                segments = [unquote(s) for s in parts.path.split('/') if s]
+                if len(segments) >= 2 and segments[0] == 'title':
+                    body, content_type = server._pick('boxofficemojo', segments[1]), 'text/html; charset=utf-8'
+                elif len(segments) >= 2 and segments[0] == 'movie':
+                    body, content_type = server._pick('the-numbers', segments[1]), 'text/html; charset=utf-8'
+                elif not segments and 'i' in parse_qs(parts.query):
+                    imdb_id = parse_qs(parts.query)['i'][0]
+                    body, content_type = server._pick('omdb', imdb_id), 'application/json'
+                    if body is not None:
+                        body = json.dumps({**json.loads(body), 'imdbID': imdb_id}).encode('utf-8')
+                else:
+                    body = None
+                if body is None:
+                    self._send(404, b'Not found')
+                else:
+                    self._send(200, body, content_type)
+
+        return Handler
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self, port=0):
+        """
+        Starts the server in a background thread. With `port=0` a free port is chosen.
+        """
+        self.server = _Server(('127.0.0.1', port), self._handler())
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        """
+        Stops the server.
+        """
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def reset_counts(self):
+        with self.lock:
+            self.counts = {key: 0 for key in self.counts}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+@contextmanager
+def redirect_sources(base_url):
+    """
+    Points the Box Office Mojo, The Numbers and OMDb URLs of the fetchers to `base_url` and
+    disables the response cache, restoring everything on exit.
+    """
+    redirecciones = [
+        (web_scraping_functions, 'BOXOFFICEMOJO_URL', f'{base_url}/title/{{imdb_id}}/?ref_=bo_se_r_1'),
+        (web_scraping_functions, 'THE_NUMBERS_URL', f'{base_url}/movie/{{film_url}}#tab=summary'),
+        (scrape_pipeline, 'BOXOFFICEMOJO_URL', f'{base_url}/title/{{imdb_id}}/?ref_=bo_se_r_1'),
+        (scrape_pipeline, 'THE_NUMBERS_URL', f'{base_url}/movie/{{film_url}}#tab=summary'),
+        (slug_index, 'THE_NUMBERS_URL', f'{base_url}/movie/{{film_url}}#tab=summary'),
+        (omdb_client, 'OMDB_URL', f'{base_url}/'),
+    ]
+    guardados = [(module, name, getattr(module, name)) for module, name, _ in redirecciones]
+    cache_state = (http_cache._default_cache, http_cache._cache_enabled)
+    try:
+        for module, name, url in redirecciones:
+            setattr(module, name, url)
+        http_cache._default_cache, http_cache._cache_enabled = None, False
+        yield
+    finally:
+        for module, name, url in guardados:
+            setattr(module, name, url)
+        http_cache._default_cache, http_cache._cache_enabled = cache_state
+
+
+@contextmanager
+def _timed_requests(latencies):
+    # Envuelve cached_get en cada módulo que lo usa para medir la latencia de cada petición
+    modules = [web_scraping_functions, omdb_client, scrape_pipeline, slug_index]
+    originales = [module.cached_get for module in modules]
+
+    def wrap(func):
+        def timed(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                latencies.append(time.perf_counter() - inicio)
+        return timed
+
+    try:
+        for module, func in zip(modules, originales):
+            module.cached_get = wrap(func)
+        yield
+    finally:
+        for module, func in zip(modules, originales):
+            module.cached_get = func
+
+
+def synthetic_films(n, seed=0):
+    """
+    Builds a DataFrame of `n` synthetic films with the columns used by the collectors
+    ('filmid', 'film', 'title', 'year').
+    """
+    rng = np.random.default_rng(seed)
+    ids = [f'tt{9000000 + i:07d}' for i in range(n)]
+    titles = [f'Benchmark Film {i}' for i in range(n)]
+    return pd.DataFrame({'filmid': ids, 'film': titles, 'title': titles, 'year': rng.integers(1990, 2025, n)})
+
+
+def default_collectors(max_in_flight, rate):
+    """
+    Returns the collectors measured by the benchmark, by name.
+    """
+    return {
+        'boxoffice_summary_df': lambda df: web_scraping_functions.boxoffice_summary_df(df, max_in_flight, rate),
+        'films_budget_df': lambda df: web_scraping_functions.films_budget_df(df, max_in_flight, rate),
+        'films_df_imdb': lambda df: api_function.films_df_imdb(
+            df, os.devnull, max_in_flight=max_in_flight, rate=rate
+        ),
+        'scrape_boxoffice_pipeline': lambda df: scrape_pipeline.scrape_boxoffice_pipeline(df, max_in_flight, rate),
+    }
+
+
+def run_benchmark(n_ids=200, latency=0.05, error_rate=0.0, throttle_rate=0.0, max_in_flight=16, rate=1000.0,
+                  collectors=None, seed=0):
+    """
+    Runs every collector against the local stand-in server and measures its throughput.
+
+    Args:
+        n_ids (int): Number of synthetic IMDb IDs per collector.
+        latency (float): Mean latency in seconds added by the server.
+        error_rate (float): Fraction of requests answered with a 500 error.
+        throttle_rate (float): Fraction of requests answered with a 429.
+        max_in_flight (int): Maximum number of simultaneous requests of the collectors.
+        rate (float): Maximum number of requests per second of the collectors.
+        collectors (dict): Collectors to measure, by name. Defaults to `default_collectors`.
+        seed (int): Seed for the synthetic data and the injected faults.
+
+    Returns:
+        pd.DataFrame: One row per collector with 'requests', 'errors', 'throttled', 'wall_s',
+            'requests/s', 'p50_ms' and 'p99_ms'.
+    """
+    df = synthetic_films(n_ids, seed)
+    collectors = collectors or default_collectors(max_in_flight, rate)
+    filas = []
+    with FixtureServer(latency=latency, error_rate=error_rate, throttle_rate=throttle_rate, seed=seed) as server:
+        with redirect_sources(server.base_url):
+            for name, collector in collectors.items():
+                server.reset_counts()
+                latencies = []
+                with _timed_requests(latencies):
+                    inicio = time.perf_counter()
+                    collector(df)
+                    wall = time.perf_counter() - inicio
+                counts = dict(server.counts)
+                filas.append({
+                    'collector': name,
+                    'requests': counts['requests'],
+                    'errors': counts['errors'],
+                    'throttled': counts['throttled'],
+                    'wall_s': round(wall, 3),
+                    'requests/s': round(counts['requests'] / wall, 1) if wall else None,
+                    'p50_ms': round(float(np.percentile(latencies, 50)) * 1000, 1) if latencies else None,
+                    'p99_ms': round(float(np.percentile(latencies, 99)) * 1000, 1) if latencies else None,
+                })
+    return pd.DataFrame(filas)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Offline throughput benchmark of the collectors.')
+    parser.add_argument('--ids', type=int, default=200, help='synthetic IMDb IDs per collector')
+    parser.add_argument('--latency', type=float, default=0.05, help='mean latency added by the server (s)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of 500 responses')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='fraction of 429 responses')
+    parser.add_argument('--max-in-flight', type=int, default=16, help='simultaneous requests per host')
+    parser.add_argument('--rate', type=float, default=1000.0, help='requests per second per host')
+    parser.add_argument('--json', help='optional path to save the report as JSON')
+    parser.add_argument('--run-report', help='optional path to save the stage/host metrics of the run as JSON')
+    args = parser.parse_args()
+
+    METRICS.reset()
+    report = run_benchmark(args.ids, args.latency, args.error_rate, args.throttle_rate, args.max_in_flight, args.rate)
+    print(report.to_string(index=False))
+    if args.json:
+        report.to_json(args.json, orient='records', indent=2)
+    if args.run_report:
+        METRICS.write_report(args.run_report)
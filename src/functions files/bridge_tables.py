@@ -0,0 +1,142 @@
+import pandas as pd
+
+from artifact_store import ARTIFACTS_DIR, read_artifact
+from normalize import MISSING_TOKENS
+
+# Columnas de OMDb con varios valores separados por comas y nombre del valor en su tabla puente
+BRIDGE_COLUMNS = {
+    'genre': 'genre',
+    'country': 'country',
+    'actors': 'actor',
+    'director': 'director',
+    'language': 'language',
+}
+
+
+def bridge_name(column):
+    """
+    Returns the name of the bridge table of a multi-value column (e.g. 'actors' -> 'film_actor').
+    """
+    return f'film_{BRIDGE_COLUMNS[column]}'
+
+
+def build_bridge(df, column):
+    """
+    Splits a comma-separated column of the OMDb data into a bridge table with one row per film
+    and value ("Drama, Thriller" -> two rows).
+
+    Args:
+        df (pd.DataFrame): DataFrame with the columns 'filmid' and `column` (e.g. imdb_data.csv).
+        column (str): Multi-value column, a key of `BRIDGE_COLUMNS`.
+
+    Returns:
+        pd.DataFrame: The columns 'filmid', the value (e.g. 'actor') and 'position', the order of
+            the value in the original text (0 is the value kept in the final dataset).
+    """
+    valor = BRIDGE_COLUMNS[column]
+    peliculas = df[['filmid', column]].drop_duplicates('filmid')
+    valores = peliculas[column].astype('string').str.split(',')
+    bridge = pd.DataFrame({'filmid': peliculas['filmid'].values, valor: valores.values}).explode(valor)
+    bridge[valor] = bridge[valor].astype('string').str.strip()
+    bridge = bridge[bridge[valor].notna() & ~bridge[valor].isin(MISSING_TOKENS)]
+    bridge['position'] = bridge.groupby('filmid').cumcount().astype('int8')
+    return bridge.reset_index(drop=True)
+
+
+def build_bridges(df, columns=None):
+    """
+    Builds the bridge table of every multi-value column.
+
+    Args:
+        df (pd.DataFrame): DataFrame with the column 'filmid' and the multi-value columns.
+        columns (list): Columns to split. Defaults to the keys of `BRIDGE_COLUMNS` present in `df`.
+
+    Returns:
+        dict: The bridge tables by name (see `bridge_name`).
+    """
+    columns = columns or [column for column in BRIDGE_COLUMNS if column in df.columns]
+    return {bridge_name(column): build_bridge(df, column) for column in columns}
+
+
+class InvertedIndex:
+    """
+    Lookup of the films that have a value in a multi-value column ("films with actor X", "films
+    of genre Y in any position"), built once from the bridge tables instead of searching the
+    comma-separated texts on every query. Values are matched ignoring case.
+
+    Args:
+        bridges (dict): Bridge tables by name, as returned by `build_bridges`.
+    """
+
+    def __init__(self, bridges):
+        self.index = {}
+        for column, valor in BRIDGE_COLUMNS.items():
+            bridge = bridges.get(bridge_name(column))
+            if bridge is None:
+                continue
+            claves = bridge[valor].str.lower()
+            self.index[column] = {
+                clave: pd.Index(filmids) for clave, filmids in bridge.groupby(claves.values)['filmid'].unique().items()
+            }
+
+    def values(self, column):
+        """
+        Returns the values of a column in the index, in lowercase.
+        """
+        return sorted(self.index[column])
+
+    def films(self, column, value):
+        """
+        Returns the IMDb IDs of the films with a value in a column.
+
+        Args:
+            column (str): Multi-value column (e.g. 'actors').
+            value (str): Value to look up (e.g. 'Gael García Bernal').
+
+        Returns:
+            pd.Index: The IMDb IDs. Empty if no film has the value.
+
+        Raises:
+            KeyError: If the column is not indexed.
+        """
+        return self.index[column].get(value.lower(), pd.Index([], dtype='string'))
+
+    def lookup(self, **criteria):
+        """
+        Returns the IMDb IDs of the films that match every criterion, e.g.
+        `lookup(actors='Gael García Bernal', genre='drama')`. A list of values matches any of them.
+        """
+        resultado = None
+        for column, values in criteria.items():
+            values = [values] if isinstance(values, str) else values
+            films = pd.Index([], dtype='string')
+            for value in values:
+                films = films.union(self.films(column, value))
+            resultado = films if resultado is None else resultado.intersection(films)
+        return resultado if resultado is not None else pd.Index([], dtype='string')
+
+    def select(self, df, **criteria):
+        """
+        Returns the rows of a DataFrame with a column 'filmid' (e.g. the final dataset) whose film
+        matches the criteria of `lookup`.
+        """
+        return df[df['filmid'].isin(self.lookup(**criteria))]
+
+
+def load_inverted_index(directory=ARTIFACTS_DIR):
+    """
+    Builds the `InvertedIndex` from the bridge tables saved by the pipeline.
+
+    Args:
+        directory (str): Folder of the artifacts.
+
+    Returns:
+        InvertedIndex: The index of the bridge tables found.
+    """
+    bridges = {}
+    for column in BRIDGE_COLUMNS:
+        try:
+            bridges[bridge_name(column)] = read_artifact(bridge_name(column), directory=directory)
+        except FileNotFoundError:
+            continue
+    return InvertedIndex(bridges)
@@ -0,0 +1,364 @@
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+
+# Sin ventanas: los gráficos solo se guardan como PNG
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt
+import matplotlib.ticker as ticker
+import pandas as pd
+import seaborn as sns
+
+from artifact_store import ARTIFACTS_DIR, load_artifact
+
+FINAL_DATASET_CSV = os.path.join('csv', 'final_dataset.csv')
+VISUALIZATIONS_DIR = 'visualizations'
+RENDER_STATE_FILE = 'render_state.json'
+
+# Columnas por las que se puede dividir el dataset para hacer un gráfico por valor
+SLICES = ['category', 'year']
+
+WINNER_PALETTE = {'yes': 'gold', 'no': 'gray'}
+WINNER_ORDER = ['no', 'yes']
+
+
+class Chart:
+    """
+    Chart of the registry: the function that draws it, the PNG it writes and the columns of the
+    final dataset it reads. Its spec hash covers the code of the function, the file name, the
+    parameters and the winner palette and order, so a chart is drawn again when any of them or its
+    data change.
+
+    Args:
+        name (str): Name of the chart.
+        func (callable): Function `(df, **params) -> matplotlib.figure.Figure`.
+        filename (str): Name of the PNG in the visualizations folder.
+        columns (list): Columns of the final dataset the chart reads.
+        params (dict): JSON-serializable parameters passed to `func`.
+    """
+
+    def __init__(self, name, func, filename, columns, params=None):
+        self.name = name
+        self.func = func
+        self.filename = filename
+        self.columns = list(columns)
+        self.params = params or {}
+
+    def spec_hash(self):
+        """
+        Returns the hash of the chart spec: code, file name, columns, parameters and the shared
+        winner colours and order.
+        """
+        payload = json.dumps(
+            {'chart': self.name, 'code': inspect.getsource(self.func), 'filename': self.filename,
+             'columns': self.columns, 'params': self.params,
+             'style': {'palette': WINNER_PALETTE, 'order': WINNER_ORDER}},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def data_hash(self, df):
+        """
+        Returns the hash of the columns of `df` the chart reads.
+        """
+        datos = df[[c for c in self.columns if c in df.columns]]
+        digest = hashlib.sha256(pd.util.hash_pandas_object(datos, index=False).to_numpy().tobytes())
+        digest.update(','.join(datos.columns).encode('utf-8'))
+        return digest.hexdigest()
+
+    def render(self, df, path):
+        """
+        Draws the chart with the rows of `df` and saves it in `path`.
+        """
+        fig = self.func(df, **self.params)
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            fig.savefig(path)
+        finally:
+            plt.close(fig)
+        return path
+
+
+CHARTS = {}
+
+
+def register_chart(name, filename, columns, **params):
+    """
+    Decorator that adds a drawing function to `CHARTS`.
+
+    Args:
+        name (str): Name of the chart.
+        filename (str): Name of the PNG it writes.
+        columns (list): Columns of the final dataset it reads.
+        **params: Parameters passed to the function.
+    """
+    def decorator(func):
+        CHARTS[name] = Chart(name, func, filename, columns, params)
+        return func
+    return decorator
+
+
+# --- Gráficos de visualizacion.ipynb ---
+
+@register_chart('scores', 'puntuiacionibdmganadorasyno.png', ['winner', 'imdbRating', 'metascore'])
+def draw_scores(df):
+    fig, (ax_imdb, ax_meta) = plt.subplots(1, 2, figsize=(14, 6))
+
+    # Gráfico 1: IMDb Rating
+    sns.boxplot(data=df, x='winner', y='imdbRating', hue='winner', order=WINNER_ORDER, palette=WINNER_PALETTE,
+                legend=False, ax=ax_imdb)
+    ax_imdb.set_title("Puntuación IMDb: Ganadoras vs No Ganadoras del Oscar", fontsize=14)
+    ax_imdb.set_xlabel("Ganó el Oscar", fontsize=12)
+    ax_imdb.set_ylabel("Puntuación IMDb", fontsize=12)
+    ax_imdb.grid(True, linestyle='--', alpha=0.5)
+
+    # Gráfico 2: Metascore
+    sns.boxplot(data=df, x='winner', y='metascore', hue='winner', order=WINNER_ORDER, palette=WINNER_PALETTE,
+                legend=False, ax=ax_meta)
+    ax_meta.set_title("Metascore: Ganadoras vs No Ganadoras del Oscar", fontsize=14)
+    ax_meta.set_xlabel("Ganó el Oscar", fontsize=12)
+    ax_meta.set_ylabel("Metascore", fontsize=12)
+    ax_meta.grid(True, linestyle='--', alpha=0.5)
+    fig.tight_layout()
+    return fig
+
+
+@register_chart('roi', 'roiganadorasvsnoganadoras.png', ['winner', 'ROI'], roi_max=1000)
+def draw_roi(df, roi_max):
+    # Se eliminan las películas con ROI muy extremo para una visualización más clara
+    df_filtrado = df[df['ROI'] < roi_max]
+    fig, ax = plt.subplots(figsize=(8, 6))
+    sns.boxplot(data=df_filtrado, x='winner', y='ROI', order=WINNER_ORDER, ax=ax)
+    ax.set_title("ROI de películas ganadoras vs no ganadoras del Oscar")
+    ax.set_xlabel("Ganó el Oscar")
+    ax.set_ylabel("Retorno de Inversión (ROI)")
+    ax.grid(True)
+    return fig
+
+
+@register_chart('budget_vs_boxoffice', 'presupuestoVsRecaudacion.png', ['winner', 'budget', 'Worlwide boxoffice'],
+                budget_max=500_000_000, xlim=300_000_000, ylim=2_000_000_000)
+def draw_budget_vs_boxoffice(df, budget_max, xlim, ylim):
+    df_filtrado = df[df['budget'] <= budget_max]
+    fig, ax = plt.subplots(figsize=(10, 8))
+    sns.scatterplot(data=df_filtrado, x='budget', y='Worlwide boxoffice', hue='winner', hue_order=WINNER_ORDER,
+                    palette=WINNER_PALETTE, alpha=0.7, s=70, ax=ax)
+
+    # Línea diagonal: punto de equilibrio (presupuesto = recaudación)
+    ax.plot([0, xlim], [0, xlim], color='red', linestyle='--', linewidth=1.5, label='Punto de equilibrio')
+
+    ax.set_title('Presupuesto vs Recaudación Mundial de Películas', fontsize=16, weight='bold', pad=20)
+    ax.set_xlabel('Presupuesto (USD)', fontsize=13)
+    ax.set_ylabel('Recaudación Mundial (USD)', fontsize=13)
+    ax.grid(True, linestyle='--', alpha=0.4)
+    ax.xaxis.set_major_formatter(ticker.FuncFormatter(lambda x, _: f'${x/1e6:.0f}M'))
+    ax.yaxis.set_major_formatter(ticker.FuncFormatter(lambda y, _: f'${y/1e6:.0f}M'))
+    ax.set_xlim(0, xlim)
+    ax.set_ylim(0, ylim)
+    ax.legend(title='Ganadora del Oscar', loc='upper left', frameon=True)
+    fig.tight_layout()
+    return fig
+
+
+@register_chart('metascore_vs_imdb', 'metascorevsimdbyroi.png', ['winner', 'metascore', 'imdbRating', 'ROI'])
+def draw_metascore_vs_imdb(df):
+    # Tamaño del punto según el ROI, entre 10 y 1000
+    df = df.assign(
+        winner_label=df['winner'].astype('string').map({'yes': 'Ganadora', 'no': 'No ganadora'}),
+        roi_scaled=(df['ROI'] * 10).clip(10, 1000),
+    )
+    fig, ax = plt.subplots(figsize=(9, 6))
+    sns.scatterplot(data=df, x='metascore', y='imdbRating', size='roi_scaled', hue='winner_label',
+                    hue_order=['Ganadora', 'No ganadora'], alpha=0.7, sizes=(20, 400), palette='Set2', ax=ax)
+    ax.set_title('Metascore vs IMDb Rating (Tamaño según ROI)')
+    ax.set_xlabel('Metascore')
+    ax.set_ylabel('IMDb Rating')
+    ax.set_xlim(20, 100)
+    ax.set_ylim(2, 10)
+    ax.legend(title='Ganadora del Oscar')
+    fig.tight_layout()
+    return fig
+
+
+@register_chart('genres_above_winner_average', 'comparacion ganadoras media sup.png', ['winner', 'genre', 'imdbRating'],
+                top=5)
+def draw_genres_above_winner_average(df, top):
+    # Porcentaje de ganadoras y no ganadoras de cada género con una puntuación superior a la media de las ganadoras
+    ganadora = df['winner'].astype('string').eq('yes')
+    media_ganadoras = df.loc[ganadora, 'imdbRating'].mean()
+    encima = df['imdbRating'] > media_ganadoras
+    comparacion = pd.DataFrame({
+        'percentage_winner': encima[ganadora].groupby(df.loc[ganadora, 'genre'], observed=True).mean() * 100,
+        'percentage_no_winner': encima[~ganadora].groupby(df.loc[~ganadora, 'genre'], observed=True).mean() * 100,
+    }).rename_axis('genre').reset_index()
+    comparacion['genre'] = comparacion['genre'].astype('string')
+
+    fig, ax = plt.subplots(figsize=(14, 7))
+    sns.barplot(data=comparacion.sort_values(by='percentage_winner', ascending=False).head(top),
+                x='genre', y='percentage_winner', color='blue', label='Ganadoras', alpha=0.7, ax=ax)
+    sns.barplot(data=comparacion.sort_values(by='percentage_no_winner', ascending=False).head(top),
+                x='genre', y='percentage_no_winner', color='orange', label='No ganadoras', alpha=0.7, ax=ax)
+    ax.set_title('Comparación de Géneros: Películas Ganadoras vs No Ganadoras con Puntuación Superior a la Media',
+                 fontsize=16)
+    ax.set_xlabel('Género', fontsize=12)
+    ax.set_ylabel('Porcentaje de Películas', fontsize=12)
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.legend(title='Tipo de Película', loc='upper right')
+    return fig
+
+
+# --- Renderizado por lotes ---
+
+def _slug(value):
+    # Nombre de carpeta de un valor ("best picture" -> "best_picture")
+    return re.sub(r'[^0-9a-zA-Z]+', '_', str(value)).strip('_').lower() or 'none'
+
+
+def plan_renders(df, charts=None, by=None, output_dir=VISUALIZATIONS_DIR):
+    """
+    Lists the PNGs to render: every chart for the whole dataset or, with `by`, for every value
+    of a column (e.g. `visualizations/category/best_picture/roiganadorasvsnoganadoras.png`).
+
+    Args:
+        df (pd.DataFrame): Final dataset.
+        charts (list): Names of the charts of `CHARTS`. Defaults to all of them.
+        by (str): Column of `SLICES` to split the dataset by, or None.
+        output_dir (str): Folder of the PNGs.
+
+    Returns:
+        list: Tuples (chart name, slice DataFrame, PNG path, fingerprint).
+
+    Raises:
+        ValueError: If a chart or the slice column is unknown.
+    """
+    charts = charts or list(CHARTS)
+    desconocidos = [c for c in charts if c not in CHARTS]
+    if desconocidos:
+        raise ValueError(f"Unknown charts: {desconocidos} (use some of {list(CHARTS)})")
+    if by is not None and by not in SLICES:
+        raise ValueError(f"Unknown slice: {by} (use one of {SLICES})")
+
+    if by is None:
+        trozos = [(output_dir, df)]
+    else:
+        trozos = [
+            (os.path.join(output_dir, by, _slug(valor)), trozo)
+            for valor, trozo in df.groupby(df[by].astype('string'), sort=True)
+        ]
+
+    tareas = []
+    for name in charts:
+        chart = CHARTS[name]
+        spec = chart.spec_hash()
+        for carpeta, trozo in trozos:
+            trozo = trozo[[c for c in chart.columns if c in trozo.columns]]
+            fingerprint = hashlib.sha256(f'{spec}:{chart.data_hash(trozo)}'.encode('utf-8')).hexdigest()
+            tareas.append((name, trozo, os.path.join(carpeta, chart.filename), fingerprint))
+    return tareas
+
+
+def _render_task(name, df, path):
+    return CHARTS[name].render(df, path)
+
+
+def _read_state(directory):
+    path = os.path.join(directory, RENDER_STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_state(directory, state):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, RENDER_STATE_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def render_charts(df, charts=None, by=None, output_dir=VISUALIZATIONS_DIR, directory=ARTIFACTS_DIR, force=False,
+                  workers=None):
+    """
+    Renders the charts of the registry without a display, in parallel processes, skipping the
+    PNGs whose data and chart spec did not change since they were last written.
+
+    Args:
+        df (pd.DataFrame): Final dataset.
+        charts (list): Names of the charts of `CHARTS`. Defaults to all of them.
+        by (str): Column of `SLICES` to render one chart per value, or None for the whole dataset.
+        output_dir (str): Folder of the PNGs.
+        directory (str): Folder where the fingerprints of the rendered PNGs are kept.
+        force (bool): If True, renders every chart even if it did not change.
+        workers (int): Number of processes. Defaults to the number of CPUs.
+
+    Returns:
+        pd.DataFrame: One row per PNG with the columns 'chart', 'path' and 'action'
+            ('rendered' or 'skipped').
+
+    Raises:
+        Exception: The error of the first chart that failed, after rendering the rest and saving
+            the fingerprints of the PNGs that were written.
+    """
+    state = _read_state(directory)
+    filas = []
+    pendientes = []
+    for name, trozo, path, fingerprint in plan_renders(df, charts, by, output_dir):
+        if not force and state.get(path) == fingerprint and os.path.exists(path):
+            filas.append({'chart': name, 'path': path, 'action': 'skipped'})
+        else:
+            pendientes.append((name, trozo, path, fingerprint))
+
+    errores = []
+    if pendientes:
+        workers = min(workers or os.cpu_count() or 1, len(pendientes))
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futuros = {
+                    executor.submit(_render_task, name, trozo, path): (name, path, fingerprint)
+                    for name, trozo, path, fingerprint in pendientes
+                }
+                for futuro in as_completed(futuros):
+                    name, path, fingerprint = futuros[futuro]
+                    try:
+                        futuro.result()
+                    except Exception as e:
+                        # Un gráfico que falla no impide dibujar los demás ni guardar sus huellas
+                        print(f"❌ Error rendering {path}: {e}")
+                        errores.append(e)
+                        continue
+                    state[path] = fingerprint
+                    filas.append({'chart': name, 'path': path, 'action': 'rendered'})
+        finally:
+            _write_state(directory, state)
+    if errores:
+        raise errores[0]
+    return pd.DataFrame(filas, columns=['chart', 'path', 'action']).sort_values('path', ignore_index=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Renders the charts of the final dataset as PNG files.')
+    parser.add_argument('charts', nargs='*', help=f'Charts to render (default: all of {list(CHARTS)})')
+    parser.add_argument('--csv', default=FINAL_DATASET_CSV, help='CSV of the final dataset')
+    parser.add_argument('--by', choices=SLICES, help='Render one chart per category or year')
+    parser.add_argument('--output-dir', default=VISUALIZATIONS_DIR, help='Folder of the PNGs')
+    parser.add_argument('--directory', default=ARTIFACTS_DIR, help='Folder of the artifacts')
+    parser.add_argument('--workers', type=int, default=None, help='Number of processes')
+    parser.add_argument('--force', action='store_true', help='Render every chart even if it did not change')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    df = load_artifact('final_dataset', args.csv, directory=args.directory)
+    resultado = render_charts(df, args.charts or None, args.by, args.output_dir, args.directory, args.force,
+                              args.workers)
+    print(resultado.to_string(index=False))
+    renderizados = (resultado['action'] == 'rendered').sum()
+    print(f"🖼️ {renderizados} rendered, {len(resultado) - renderizados} skipped in {time.perf_counter() - inicio:.2f}s")
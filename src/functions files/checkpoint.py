@@ -0,0 +1,208 @@
+import json
+import os
+import threading
+import time
+
+from fetch_engine import fetch_ordered, fetch_stream
+
+
+class Checkpoint:
+    """
+    Append-only JSONL checkpoint of a collector run.
+
+    Every fetched item is written as one line `{"id", "ok", "record", "fetched_at"}` as soon as it
+    arrives, so an interrupted run can be resumed: IDs already done are skipped and only the
+    failures are fetched again. If an ID appears several times, the last line wins. IDs marked
+    with `expire` are fetched again too, keeping their last good record if the new attempt fails.
+
+    Args:
+        path (str): Path of the JSONL file. It is created if it does not exist.
+        keep_records (bool): If False, only the status and the position in the file of every ID are
+            kept in memory, and `record` reads the record back from the file when it is needed, so
+            the memory used does not grow with the size of the records (streaming build).
+    """
+
+    def __init__(self, path, keep_records=True):
+        self.path = path
+        self.keep_records = keep_records
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.stale = set()
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                offset = 0
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Última línea incompleta si el proceso se cortó a mitad de escritura
+                        offset += len(line)
+                        continue
+                    self.entries[entry['id']] = self._entry(entry, offset)
+                    offset += len(line)
+        elif os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def _entry(self, entry, offset):
+        if self.keep_records:
+            return entry
+        return {'id': entry['id'], 'ok': entry['ok'], 'fetched_at': entry['fetched_at'], 'offset': offset}
+
+    def record(self, item_id):
+        """
+        Returns the stored record of an ID, or None if it was never fetched.
+        """
+        entry = self.entries.get(item_id)
+        if entry is None:
+            return None
+        if 'offset' not in entry:
+            return entry['record']
+        with open(self.path, 'rb') as f:
+            f.seek(entry['offset'])
+            return json.loads(f.readline())['record']
+
+    def done_ids(self):
+        """
+        Returns the set of IDs fetched successfully.
+        """
+        return {item_id for item_id, entry in self.entries.items() if entry['ok']}
+
+    def failed_ids(self):
+        """
+        Returns the set of IDs whose last attempt failed.
+        """
+        return {item_id for item_id, entry in self.entries.items() if not entry['ok']}
+
+    def records(self):
+        """
+        Returns the stored records of the IDs fetched successfully, by ID.
+        """
+        return {item_id: self.record(item_id) for item_id, entry in self.entries.items() if entry['ok']}
+
+    def fetched_at(self):
+        """
+        Returns the timestamp of the last successful fetch of each ID, by ID.
+        """
+        return {item_id: entry['fetched_at'] for item_id, entry in self.entries.items() if entry['ok']}
+
+    def expire(self, ids):
+        """
+        Marks IDs as stale so the next run fetches them again even if they are done.
+        """
+        with self.lock:
+            self.stale.update(ids)
+
+    def pending(self, ids):
+        """
+        Returns the IDs of `ids` that are not done yet (never fetched, failed or expired), keeping their order.
+        """
+        done = self.done_ids() - self.stale
+        return [item_id for item_id in ids if item_id not in done]
+
+    def append(self, item_id, record, ok=True):
+        """
+        Writes the result of an item to the checkpoint file. Safe to call from several threads.
+        """
+        entry = {'id': item_id, 'ok': bool(ok), 'record': record, 'fetched_at': time.time()}
+        line = (json.dumps(entry, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+        with self.lock:
+            stale = item_id in self.stale
+            self.stale.discard(item_id)
+            if stale and not ok and self.entries.get(item_id, {}).get('ok'):
+                # Un refresco fallido no borra el último dato bueno
+                return
+            with open(self.path, 'ab') as f:
+                offset = f.tell()
+                f.write(line)
+            self.entries[item_id] = self._entry(entry, offset)
+
+
+class _DoneRecords:
+    """
+    Read-only mapping of the IDs done in a checkpoint (and not stale) to their records, read from the
+    checkpoint file on access instead of being held in memory.
+    """
+
+    def __init__(self, checkpoint):
+        self.checkpoint = checkpoint
+        self.done = checkpoint.done_ids() - checkpoint.stale
+
+    def __len__(self):
+        return len(self.done)
+
+    def __contains__(self, item_id):
+        return item_id in self.done
+
+    def __getitem__(self, item_id):
+        if item_id not in self.done:
+            raise KeyError(item_id)
+        return self.checkpoint.record(item_id)
+
+
+def fetch_with_checkpoint(ids, fetch_func, host, checkpoint=None, is_ok=None, **fetch_kwargs):
+    """
+    Runs `fetch_ordered` over the IDs that are not done in the checkpoint, saving every result
+    as it arrives, and merges them with the results stored by previous runs.
+
+    Args:
+        ids (iterable): IDs to fetch.
+        fetch_func (callable): Function that fetches and returns the data of a single ID.
+        host (str): Host the requests go to.
+        checkpoint (str | Checkpoint): Checkpoint file or object. If None, no checkpoint is used.
+        is_ok (callable): Function that decides if a result is a success. Defaults to `result is not None`.
+        **fetch_kwargs: Extra arguments for `fetch_ordered` (max_in_flight, rate, label...).
+
+    Returns:
+        list: The results, in the same order as `ids`.
+    """
+    ids = list(ids)
+    if checkpoint is None:
+        return fetch_ordered(ids, fetch_func, host, **fetch_kwargs)
+    if isinstance(checkpoint, str):
+        checkpoint = Checkpoint(checkpoint)
+    is_ok = is_ok or (lambda result: result is not None)
+
+    pendientes = checkpoint.pending(ids)
+    if len(pendientes) < len(ids):
+        print(f"♻️ Resuming from checkpoint {checkpoint.path}: {len(ids) - len(pendientes)} IDs already done")
+
+    fetch_ordered(
+        pendientes, fetch_func, host,
+        on_result=lambda item_id, result: checkpoint.append(item_id, result, is_ok(result)),
+        **fetch_kwargs
+    )
+    entries = checkpoint.entries
+    return [checkpoint.record(item_id) if item_id in entries else None for item_id in ids]
+
+
+def stream_with_checkpoint(ids, fetch_func, host, checkpoint=None, is_ok=None, **fetch_kwargs):
+    """
+    Streaming version of `fetch_with_checkpoint`: yields `(id, result)` in the same order as `ids`,
+    reusing the results stored by previous runs and saving every new one as it arrives. Only the set
+    of done IDs is kept in memory; their records are read back from the checkpoint file when their
+    turn comes.
+
+    Args:
+        ids (iterable): IDs to fetch. Can be a generator.
+        fetch_func (callable): Function that fetches and returns the data of a single ID.
+        host (str): Host the requests go to.
+        checkpoint (str | Checkpoint): Checkpoint file or object. If None, no checkpoint is used.
+        is_ok (callable): Function that decides if a result is a success. Defaults to `result is not None`.
+        **fetch_kwargs: Extra arguments for `fetch_stream` (max_in_flight, rate, window).
+
+    Yields:
+        tuple: (id, result).
+    """
+    if checkpoint is None:
+        yield from fetch_stream(ids, fetch_func, host, **fetch_kwargs)
+        return
+    if isinstance(checkpoint, str):
+        checkpoint = Checkpoint(checkpoint, keep_records=False)
+    is_ok = is_ok or (lambda result: result is not None)
+
+    hechos = _DoneRecords(checkpoint)
+    yield from fetch_stream(
+        ids, fetch_func, host, known=hechos,
+        on_result=lambda item_id, result: checkpoint.append(item_id, result, is_ok(result)),
+        **fetch_kwargs
+    )
@@ -0,0 +1,157 @@
+import argparse
+import os
+
+import pandas as pd
+
+from artifact_store import ARTIFACTS_DIR, apply_schema, load_artifact, memory_usage
+
+FINAL_DATASET_CSV = os.path.join('csv', 'final_dataset.csv')
+
+# Contrato de tipos del dataset final en memoria. 'filmid' pasa a ser la clave entera de
+# `encode_filmid`, el dinero es entero (nulo donde falta) y 'winner' es booleano.
+FINAL_DTYPES = {
+    'filmid': 'int32',
+    'title': 'string',
+    'runtime': 'Int16',
+    'genre': 'category',
+    'director': 'category',
+    'actors': 'string',
+    'language': 'category',
+    'country': 'category',
+    'imdbRating': 'Float32',
+    'metascore': 'Int16',
+    'imdbVotes': 'Int32',
+    'Worlwide boxoffice': 'Int64',
+    'budget': 'Int64',
+    'ROI': 'float64',
+    'year': 'int16',
+    'winner': 'bool',
+    'category': 'category',
+}
+
+# 7 cifras con ceros a la izquierda, u 8 sin ellos: cualquier otra forma no se recupera desde la clave
+_FILMID_PATTERN = r'tt(?:\d{7}|[1-9]\d{7})'
+
+
+def encode_filmid(filmids):
+    """
+    Converts IMDb IDs ("tt0245712") to integer keys (245712).
+
+    Args:
+        filmids (pd.Series): IMDb IDs.
+
+    Returns:
+        pd.Series: The keys, as int32.
+
+    Raises:
+        ValueError: If an ID is missing or does not have the "tt" + 7 digits or "tt" + 8 digits
+            without leading zero form (e.g. "tt01234567"), because its key could not be converted back.
+    """
+    textos = filmids.astype('string')
+    validos = textos.str.fullmatch(_FILMID_PATTERN).fillna(False)
+    if not validos.all():
+        raise ValueError(f"Invalid IMDb IDs: {textos[~validos].head(5).tolist()}")
+    return textos.str[2:].astype('int32')
+
+
+def decode_filmid(keys):
+    """
+    Converts the integer keys of `encode_filmid` back to IMDb IDs (245712 -> "tt0245712").
+
+    Args:
+        keys (pd.Series): Integer keys.
+
+    Returns:
+        pd.Series: The IMDb IDs.
+    """
+    return ('tt' + keys.astype('string').str.zfill(7)).astype('string')
+
+
+def compact_final_dataset(df):
+    """
+    Converts the final dataset to the types of `FINAL_DTYPES`: integer film keys, categorical
+    labels, integer money and a boolean 'winner'. The input DataFrame is not modified.
+
+    Args:
+        df (pd.DataFrame): Final dataset, as written by `create_final_dataset` or read from its CSV.
+
+    Returns:
+        pd.DataFrame: The compact DataFrame. Columns not in the contract are kept as they are.
+    """
+    # El esquema del artefacto ya convierte textos como "154 min" o "261,019" a números
+    df = apply_schema(df, 'final_dataset')
+    columnas = {}
+    for column, dtype in FINAL_DTYPES.items():
+        if column not in df.columns:
+            continue
+        if column == 'filmid':
+            columnas[column] = encode_filmid(df[column])
+        elif column == 'winner':
+            columnas[column] = df[column].astype('string').str.lower().eq('yes').fillna(False).astype(bool)
+        elif dtype == 'category':
+            columnas[column] = df[column].astype('string').astype('category')
+        else:
+            columnas[column] = df[column].astype(dtype)
+    return df.assign(**columnas)
+
+
+def expand_final_dataset(df):
+    """
+    Reverses `compact_final_dataset` for the columns that change meaning: the IMDb IDs come back
+    as text and 'winner' as 'yes'/'no', as in final_dataset.csv.
+    """
+    return df.assign(
+        filmid=decode_filmid(df['filmid']),
+        winner=df['winner'].map({False: 'no', True: 'yes'}).astype('category'),
+    )
+
+
+def memory_report(before, after):
+    """
+    Compares the memory used by every column of a DataFrame before and after compacting it.
+
+    Args:
+        before (pd.DataFrame): Original DataFrame.
+        after (pd.DataFrame): Compact DataFrame.
+
+    Returns:
+        pd.DataFrame: One row per column plus a 'total' row, with the dtypes, the kilobytes
+            before and after and the ratio.
+    """
+    antes = before.memory_usage(deep=True, index=False) / 1024
+    despues = after.memory_usage(deep=True, index=False) / 1024
+    report = pd.DataFrame({
+        'dtype before': before.dtypes.astype(str),
+        'dtype after': after.dtypes.reindex(before.columns).astype(str),
+        'KB before': antes.round(1),
+        'KB after': despues.reindex(before.columns).round(1),
+    })
+    report.loc['total'] = ['', '', round(antes.sum(), 1), round(despues.sum(), 1)]
+    report['ratio'] = (report['KB before'] / report['KB after']).round(2)
+    return report
+
+
+def load_final_dataset(csv_path=FINAL_DATASET_CSV, columns=None, directory=ARTIFACTS_DIR):
+    """
+    Loads the final dataset in its compact form (see `compact_final_dataset`).
+
+    Args:
+        csv_path (str): CSV of the final dataset, imported as an artifact the first time.
+        columns (list): Columns to read. Defaults to all of them.
+        directory (str): Folder of the artifacts.
+
+    Returns:
+        pd.DataFrame: The compact final dataset.
+    """
+    return compact_final_dataset(load_artifact('final_dataset', csv_path, columns, directory))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Memory used by the final dataset before and after compacting it.')
+    parser.add_argument('path', nargs='?', default=FINAL_DATASET_CSV, help='CSV of the final dataset')
+    args = parser.parse_args()
+
+    original = pd.read_csv(args.path)
+    compacto = compact_final_dataset(original)
+    print(memory_report(original, compacto).to_string())
+    print(f"📦 {memory_usage(original)} MB -> {memory_usage(compacto)} MB")
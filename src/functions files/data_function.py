@@ -1,21 +1,40 @@
-def cleaning_kaggle_info(df):
+import json
+import os
+
+import pandas as pd
+
+from artifact_store import ARTIFACTS_DIR, load_artifact, write_artifact
+from bridge_tables import BRIDGE_COLUMNS, bridge_name, build_bridges
+from instrumentation import instrumented_stage
+from kaggle_loader import FILM_CATEGORIES, TEXT_COLUMNS
+from normalize import normalize_columns
+from web_scraping_functions import split_boxoffice_summary
+
+# Presupuestos puestos a mano en el notebook para las películas que The Numbers no tiene
+MANUAL_BUDGETS_PATH = os.path.join('csv', 'raw', 'manual_budgets.json')
+
+
+@instrumented_stage()
+def cleaning_kaggle_info(df, year_min=2000, year_max=None, categories=FILM_CATEGORIES):
     """
-    Cleans and transforms the Kaggle DataFrame.
+    Cleans and transforms the Kaggle DataFrame. The input DataFrame is not modified.
+
+    To read the Excel with the filters applied while loading, use `kaggle_loader.load_kaggle`.
 
     Args:
         df (pd.DataFrame): Original Kaggle DataFrame.
+        year_min (int): First year kept. None keeps every year.
+        year_max (int): Last year kept. None keeps every year.
+        categories (iterable): Canonical categories kept, in lowercase. None keeps every category.
 
     Returns:
         pd.DataFrame: Cleaned and transformed DataFrame.
     """
     # Convert column names to lowercase
-    df.columns = df.columns.str.lower()
-    
-    # Convert all in lowercase
-    df = df.applymap(lambda x: x.lower() if isinstance(x, str) else x)
+    df = df.rename(columns=str.lower)
     
     # Drop unnecessary columns
-    df.drop(columns=[ 
+    df = df.drop(columns=[ 
         'class', 
         'ceremony', 
         'nomid', 
@@ -26,33 +45,32 @@ def cleaning_kaggle_info(df):
         'note', 
         'citation', 
         'multifilmnomination'
-    ], inplace=True)
+    ], errors='ignore')
     
     # Filter out invalid years
-    df = df[~df['year'].str.contains(r'/', regex=True)]
-    df['year'] = df['year'].astype(int)
-    
-    # Filter the last 10 years
-    df = df[df['year'] >= 2000]
-    
-    # Filter specific film categories
-    film_categories = [
-        'best picture',
-        'animated feature film',
-        'international feature film'
-    ]
-    df = df[df['canonicalcategory'].isin(film_categories)]
+    df = df[~df['year'].astype(str).str.contains(r'/', regex=True)]
+    df = df.assign(year=df['year'].astype(int))
     
-    # Convert 'winner' to 0 (no) and 1 (yes)
-    df['winner'] = df['winner'].fillna(0).astype(int)
+    # Filter the years and the film categories (before lowercasing, so only the rows kept are converted)
+    mascara = pd.Series(True, index=df.index)
+    if year_min is not None:
+        mascara &= df['year'] >= year_min
+    if year_max is not None:
+        mascara &= df['year'] <= year_max
+    if categories is not None:
+        mascara &= df['canonicalcategory'].str.lower().isin([c.lower() for c in categories])
+    df = df[mascara]
     
-    # Convert 0 to 'no' and 1 to 'yes' in the 'winner' column
-    df['winner'] = df['winner'].replace({0: 'no', 1: 'yes'})
+    # Convert the text columns in lowercase
+    df = df.assign(**{column: df[column].str.lower() for column in TEXT_COLUMNS})
     
-    return df
+    # Convert 'winner' to 0 (no) and 1 (yes), and then 0 to 'no' and 1 to 'yes'
+    winner = df['winner'].fillna(0).astype(int)
+    return df.assign(winner=winner.replace({0: 'no', 1: 'yes'}))
 
 
 
+@instrumented_stage()
 def create_boxoffice_dataset(df_domestic_boxoffice, df_international_boxoffice, df_worldwide):
     """
         Creates a combined DataFrame of box office revenues from three sources:
@@ -64,139 +82,231 @@ def create_boxoffice_dataset(df_domestic_boxoffice, df_international_boxoffice,
             df_worldwide (pd.DataFrame): Worldwide box office revenue data.
 
         Returns:
-            pd.DataFrame: Combined and cleaned DataFrame.
+            pd.DataFrame: Combined and cleaned DataFrame. The input DataFrames are not modified.
         """
-    # Eliminar columna 'title' si existe
-    for df in [df_international_boxoffice, df_worldwide]:
-        if 'title' in df.columns:
-            df.drop(columns='title', inplace=True)
-
-    # Establecer 'IMDb ID' como índice
-    df_domestic_boxoffice.set_index('IMDb ID', inplace=True)
-    df_international_boxoffice.set_index('IMDb ID', inplace=True)
-    df_worldwide.set_index('IMDb ID', inplace=True)
+    # Quitar 'title' de las dos últimas fuentes y usar 'IMDb ID' como índice (sin tocar las entradas)
+    df_international_boxoffice = df_international_boxoffice.drop(columns='title', errors='ignore').set_index('IMDb ID')
+    df_worldwide = df_worldwide.drop(columns='title', errors='ignore').set_index('IMDb ID')
 
     # Unir los tres DataFrames
-    df_boxoffice = df_domestic_boxoffice.join(
+    df_boxoffice = df_domestic_boxoffice.set_index('IMDb ID').join(
         [df_international_boxoffice, df_worldwide], how='outer'
     ).reset_index()
 
-    # Limpiar y convertir columnas monetarias
+    # Limpiar y convertir columnas monetarias (los valores que no se pueden leer quedan nulos y se informan)
     columnas_recaudacion = [
         'domestic boxoffice', 'international boxoffice', 'Worlwide boxoffice'
     ]
-    
-    for col in columnas_recaudacion:
-        df_boxoffice[col] = (
-            df_boxoffice[col]
-            .replace(r'[\$,]', '', regex=True)
-            .replace('', np.nan)
-            .fillna(0)
-            .astype(int)
-        )
+    df_boxoffice, _ = normalize_columns(
+        df_boxoffice, {col: 'money' for col in columnas_recaudacion}, report_label='boxoffice'
+    )
 
     # Renombrar columna 'IMDb ID' a 'filmid'
-    df_boxoffice.rename(columns={'IMDb ID': 'filmid'}, inplace=True)
+    return df_boxoffice.rename(columns={'IMDb ID': 'filmid'})
 
-    return df_boxoffice
 
+@instrumented_stage()
+def create_boxoffice_dataset_from_summary(df_summary):
+    """
+    Creates the combined box office DataFrame from a single Box Office Mojo scrape
+    (the output of `boxoffice_summary_df`) instead of three separate ones.
+
+    Args:
+        df_summary (pd.DataFrame): DataFrame with the columns 'IMDb ID', 'title', 'domestic boxoffice',
+            'international boxoffice' and 'Worlwide boxoffice'.
+
+    Returns:
+        pd.DataFrame: Combined and cleaned DataFrame, same as `create_boxoffice_dataset`.
+    """
+    df_domestic_boxoffice, df_international_boxoffice, df_worldwide = split_boxoffice_summary(df_summary)
+    return create_boxoffice_dataset(df_domestic_boxoffice, df_international_boxoffice, df_worldwide)
 
 
 
-def clean_budget(df_budget, presupuestos, ruta_salida='movie_budgets_clean.csv'):
+
+
+@instrumented_stage()
+def clean_budget(df_budget, presupuestos, ruta_salida='movie_budgets_clean.csv', guardar=True):
     """
         Replaces budget values in the DataFrame based on the `presupuestos` dictionary,
-        fills missing values with 0, renames 'IMDb ID' to 'filmid', and saves the result to a CSV.
+        leaves missing budgets empty (a 0 would make the ROI infinite), renames 'IMDb ID' to 'filmid', and saves the result as the
+        'movie_budgets_clean' artifact (plus a CSV export).
 
         Args:
-            df_budget (pd.DataFrame): DataFrame with columns 'title' and 'budget'.
+            df_budget (pd.DataFrame): DataFrame with columns 'title' and 'budget' (e.g. the output of
+                `films_budget_df`). If None, the 'movie_budgets' artifact (csv/raw/movie_budgets.csv) is loaded.
             presupuestos (dict): Dictionary with budgets by title.
-            ruta_salida (str): Path to the output CSV file.
+            ruta_salida (str): Path to the output CSV file. If None, no CSV is written.
+            guardar (bool): Whether to save the 'movie_budgets_clean' artifact.
+
+        Returns:
+            pd.DataFrame: The cleaned budgets. The input DataFrame is not modified.
         """
-    df_budget=pd.read_csv('csv/raw/movie_budgets.csv')
+    if df_budget is None:
+        df_budget = load_artifact('movie_budgets', 'csv/raw/movie_budgets.csv')
     # Reemplazar presupuestos donde haya valores en el diccionario
-    df_budget['budget'] = df_budget['title'].map(presupuestos).fillna(df_budget['budget'])
-    df_budget['budget'] = df_budget['budget'].fillna(0)
-    df_budget['title'] = df_budget['title'].str.lower()
+    df_budget = df_budget.assign(budget=df_budget['title'].map(presupuestos).fillna(df_budget['budget']))
+    df_budget, _ = normalize_columns(df_budget, {'budget': 'money'}, report_label='budget')
+    df_budget = df_budget.assign(title=df_budget['title'].str.lower())
 
     # Renombrar columna IMDb ID si existe
-    if 'IMDb ID' in df_budget.columns:
-        df_budget.rename(columns={'IMDb ID': 'filmid'}, inplace=True)
+    df_budget = df_budget.rename(columns={'IMDb ID': 'filmid'})
 
-    # Guardar el archivo actualizado
-    df_budget.to_csv(ruta_salida, index=False)
-    print(f"✅ Archivo guardado como: {ruta_salida}")
+    # Guardar el artefacto y, opcionalmente, el CSV
+    if guardar:
+        write_artifact(df_budget, 'movie_budgets_clean', csv_path=ruta_salida)
+        print(f"✅ Archivo guardado como: {ruta_salida or 'movie_budgets_clean'}")
+    return df_budget
+
+
+def load_manual_budgets(path=MANUAL_BUDGETS_PATH):
+    """
+    Loads the manual budgets by title used with `clean_budget` (the `presupuestos` of the notebook).
+
+    Args:
+        path (str): Path of the JSON file.
+
+    Returns:
+        dict: Budgets in dollars by title.
+    """
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
 
 
 
 
 
-def create_financial_data(df_budget, df_boxoffice, ruta_salida='financial_data.csv'):
+@instrumented_stage()
+def create_financial_data(df_budget, df_boxoffice, ruta_salida='financial_data.csv', guardar=True):
     """
     Creates a financial dataset containing the revenue and budget of the movies,
-    calculates the ROI, and saves the result to a CSV file.
+    calculates the ROI, and saves the result as the 'financial_data' artifact (plus a CSV export).
 
     Args:
-        df_budget (pd.DataFrame): DataFrame with information about the movie budgets.
+        df_budget (pd.DataFrame): DataFrame with information about the movie budgets (the output of
+            `clean_budget`). If None, the 'movie_budgets_clean' artifact is loaded.
         df_boxoffice (pd.DataFrame): DataFrame with the revenue of the movies.
-        ruta_salida (str): Path to the output CSV file.
+        ruta_salida (str): Path to the output CSV file. If None, no CSV is written.
+        guardar (bool): Whether to save the 'financial_data' artifact.
+
+    Returns:
+        pd.DataFrame: The financial dataset. The input DataFrames are not modified.
     """
-    df_budget=pd.read_csv('csv/movie_budgets_clean.csv')
-    # Eliminar la columna 'title' si existe
-    for df in [df_budget]:
-        if 'title' in df.columns:
-            df.drop(columns='title', inplace=True)
-
-    # Establecer 'IMDb ID' como índice
-    df_budget.set_index('filmid', inplace=True)
-    df_boxoffice.set_index('filmid', inplace=True)
-
-    # Unir los DataFrames de presupuesto y recaudación por 'IMDb ID'
-    df_financial_info = df_boxoffice.join(
-        df_budget,
+    if df_budget is None:
+        df_budget = load_artifact('movie_budgets_clean', 'csv/movie_budgets_clean.csv')
+
+    # Unir presupuesto (sin 'title') y recaudación por 'filmid'
+    df_financial_info = df_boxoffice.set_index('filmid').join(
+        df_budget.drop(columns='title', errors='ignore').set_index('filmid'),
         how='inner'
     ).reset_index()
 
-    # Calcular el ROI
+    # Calcular el ROI (sin presupuesto o con presupuesto 0 queda vacío)
+    presupuesto = df_financial_info['budget'].where(df_financial_info['budget'] > 0)
     df_financial_info['ROI'] = (
-        (df_financial_info['Worlwide boxoffice'] - df_financial_info['budget']) / df_financial_info['budget']
-    ).round(2)
+        (df_financial_info['Worlwide boxoffice'] - presupuesto) / presupuesto
+    ).astype('float64').round(2)
 
-    # Guardar el archivo actualizado
-    df_financial_info.to_csv(ruta_salida, index=False)
-    print(f"✅ Archivo guardado como: {ruta_salida}")
+    # Guardar el artefacto y, opcionalmente, el CSV
+    if guardar:
+        write_artifact(df_financial_info, 'financial_data', csv_path=ruta_salida)
+        print(f"✅ Archivo guardado como: {ruta_salida or 'financial_data'}")
+    return df_financial_info
 
 
 
 
-def create_final_dataset(df_imdb, df_financial_data, df_kaggle, ruta_salida='final_dataset.csv'):
+@instrumented_stage()
+def create_final_dataset(df_imdb, df_financial_data, df_kaggle, ruta_salida='final_dataset.csv', guardar=True):
     """
     Creates the final dataset by merging IMDb, revenue, and awards data, 
-    cleaning unnecessary columns, and saving the resulting CSV file.
+    cleaning unnecessary columns, and saving the result as the 'final_dataset' artifact (plus a CSV export).
 
     Args:
         df_imdb (pd.DataFrame): DataFrame with IMDb information.
         df_financial_data (pd.DataFrame): DataFrame with financial information (revenue, budget, ROI).
         df_kaggle (pd.DataFrame): DataFrame with awards and category information.
-        ruta_salida (str): Path to the output CSV file.
-    """
-    # Eliminar columnas si existen en df_financial_data
-    columnas_a_eliminar = {'title', 'domestic boxoffice', 'international boxoffice'}
-    if columnas_a_eliminar.issubset(df_financial_data.columns):
-        df_financial_data.drop(columns=columnas_a_eliminar, inplace=True)
+        ruta_salida (str): Path to the output CSV file. If None, no CSV is written.
+        guardar (bool): Whether to save the 'final_dataset' artifact.
 
-    # Eliminar la columna 'filmid' de df_financial_data si existe (para evitar duplicados)
-    if 'filmid' in df_financial_data.columns:
-        df_financial_data.drop(columns='filmid', inplace=True)
+    Returns:
+        pd.DataFrame: The final dataset. The input DataFrames are not modified.
+    """
+    # Quitar de df_financial_data las columnas que no pasan al dataset final
+    columnas_a_eliminar = ['title', 'domestic boxoffice', 'international boxoffice']
+    df_financial_data = df_financial_data.drop(columns=columnas_a_eliminar, errors='ignore')
 
-    # Hacer inner join entre IMDb y la información financiera
-    df_final = df_imdb.join(df_financial_data, how='inner')
+    # Hacer inner join entre IMDb y la información financiera por 'filmid'
+    df_final = df_imdb.join(df_financial_data.set_index('filmid'), on='filmid', how='inner')
 
     # Unir con el DataFrame de Kaggle (filmid como índice)
     df_final = df_final.join(df_kaggle.set_index('filmid')[['year', 'winner', 'category']], on='filmid', how='inner')
 
+    # Solo el primer género y país; todos los valores están en las tablas puente de `bridge_tables.py`
     df_final['genre'] = df_final['genre'].str.split(',').str[0].str.strip()
     df_final['country'] = df_final['country'].str.split(',').str[0].str.strip()
-    # Guardar el archivo final
-    df_final.to_csv(ruta_salida, index=False)
-    print(f"✅ Archivo final guardado como: {ruta_salida}")
\ No newline at end of file
+    # Guardar el artefacto final y, opcionalmente, el CSV
+    if guardar:
+        write_artifact(df_final, 'final_dataset', csv_path=ruta_salida)
+        print(f"✅ Archivo final guardado como: {ruta_salida or 'final_dataset'}")
+    return df_final
+
+
+# Artefactos que produce `build_datasets`, en el orden en que se construyen
+DATASETS = [
+    'kaggle_clean', 'boxoffice_data', 'movie_budgets_clean', 'financial_data', 'final_dataset',
+    *[bridge_name(column) for column in BRIDGE_COLUMNS],
+]
+
+
+def build_datasets(df_kaggle_raw, df_domestic_boxoffice, df_international_boxoffice, df_worldwide, df_budget,
+                   df_imdb, presupuestos=None, guardar=False, directory=ARTIFACTS_DIR, csv_dir=None):
+    """
+    Runs the whole pipeline in memory: every step receives the DataFrames of the previous ones
+    directly, without writing them to disk and reading them back. None of the inputs is modified.
+
+    Args:
+        df_kaggle_raw (pd.DataFrame): Original Kaggle DataFrame (csv/raw/full_data.xlsx).
+        df_domestic_boxoffice (pd.DataFrame): Domestic box office revenue data.
+        df_international_boxoffice (pd.DataFrame): International box office revenue data.
+        df_worldwide (pd.DataFrame): Worldwide box office revenue data.
+        df_budget (pd.DataFrame): Budgets with the columns 'IMDb ID', 'title' and 'budget'.
+        df_imdb (pd.DataFrame): DataFrame with IMDb information.
+        presupuestos (dict): Manual budgets by title passed to `clean_budget`.
+        guardar (bool | iterable): Artifacts to save, by name (see `DATASETS`). True saves all of
+            them and False (default) none.
+        directory (str): Folder of the artifacts saved.
+        csv_dir (str): If given, a CSV export of every artifact saved is written in this folder.
+
+    Returns:
+        dict: The DataFrame of every artifact of `DATASETS`, by name.
+    """
+    if guardar is True:
+        guardar = DATASETS
+    guardar = set(guardar or ())
+    desconocidos = guardar - set(DATASETS)
+    if desconocidos:
+        raise ValueError(f"Unknown datasets: {sorted(desconocidos)}")
+
+    datasets = {}
+    datasets['kaggle_clean'] = cleaning_kaggle_info(df_kaggle_raw)
+    datasets['boxoffice_data'] = create_boxoffice_dataset(
+        df_domestic_boxoffice, df_international_boxoffice, df_worldwide
+    )
+    datasets['movie_budgets_clean'] = clean_budget(df_budget, presupuestos or {}, ruta_salida=None, guardar=False)
+    datasets['financial_data'] = create_financial_data(
+        datasets['movie_budgets_clean'], datasets['boxoffice_data'], ruta_salida=None, guardar=False
+    )
+    datasets['final_dataset'] = create_final_dataset(
+        df_imdb, datasets['financial_data'], datasets['kaggle_clean'], ruta_salida=None, guardar=False
+    )
+    # Tablas puente film <-> género/país/actor/director/idioma
+    datasets.update(build_bridges(df_imdb))
+
+    # Guardar solo los artefactos pedidos
+    for name in DATASETS:
+        if name in guardar:
+            csv_path = os.path.join(csv_dir, f'{name}.csv') if csv_dir else None
+            write_artifact(datasets[name], name, directory, csv_path=csv_path)
+            print(f"✅ Archivo guardado como: {csv_path or name}")
+    return datasets
@@ -0,0 +1,353 @@
+import glob
+import html as html_lib
+import os
+import re
+import time
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+except ImportError:  # lxml es opcional: sin él solo se registran los backends 'bs4' y 'fast'
+    lxml = None
+
+# Columnas históricas de los CSV de recaudación (se mantiene 'Worlwide' por compatibilidad)
+BOXOFFICE_COLUMNS = {
+    'Domestic': 'domestic boxoffice',
+    'International': 'international boxoffice',
+    'Worldwide': 'Worlwide boxoffice',
+}
+
+DEFAULT_BACKEND = 'fast'
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'fixtures')
+
+
+# ----------------------------------------------------------------------------
+# Backend 'bs4': árbol completo de BeautifulSoup (implementación original)
+# ----------------------------------------------------------------------------
+
+def bs4_boxoffice_summary(html):
+    """
+    Extracts the Box Office Mojo summary fields building a full BeautifulSoup tree.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    summary = {column: None for column in BOXOFFICE_COLUMNS.values()}
+
+    # Performance summary: Domestic / International / Worldwide
+    performance_sections = soup.select('div.mojo-performance-summary-table div.a-section.a-spacing-none')
+    for section in performance_sections:
+        text = section.get_text()
+        for label, column in BOXOFFICE_COLUMNS.items():
+            if label in text and summary[column] is None:
+                money_span = section.find('span', class_='money')
+                if money_span:
+                    summary[column] = money_span.get_text(strip=True)
+
+    # Summary values: distributor, opening, budget, release date, MPAA, running time, genres...
+    value_sections = soup.select('div.mojo-summary-values > div.a-section.a-spacing-none')
+    for section in value_sections:
+        spans = section.find_all('span', recursive=False)
+        if len(spans) < 2:
+            continue
+        label = spans[0].get_text(strip=True).lower()
+        value = spans[1].get_text(' ', strip=True)
+        if label and label not in summary:
+            summary[label] = ' '.join(value.split())
+
+    return summary
+
+
+def bs4_budget(html):
+    """
+    Extracts the production budget of a The Numbers page building a full BeautifulSoup tree.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    for b in soup.find_all('b', string='Production Budget:'):
+        td_parent = b.find_parent('td')
+        if td_parent:
+            td_siguiente = td_parent.find_next_sibling('td')
+            if td_siguiente:
+                return _budget_to_int(td_siguiente.text)
+    return None
+
+
+def _budget_to_int(texto_completo):
+    texto_dinero = texto_completo.strip().split(' (')[0]  # "$2,000,000"
+    return int(texto_dinero.replace('$', '').replace(',', ''))
+
+
+# ----------------------------------------------------------------------------
+# Backend 'fast': escaneo dirigido con expresiones regulares, sin construir el árbol
+# ----------------------------------------------------------------------------
+
+_TOKEN_RE = re.compile(
+    r'<!--.*?-->'
+    r'|<(/?)([a-zA-Z][\w-]*)((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>'
+    r'|([^<]+)',
+    re.S
+)
+_CLASS_RE = re.compile(r'\bclass\s*=\s*(?:"([^"]*)"|\'([^\']*)\')', re.I)
+_VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+_SECTION_CLASSES = {'a-section', 'a-spacing-none'}
+_BUDGET_RE = re.compile(r'<b>Production Budget:</b>\s*</td>\s*<td[^>]*>(.*?)</td>', re.S)
+_TAG_RE = re.compile(r'<[^>]*>')
+
+
+def _container_start(html, css_class):
+    match = re.search(r'<div\b[^>]*\bclass="[^"]*\b' + re.escape(css_class) + r'\b[^"]*"', html)
+    return match.start() if match else None
+
+
+def _direct_children(html, css_class):
+    """
+    Streams the tokens of the div with class `css_class` and yields, for each direct child div
+    with the classes 'a-section a-spacing-none', the list of its tokens as
+    `(depth, kind, tag, classes, text)` with depth relative to the child.
+    """
+    start = _container_start(html, css_class)
+    if start is None:
+        return
+    depth = 0
+    child = None
+    for match in _TOKEN_RE.finditer(html, start):
+        closing, tag, attrs, text = match.groups()
+        if text is not None:
+            if child is not None:
+                child.append((depth, 'text', None, None, html_lib.unescape(text)))
+            continue
+        if tag is None:
+            continue
+        tag = tag.lower()
+        if closing:
+            depth -= 1
+            if child is not None:
+                if depth == 1:
+                    yield child
+                    child = None
+                else:
+                    child.append((depth, 'end', tag, None, None))
+            if depth == 0:
+                return
+        elif tag in _VOID_TAGS or attrs.rstrip().endswith('/'):
+            continue
+        else:
+            class_match = _CLASS_RE.search(attrs)
+            classes = set((class_match.group(1) or class_match.group(2)).split()) if class_match else set()
+            depth += 1
+            if depth == 2 and tag == 'div' and _SECTION_CLASSES <= classes:
+                child = []
+            elif child is not None:
+                child.append((depth, 'start', tag, classes, None))
+
+
+def fast_boxoffice_summary(html):
+    """
+    Extracts the Box Office Mojo summary fields scanning only the two summary tables.
+    """
+    summary = {column: None for column in BOXOFFICE_COLUMNS.values()}
+
+    for tokens in _direct_children(html, 'mojo-performance-summary-table'):
+        text = ''.join(t for _, kind, _, _, t in tokens if kind == 'text')
+        money, in_money = [], None
+        for depth, kind, tag, classes, t in tokens:
+            if in_money is None and kind == 'start' and tag == 'span' and 'money' in classes:
+                in_money = depth
+            elif in_money is not None and kind == 'text':
+                money.append(t.strip())
+            elif in_money is not None and kind == 'end' and depth < in_money:
+                break
+        for label, column in BOXOFFICE_COLUMNS.items():
+            if label in text and summary[column] is None and in_money is not None:
+                summary[column] = ''.join(money)
+
+    for tokens in _direct_children(html, 'mojo-summary-values'):
+        spans, current = [], None
+        for depth, kind, tag, classes, t in tokens:
+            if depth == 3 and kind == 'start' and tag == 'span':
+                current = []
+                spans.append(current)
+            elif depth == 2 and kind == 'end':
+                current = None
+            elif current is not None and kind == 'text' and t.strip():
+                current.append(t.strip())
+        if len(spans) < 2:
+            continue
+        label = ''.join(spans[0]).lower()
+        if label and label not in summary:
+            summary[label] = ' '.join(' '.join(spans[1]).split())
+
+    return summary
+
+
+def fast_budget(html):
+    """
+    Extracts the production budget of a The Numbers page with a single targeted regex.
+    """
+    match = _BUDGET_RE.search(html)
+    if not match:
+        return None
+    return _budget_to_int(html_lib.unescape(_TAG_RE.sub('', match.group(1))))
+
+
+# ----------------------------------------------------------------------------
+# Backend 'lxml' (opcional): árbol en C con XPath
+# ----------------------------------------------------------------------------
+
+_XPATH_SECTION = "div[contains(concat(' ', normalize-space(@class), ' '), ' a-section ') and " \
+                 "contains(concat(' ', normalize-space(@class), ' '), ' a-spacing-none ')]"
+
+
+def _xpath_container(css_class):
+    return f"//div[contains(concat(' ', normalize-space(@class), ' '), ' {css_class} ')]"
+
+
+def lxml_boxoffice_summary(html):
+    """
+    Extracts the Box Office Mojo summary fields with lxml and XPath.
+    """
+    root = lxml.html.fromstring(html)
+    summary = {column: None for column in BOXOFFICE_COLUMNS.values()}
+
+    for section in root.xpath(_xpath_container('mojo-performance-summary-table') + '//' + _XPATH_SECTION):
+        text = section.text_content()
+        money = section.xpath(".//span[contains(concat(' ', normalize-space(@class), ' '), ' money ')]")
+        for label, column in BOXOFFICE_COLUMNS.items():
+            if label in text and summary[column] is None and money:
+                summary[column] = ''.join(t.strip() for t in money[0].itertext())
+
+    for section in root.xpath(_xpath_container('mojo-summary-values') + '/' + _XPATH_SECTION):
+        spans = section.xpath('./span')
+        if len(spans) < 2:
+            continue
+        label = ''.join(t.strip() for t in spans[0].itertext()).lower()
+        value = ' '.join(t.strip() for t in spans[1].itertext() if t.strip())
+        if label and label not in summary:
+            summary[label] = ' '.join(value.split())
+
+    return summary
+
+
+def lxml_budget(html):
+    """
+    Extracts the production budget of a The Numbers page with lxml and XPath.
+    """
+    root = lxml.html.fromstring(html)
+    for b in root.xpath("//b[text()='Production Budget:']"):
+        td_parent = next(b.iterancestors('td'), None)
+        if td_parent is not None:
+            td_siguiente = td_parent.getnext()
+            while td_siguiente is not None and td_siguiente.tag != 'td':
+                td_siguiente = td_siguiente.getnext()
+            if td_siguiente is not None:
+                return _budget_to_int(td_siguiente.text_content())
+    return None
+
+
+EXTRACTORS = {
+    'bs4': {'boxoffice': bs4_boxoffice_summary, 'budget': bs4_budget},
+    'fast': {'boxoffice': fast_boxoffice_summary, 'budget': fast_budget},
+}
+if lxml is not None:
+    EXTRACTORS['lxml'] = {'boxoffice': lxml_boxoffice_summary, 'budget': lxml_budget}
+
+
+def extract_boxoffice_summary(html, backend=None):
+    """
+    Extracts the summary fields of a Box Office Mojo title page.
+
+    Args:
+        html (str): The HTML of the title page.
+        backend (str): Extractor backend ('bs4', 'fast' or 'lxml'). Defaults to `DEFAULT_BACKEND`.
+
+    Returns:
+        dict: The revenue columns ('domestic boxoffice', 'international boxoffice', 'Worlwide boxoffice')
+            as strings or None, plus the other summary fields keyed by their lowercase label.
+    """
+    return EXTRACTORS[backend or DEFAULT_BACKEND]['boxoffice'](html)
+
+
+def extract_budget(html, backend=None):
+    """
+    Extracts the production budget of a The Numbers movie page.
+
+    Args:
+        html (str): The HTML of the movie page.
+        backend (str): Extractor backend ('bs4', 'fast' or 'lxml'). Defaults to `DEFAULT_BACKEND`.
+
+    Returns:
+        int: The production budget in dollars, or None if the page has no budget.
+    """
+    return EXTRACTORS[backend or DEFAULT_BACKEND]['budget'](html)
+
+
+def load_fixtures(fixtures_dir=FIXTURES_DIR):
+    """
+    Loads the stored pages used to compare and benchmark the extractors.
+
+    Args:
+        fixtures_dir (str): Folder with the subfolders 'boxofficemojo' and 'the-numbers'.
+
+    Returns:
+        dict: {'boxoffice': {name: html}, 'budget': {name: html}}
+    """
+    fixtures = {}
+    for kind, folder in [('boxoffice', 'boxofficemojo'), ('budget', 'the-numbers')]:
+        fixtures[kind] = {}
+        for path in sorted(glob.glob(os.path.join(fixtures_dir, folder, '*.html'))):
+            with open(path, encoding='utf-8') as f:
+                fixtures[kind][os.path.basename(path)] = f.read()
+    return fixtures
+
+
+def compare_extractors(fixtures_dir=FIXTURES_DIR, reference='bs4'):
+    """
+    Checks that every backend returns exactly the same results as the reference backend on the
+    fixture corpus.
+
+    Returns:
+        list: The mismatches as `(backend, kind, fixture, expected, obtained)`. Empty if all agree.
+    """
+    fixtures = load_fixtures(fixtures_dir)
+    mismatches = []
+    for kind, pages in fixtures.items():
+        for name, html in pages.items():
+            expected = EXTRACTORS[reference][kind](html)
+            for backend, funcs in EXTRACTORS.items():
+                obtained = funcs[kind](html)
+                if obtained != expected:
+                    mismatches.append((backend, kind, name, expected, obtained))
+    return mismatches
+
+
+def benchmark_extractors(fixtures_dir=FIXTURES_DIR, repeat=20):
+    """
+    Measures the pages per second of each backend on the fixture corpus.
+
+    Args:
+        fixtures_dir (str): Folder with the fixture pages.
+        repeat (int): Number of passes over the corpus for each backend.
+
+    Returns:
+        pd.DataFrame: One row per backend and page kind with 'pages', 'seconds' and 'pages/s'.
+    """
+    fixtures = load_fixtures(fixtures_dir)
+    filas = []
+    for backend, funcs in EXTRACTORS.items():
+        for kind, pages in fixtures.items():
+            inicio = time.perf_counter()
+            for _ in range(repeat):
+                for html in pages.values():
+                    funcs[kind](html)
+            segundos = time.perf_counter() - inicio
+            total = repeat * len(pages)
+            filas.append({'backend': backend, 'kind': kind, 'pages': total,
+                          'seconds': round(segundos, 4), 'pages/s': round(total / segundos, 1)})
+    return pd.DataFrame(filas)
+
+
+if __name__ == '__main__':
+    errores = compare_extractors()
+    print('✅ All backends agree on the fixtures' if not errores else f'❌ {len(errores)} mismatches: {errores}')
+    print(benchmark_extractors())
@@ -0,0 +1,384 @@
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+
+from instrumentation import METRICS, ProgressReporter
+
+# Límites por defecto para cada host (peticiones simultáneas y peticiones por segundo)
+DEFAULT_MAX_IN_FLIGHT = 8
+DEFAULT_RATE = 5.0
+
+# Parámetros del control adaptativo: latencia considerada lenta (s), fallos seguidos que abren
+# el circuito y segundos que permanece abierto
+DEFAULT_LATENCY_TARGET = 5.0
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_COOLDOWN = 60.0
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket used to cap the number of requests per second sent to a host.
+
+    Args:
+        rate (float): Tokens added per second (sustained requests per second).
+        capacity (float): Maximum number of tokens stored (allowed burst). Defaults to `rate`.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1.0))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until a token is available and consumes it.
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def set_rate(self, rate, capacity=None):
+        """
+        Changes the rate (and the burst) keeping the tokens already stored.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.rate = float(rate)
+            self.capacity = float(capacity if capacity is not None else max(rate, 1.0))
+            self.tokens = min(self.tokens, self.capacity)
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """
+    Raised instead of sending a request to a host whose circuit breaker is open.
+    It is a `requests` exception, so the collectors handle it like any other failed request.
+    """
+
+    def __init__(self, host, retry_in):
+        super().__init__(f"circuit open for {host}, retrying in {retry_in:.0f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class HostGovernor:
+    """
+    Adaptive limiter for a single host. Use it as a context manager around each request.
+
+    - Concurrency follows AIMD: every fast successful answer adds `1/limit` to the concurrency
+      limit (about +1 per round of requests) up to `max_in_flight`, while a 429, a 5xx or a
+      network error halves it (at most once per second), down to `min_in_flight`. Slow answers
+      (over `latency_target`) shrink it gently.
+    - A `Retry-After` pauses every new request to the host until it expires.
+    - After `failure_threshold` consecutive failures the circuit breaker opens: requests fail
+      fast with `CircuitOpenError` for `cooldown` seconds, then a single probe request is let
+      through and its result closes or reopens the circuit.
+    - `rate` stays as a hard cap of requests per second (token bucket).
+
+    Args:
+        max_in_flight (int): Maximum number of simultaneous requests to the host.
+        rate (float): Maximum number of requests per second to the host.
+        min_in_flight (int): Minimum concurrency limit.
+        latency_target (float): Seconds above which an answer counts as slow.
+        failure_threshold (int): Consecutive failures that open the circuit.
+        cooldown (float): Seconds the circuit stays open before the probe request.
+    """
+
+    def __init__(self, max_in_flight=DEFAULT_MAX_IN_FLIGHT, rate=DEFAULT_RATE, min_in_flight=1,
+                 latency_target=DEFAULT_LATENCY_TARGET, failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 cooldown=DEFAULT_COOLDOWN, host=None):
+        self.host = host
+        self.max_in_flight = max_in_flight
+        self.min_in_flight = min(min_in_flight, max_in_flight)
+        self.latency_target = latency_target
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.bucket = TokenBucket(rate)
+        self.limit = float(max_in_flight)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.failures = 0
+        self.open_until = None
+        self.probing = False
+        self.condition = threading.Condition()
+
+    def set_limits(self, max_in_flight, rate):
+        """
+        Changes the concurrency and rate limits in place, keeping the circuit breaker, the AIMD
+        limit and the `Retry-After` pause of the requests already in progress.
+        """
+        with self.condition:
+            self.max_in_flight = max_in_flight
+            self.min_in_flight = min(self.min_in_flight, max_in_flight)
+            self.limit = min(self.limit, float(max_in_flight))
+            self.condition.notify_all()
+        self.bucket.set_rate(rate)
+
+    def __enter__(self):
+        with self.condition:
+            while True:
+                wait = self.paused_until - time.monotonic()
+                if wait <= 0 and self.in_flight < max(int(self.limit), self.min_in_flight):
+                    break
+                self.condition.wait(timeout=wait if wait > 0 else None)
+            self.in_flight += 1
+        self.bucket.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify()
+        return False
+
+    def allow_request(self):
+        """
+        Checks the circuit breaker before sending a request.
+
+        Raises:
+            CircuitOpenError: If the circuit is open (or half open with a probe already running).
+        """
+        with self.condition:
+            if self.open_until is None:
+                return
+            now = time.monotonic()
+            if now < self.open_until or self.probing:
+                raise CircuitOpenError(self.host, max(self.open_until - now, 0))
+            self.probing = True
+
+    def observe(self, status, seconds, retry_after=None):
+        """
+        Adapts the limits to the answer of a request.
+
+        Args:
+            status (int | str): HTTP status code, or 'error' for a network error.
+            seconds (float): Latency of the request.
+            retry_after (float): Seconds asked by the `Retry-After` header, if any.
+        """
+        failed = not isinstance(status, int) or status == 429 or status >= 500
+        now = time.monotonic()
+        with self.condition:
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+            if failed:
+                self.failures += 1
+                if now - self.last_decrease >= 1.0:
+                    self.limit = max(self.min_in_flight, self.limit / 2)
+                    self.last_decrease = now
+                if self.probing or self.failures >= self.failure_threshold:
+                    if self.open_until is None or self.probing:
+                        METRICS.increment('circuit_open', self.host)
+                    self.open_until = now + self.cooldown
+                    self.probing = False
+            else:
+                self.failures = 0
+                self.open_until = None
+                self.probing = False
+                if seconds > self.latency_target:
+                    self.limit = max(self.min_in_flight, self.limit * 0.9)
+                else:
+                    self.limit = min(self.max_in_flight, self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def host_of(url):
+    """
+    Returns the host name of a URL (e.g., 'www.boxofficemojo.com').
+    """
+    return urlparse(url).netloc
+
+
+def get_limiter(host, max_in_flight=DEFAULT_MAX_IN_FLIGHT, rate=DEFAULT_RATE):
+    """
+    Returns the shared governor of a host, creating it if needed. The governor is shared by every
+    collector in the process, so two collectors hitting the same site respect the same limits
+    and the same circuit breaker. Asking for other limits updates them in the same governor.
+
+    Args:
+        host (str): Host name.
+        max_in_flight (int): Maximum number of simultaneous requests to the host.
+        rate (float): Maximum number of requests per second to the host.
+
+    Returns:
+        HostGovernor: The governor for the host.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = HostGovernor(max_in_flight, rate, host=host)
+            _limiters[host] = limiter
+        elif limiter.max_in_flight != max_in_flight or limiter.bucket.rate != rate:
+            limiter.set_limits(max_in_flight, rate)
+        return limiter
+
+
+def parse_retry_after(value):
+    """
+    Converts a `Retry-After` header (seconds or HTTP date) into seconds, or None if it is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def check_circuit(host):
+    """
+    Raises `CircuitOpenError` if the circuit breaker of a host is open. Hosts without a governor always pass.
+    """
+    governor = _limiters.get(host)
+    if governor is not None:
+        governor.allow_request()
+
+
+def observe_response(host, seconds, status, retry_after=None):
+    """
+    Reports the result of a request to the governor of its host, if the host has one.
+
+    Args:
+        host (str): Host name.
+        seconds (float): Latency of the request.
+        status (int | str): HTTP status code, or 'error' for a network error.
+        retry_after (str): Value of the `Retry-After` header, if any.
+    """
+    governor = _limiters.get(host)
+    if governor is not None:
+        governor.observe(status, seconds, parse_retry_after(retry_after))
+
+
+def fetch_error(url, status=None, error=None):
+    """
+    Builds the structured record returned for a request that failed, instead of a sentinel string.
+
+    Args:
+        url (str): URL of the request.
+        status (int): HTTP status code, if the host answered.
+        error (Exception | str): Error raised or description of the failure.
+
+    Returns:
+        dict: Record with the keys 'url', 'host', 'status', 'error' and 'circuit_open'.
+    """
+    return {
+        'url': url,
+        'host': host_of(url),
+        'status': status,
+        'error': str(error) if error is not None else f'status code {status}',
+        'circuit_open': isinstance(error, CircuitOpenError),
+    }
+
+
+def fetch_ordered(items, fetch_func, host, max_in_flight=DEFAULT_MAX_IN_FLIGHT, rate=DEFAULT_RATE, label=None, on_result=None,
+                  acquire_per_item=True):
+    """
+    Calls `fetch_func(item)` for every item using a thread pool, keeping at most `max_in_flight`
+    requests open against `host` (less while the host throttles or fails) and no more than
+    `rate` requests per second.
+
+    Args:
+        items (iterable): Items to fetch (IMDb IDs, titles...).
+        fetch_func (callable): Function that fetches and returns the data of a single item.
+        host (str): Host the requests go to, used to pick the shared limiter.
+        max_in_flight (int): Maximum number of simultaneous requests to the host.
+        rate (float): Maximum number of requests per second to the host.
+        label (str): Optional label of the progress line printed every few seconds.
+        on_result (callable): Optional function `(item, result)` called as soon as each result
+            arrives (from the worker threads), e.g. to checkpoint it.
+        acquire_per_item (bool): If False, `fetch_func` is called without taking the host limiter,
+            for functions that send several requests per item and take it for each of them.
+
+    Returns:
+        list: The results, in the same order as `items`.
+    """
+    items = list(items)
+    total = len(items)
+    limiter = get_limiter(host, max_in_flight, rate)
+    results = [None] * total
+    progress = ProgressReporter(label, total) if label else None
+
+    def worker(index):
+        with limiter if acquire_per_item else nullcontext():
+            results[index] = fetch_func(items[index])
+        if on_result is not None:
+            on_result(items[index], results[index])
+        if progress is not None:
+            progress.update()
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_in_flight, total))) as executor:
+        # list() propaga cualquier excepción de los workers
+        list(executor.map(worker, range(total)))
+
+    return results
+
+
+def fetch_stream(items, fetch_func, host, max_in_flight=DEFAULT_MAX_IN_FLIGHT, rate=DEFAULT_RATE, window=None,
+                 on_result=None, known=None):
+    """
+    Streaming version of `fetch_ordered`: reads the items lazily and yields `(item, result)` in the
+    same order as `items` as soon as each result is ready, keeping at most `window` items pending,
+    so the memory used does not depend on the number of items.
+
+    Args:
+        items (iterable): Items to fetch (IMDb IDs, titles...). Can be a generator.
+        fetch_func (callable): Function that fetches and returns the data of a single item.
+        host (str): Host the requests go to, used to pick the shared limiter.
+        max_in_flight (int): Maximum number of simultaneous requests to the host.
+        rate (float): Maximum number of requests per second to the host.
+        window (int): Maximum number of items fetched ahead of the one being yielded. Defaults to
+            four times `max_in_flight`.
+        on_result (callable): Optional function `(item, result)` called as soon as each result
+            arrives (from the worker threads), e.g. to checkpoint it.
+        known (dict): Results already available by item (e.g. from a checkpoint); those items are
+            yielded without a request.
+
+    Yields:
+        tuple: (item, result).
+    """
+    limiter = get_limiter(host, max_in_flight, rate)
+    window = window or 4 * max_in_flight
+    known = known or {}
+
+    def worker(item):
+        with limiter:
+            result = fetch_func(item)
+        if on_result is not None:
+            on_result(item, result)
+        return result
+
+    pendientes = deque()
+    with ThreadPoolExecutor(max_workers=max(1, max_in_flight)) as executor:
+        for item in items:
+            pendientes.append((item, None if item in known else executor.submit(worker, item)))
+            while len(pendientes) >= window or (pendientes and pendientes[0][1] is None):
+                item, futuro = pendientes.popleft()
+                yield item, known[item] if futuro is None else futuro.result()
+        while pendientes:
+            item, futuro = pendientes.popleft()
+            yield item, known[item] if futuro is None else futuro.result()
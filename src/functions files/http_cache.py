@@ -0,0 +1,330 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+
+from fetch_engine import check_circuit, observe_response
+from instrumentation import METRICS
+
+CACHE_DIR = os.path.join('cache', 'http')
+
+# Tiempo de vida (segundos) de las respuestas de cada fuente
+DAY = 24 * 60 * 60
+DEFAULT_TTLS = {
+    'www.omdbapi.com': 30 * DAY,
+    'www.boxofficemojo.com': 7 * DAY,
+    'www.the-numbers.com': 30 * DAY,
+}
+DEFAULT_MAX_BYTES = 1024 ** 3
+
+# Parámetros que nunca forman parte de la clave (credenciales)
+EXCLUDED_PARAMS = {'apikey'}
+
+
+class CachedResponse:
+    """
+    Minimal response object with the parts of `requests.Response` used by the fetchers.
+
+    Args:
+        url (str): URL of the request.
+        status_code (int): HTTP status code.
+        text (str): Body of the response.
+        from_cache (bool): Whether the response was served from the cache.
+        headers (dict): Response headers.
+    """
+
+    def __init__(self, url, status_code, text, from_cache=False, headers=None):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+        self.from_cache = from_cache
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+
+def normalize_url(url, params=None):
+    """
+    Builds the normalized form of a request used as cache key: lowercase scheme and host,
+    no fragment, query string and `params` merged and sorted, and credentials removed.
+
+    Args:
+        url (str): URL of the request.
+        params (dict): Query parameters sent with the request.
+
+    Returns:
+        str: The normalized URL.
+    """
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True) + list((params or {}).items())
+    query = sorted((k, str(v)) for k, v in query if k.lower() not in EXCLUDED_PARAMS)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', urlencode(query), ''))
+
+
+def cache_key(url, params=None):
+    """
+    Returns the SHA-256 hash of the normalized request, used as key in the cache index.
+    """
+    return hashlib.sha256(normalize_url(url, params).encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent on-disk cache of HTTP responses.
+
+    Bodies are stored once per content hash under `directory/objects`, and a small SQLite index
+    maps each normalized request to its body, source, status and timestamps. Entries expire after
+    the TTL of their source and the least recently used ones are evicted when the cache grows
+    above `max_bytes`.
+
+    Args:
+        directory (str): Folder where the cache is stored.
+        ttls (dict): TTL in seconds by source (host). Sources not listed never expire.
+        max_bytes (int): Maximum total size of the stored bodies.
+        offline (bool): If True, never go to the network; misses return a 504 response.
+    """
+
+    def __init__(self, directory=CACHE_DIR, ttls=None, max_bytes=DEFAULT_MAX_BYTES, offline=False):
+        self.directory = directory
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_bytes = max_bytes
+        self.offline = offline
+        # Respuestas guardadas antes de este instante se tratan como caducadas (ver `fresh_since`)
+        self.min_fetched_at = None
+        self.lock = threading.Lock()
+        os.makedirs(os.path.join(directory, 'objects'), exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(directory, 'index.sqlite'), check_same_thread=False)
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            ' key TEXT PRIMARY KEY, url TEXT, source TEXT, status INTEGER, body_hash TEXT,'
+            ' size INTEGER, fetched_at REAL, accessed_at REAL)'
+        )
+        self.db.commit()
+
+    def _object_path(self, body_hash):
+        return os.path.join(self.directory, 'objects', body_hash[:2], body_hash)
+
+    def get(self, url, params=None, source=None):
+        """
+        Returns the cached response of a request, or None if it is missing or expired.
+        """
+        key = cache_key(url, params)
+        source = source or urlsplit(url).netloc.lower()
+        with self.lock:
+            row = self.db.execute(
+                'SELECT status, body_hash, fetched_at FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            status, body_hash, fetched_at = row
+            ttl = self.ttls.get(source)
+            if ttl is not None and time.time() - fetched_at > ttl and not self.offline:
+                return None
+            if self.min_fetched_at is not None and fetched_at < self.min_fetched_at and not self.offline:
+                return None
+            try:
+                with open(self._object_path(body_hash), encoding='utf-8') as f:
+                    text = f.read()
+            except FileNotFoundError:
+                self.db.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self.db.commit()
+                return None
+            self.db.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (time.time(), key))
+            self.db.commit()
+        return CachedResponse(url, status, text, from_cache=True)
+
+    def put(self, url, params, response, source=None):
+        """
+        Stores a response in the cache and evicts old entries if the size limit is exceeded.
+        """
+        key = cache_key(url, params)
+        source = source or urlsplit(url).netloc.lower()
+        body = response.text.encode('utf-8')
+        body_hash = hashlib.sha256(body).hexdigest()
+        path = self._object_path(body_hash)
+        with self.lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f'{path}.{threading.get_ident()}.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(body)
+                os.replace(tmp_path, path)
+            now = time.time()
+            self.db.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, normalize_url(url, params), source, response.status_code, body_hash, len(body), now, now)
+            )
+            self.db.commit()
+            self._evict()
+
+    def _evict(self):
+        # Tamaño real en disco: cada cuerpo cuenta una sola vez aunque lo compartan varias claves
+        total = self.db.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT body_hash, size FROM responses)'
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self.db.execute('SELECT key, body_hash, size FROM responses ORDER BY accessed_at').fetchall()
+        for key, body_hash, size in rows:
+            if total <= self.max_bytes:
+                break
+            self.db.execute('DELETE FROM responses WHERE key = ?', (key,))
+            still_used = self.db.execute(
+                'SELECT 1 FROM responses WHERE body_hash = ? LIMIT 1', (body_hash,)
+            ).fetchone()
+            if not still_used:
+                total -= size
+                try:
+                    os.remove(self._object_path(body_hash))
+                except FileNotFoundError:
+                    pass
+        self.db.commit()
+
+    def clear(self):
+        """
+        Removes every entry from the cache.
+        """
+        with self.lock:
+            for (body_hash,) in self.db.execute('SELECT DISTINCT body_hash FROM responses').fetchall():
+                try:
+                    os.remove(self._object_path(body_hash))
+                except FileNotFoundError:
+                    pass
+            self.db.execute('DELETE FROM responses')
+            self.db.commit()
+
+
+_default_cache = None
+_cache_enabled = True
+
+
+def configure_cache(directory=CACHE_DIR, ttls=None, max_bytes=DEFAULT_MAX_BYTES, offline=False, enabled=True):
+    """
+    Configures the cache shared by all the fetchers (OMDb, Box Office Mojo and The Numbers).
+
+    Args:
+        directory (str): Folder where the cache is stored.
+        ttls (dict): TTL in seconds by source (host), merged with `DEFAULT_TTLS`.
+        max_bytes (int): Maximum total size of the stored bodies.
+        offline (bool): If True, only cached responses are used (cache-only mode).
+        enabled (bool): If False, the fetchers always go to the network.
+
+    Returns:
+        ResponseCache: The configured cache, or None if disabled.
+    """
+    global _default_cache, _cache_enabled
+    _cache_enabled = enabled
+    _default_cache = ResponseCache(directory, ttls, max_bytes, offline) if enabled else None
+    return _default_cache
+
+
+def get_cache():
+    """
+    Returns the shared cache, creating it with the default settings the first time,
+    or None if the cache has been disabled with `configure_cache(enabled=False)`.
+    """
+    global _default_cache
+    if not _cache_enabled:
+        return None
+    if _default_cache is None:
+        _default_cache = ResponseCache()
+    return _default_cache
+
+
+@contextmanager
+def fresh_since(timestamp, cache=None):
+    """
+    Context manager under which the cached responses stored before `timestamp` are treated as
+    expired, whatever the TTL of their source, so a refresh really goes to the network. The
+    responses fetched inside the block are cached as usual.
+
+    Args:
+        timestamp (float): Responses fetched before this moment are not used.
+        cache (ResponseCache): Cache to use. Defaults to the shared cache.
+    """
+    cache = cache or get_cache()
+    if cache is None:
+        yield
+        return
+    anterior = cache.min_fetched_at
+    cache.min_fetched_at = timestamp if anterior is None else max(anterior, timestamp)
+    try:
+        yield
+    finally:
+        cache.min_fetched_at = anterior
+
+
+def is_cacheable(response):
+    """
+    Default caching rule: successful responses and definitive misses (404/410) are stored;
+    throttling, authentication errors and server errors are not.
+    """
+    return 200 <= response.status_code < 300 or response.status_code in (404, 410)
+
+
+def _timed_get(http, host, url, params, timeout):
+    # Petición de red: pasa por el circuito del host y le informa de la latencia y el código de estado
+    check_circuit(host)
+    inicio = time.perf_counter()
+    status, retry_after = 'error', None
+    try:
+        response = http.get(url, params=params, timeout=timeout)
+        status, retry_after = response.status_code, response.headers.get('Retry-After')
+        return response
+    finally:
+        segundos = time.perf_counter() - inicio
+        METRICS.observe_request(host, segundos, status)
+        observe_response(host, segundos, status, retry_after)
+
+
+def cached_get(url, params=None, timeout=30, cache=None, source=None, session=None, should_cache=is_cacheable):
+    """
+    Performs a GET request going through the response cache.
+
+    In offline mode a miss returns a response with status 504 instead of going to the network.
+    Network requests go through the governor of the host (see `fetch_engine.HostGovernor`).
+
+    Args:
+        url (str): URL of the request.
+        params (dict): Query parameters of the request.
+        timeout (float): Timeout of the request in seconds.
+        cache (ResponseCache): Cache to use. Defaults to the shared cache.
+        source (str): Source used to pick the TTL. Defaults to the host of the URL.
+        session (requests.Session): Session used for the request, to reuse its connections.
+        should_cache (callable): Function that decides if a network response is stored.
+
+    Returns:
+        CachedResponse | requests.Response: The response.
+
+    Raises:
+        CircuitOpenError: If the circuit breaker of the host is open and the response is not cached.
+    """
+    http = session or requests
+    host = urlsplit(url).netloc
+    cache = cache or get_cache()
+    if cache is None:
+        return _timed_get(http, host, url, params, timeout)
+
+    cached = cache.get(url, params, source)
+    if cached is not None:
+        METRICS.increment('cache_hits', host)
+        return cached
+    METRICS.increment('cache_misses', host)
+    if cache.offline:
+        return CachedResponse(url, 504, '', from_cache=True)
+
+    response = _timed_get(http, host, url, params, timeout)
+    if should_cache(response):
+        cache.put(url, params, response, source)
+    return response
@@ -0,0 +1,273 @@
+import bisect
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+
+import pandas as pd
+
+# Límites superiores (ms) de los cubos del histograma de latencias por host
+LATENCY_BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float('inf')]
+
+# Errores de ejemplo que se guardan por host en el informe
+MAX_ERROR_SAMPLES = 20
+
+
+class RunMetrics:
+    """
+    Collects the metrics of a pipeline run: stage timings with rows in/out, per-host latency
+    histograms and counters (requests, retries, errors, cache hits...).
+
+    All methods are thread-safe and cheap (a lock and a few integer updates), so they can be
+    called for every request.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Clears every metric and restarts the run clock.
+        """
+        with self.lock:
+            self.started = time.time()
+            self.stages = {}
+            self.hosts = {}
+            self.counters = defaultdict(int)
+            self.errors = defaultdict(list)
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """
+        Context manager that times a stage. Set `rows_out` on the yielded dict to record the
+        number of output rows.
+
+        Example:
+            with METRICS.stage('create_boxoffice_dataset', rows_in=len(df)) as stage:
+                df_out = ...
+                stage['rows_out'] = len(df_out)
+        """
+        info = {'rows_out': None}
+        inicio = time.perf_counter()
+        try:
+            yield info
+        finally:
+            segundos = time.perf_counter() - inicio
+            with self.lock:
+                stage = self.stages.setdefault(name, {'calls': 0, 'seconds': 0.0, 'rows_in': 0, 'rows_out': 0})
+                stage['calls'] += 1
+                stage['seconds'] += segundos
+                stage['rows_in'] += rows_in or 0
+                stage['rows_out'] += info['rows_out'] or 0
+
+    def observe_request(self, host, seconds, status):
+        """
+        Records the latency and status code of a network request.
+        """
+        ms = seconds * 1000
+        with self.lock:
+            stats = self.hosts.get(host)
+            if stats is None:
+                stats = {'requests': 0, 'seconds': 0.0, 'max_ms': 0.0, 'status': defaultdict(int),
+                         'histogram': [0] * len(LATENCY_BUCKETS_MS)}
+                self.hosts[host] = stats
+            stats['requests'] += 1
+            stats['seconds'] += seconds
+            stats['max_ms'] = max(stats['max_ms'], ms)
+            stats['status'][str(status)] += 1
+            stats['histogram'][bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+
+    def increment(self, name, host=None, n=1):
+        """
+        Increments a counter (e.g. 'retries', 'errors', 'cache_hits'), optionally per host.
+        """
+        key = f'{name}:{host}' if host else name
+        with self.lock:
+            self.counters[key] += n
+
+    def error(self, host, message):
+        """
+        Counts an error of a host and keeps a few examples for the report.
+        """
+        with self.lock:
+            self.counters[f'errors:{host}'] += 1
+            if len(self.errors[host]) < MAX_ERROR_SAMPLES:
+                self.errors[host].append(str(message))
+
+    def report(self):
+        """
+        Returns the metrics of the run as a JSON-serializable dict.
+        """
+        with self.lock:
+            hosts = {}
+            for host, stats in self.hosts.items():
+                hosts[host] = {
+                    'requests': stats['requests'],
+                    'mean_ms': round(stats['seconds'] * 1000 / stats['requests'], 2),
+                    'max_ms': round(stats['max_ms'], 2),
+                    'status': dict(stats['status']),
+                    'histogram_ms': {
+                        (f'<={limit:g}' if limit != float('inf') else 'inf'): count
+                        for limit, count in zip(LATENCY_BUCKETS_MS, stats['histogram'])
+                    },
+                }
+            return {
+                'started': self.started,
+                'wall_seconds': round(time.time() - self.started, 3),
+                'stages': {name: {**stage, 'seconds': round(stage['seconds'], 4)} for name, stage in self.stages.items()},
+                'hosts': hosts,
+                'counters': dict(self.counters),
+                'error_samples': {host: list(samples) for host, samples in self.errors.items()},
+            }
+
+    def stages_df(self):
+        """
+        Returns the stage timings as a DataFrame, slowest first.
+        """
+        df = pd.DataFrame.from_dict(self.report()['stages'], orient='index')
+        return df.sort_values('seconds', ascending=False) if not df.empty else df
+
+    def write_report(self, path='run_report.json'):
+        """
+        Writes the metrics of the run to a JSON file.
+
+        Args:
+            path (str): Path of the output file.
+
+        Returns:
+            dict: The report written.
+        """
+        report = self.report()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"📊 Run report saved to: {path}")
+        return report
+
+
+# Métricas compartidas por todo el pipeline
+METRICS = RunMetrics()
+
+
+def instrumented_stage(name=None):
+    """
+    Decorator that records the timing of a function as a stage, with the rows of its DataFrame
+    arguments as rows in and the rows of the returned DataFrame as rows out.
+    """
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            rows_in = sum(len(arg) for arg in list(args) + list(kwargs.values()) if isinstance(arg, pd.DataFrame))
+            with METRICS.stage(stage_name, rows_in) as stage:
+                result = func(*args, **kwargs)
+                if isinstance(result, pd.DataFrame):
+                    stage['rows_out'] = len(result)
+            return result
+        return wrapper
+    return decorator
+
+
+class ProgressReporter:
+    """
+    Low-overhead progress reporter: counts finished items and prints a single status line at
+    most every `interval` seconds (and once at the end), instead of one line per item.
+
+    Args:
+        label (str): Text printed before the progress.
+        total (int): Total number of items.
+        interval (float): Minimum seconds between two printed lines.
+    """
+
+    def __init__(self, label, total, interval=5.0):
+        self.label = label
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self.last_print = self.started
+        self.lock = threading.Lock()
+
+    def update(self, n=1, failed=0):
+        """
+        Adds finished items (and how many of them failed).
+        """
+        with self.lock:
+            self.done += n
+            self.failed += failed
+            now = time.monotonic()
+            if now - self.last_print < self.interval and self.done < self.total:
+                return
+            self.last_print = now
+            line = self._line(now)
+        print(line)
+
+    def _line(self, now):
+        elapsed = now - self.started
+        speed = self.done / elapsed if elapsed else 0.0
+        eta = (self.total - self.done) / speed if speed else 0.0
+        failed = f", {self.failed} failed" if self.failed else ''
+        return f"{self.label}: {self.done}/{self.total} ({speed:.1f}/s{failed}, ETA {eta:.0f}s)"
+
+
+def current_rss_mb():
+    """
+    Returns the resident memory of the process in megabytes (Linux), or the peak resident memory
+    reported by `resource` on other systems.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class PeakMemory:
+    """
+    Context manager that samples the resident memory of the process while its block runs and keeps
+    the peak, including the memory allocated outside Python (NumPy, pyarrow).
+
+    Usage:
+        with PeakMemory() as memoria:
+            ...
+        memoria.peak_mb, memoria.delta_mb
+
+    Args:
+        interval (float): Seconds between two samples.
+    """
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.start_mb = self.peak_mb = 0.0
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+    def __enter__(self):
+        self.start_mb = self.peak_mb = current_rss_mb()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, current_rss_mb())
+        return False
+
+    @property
+    def delta_mb(self):
+        """
+        Peak resident memory above the memory used when the block started.
+        """
+        return self.peak_mb - self.start_mb
@@ -0,0 +1,293 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from compact_dataset import decode_filmid, encode_filmid
+from instrumentation import PeakMemory
+
+# Reglas para las películas con varias nominaciones
+ALL_NOMINATIONS = 'all'    # una fila por nominación (como `create_final_dataset`)
+ONE_PER_FILM = 'film'      # una fila por película: primer año, si ganó alguna y número de nominaciones
+NOMINATION_RULES = (ALL_NOMINATIONS, ONE_PER_FILM)
+
+
+class KeyIndex:
+    """
+    Sorted integer index of the 'filmid' column of a source: the keys of `encode_filmid` sorted
+    once, and the row of each one, so any set of keys is found with a binary search.
+
+    Args:
+        filmids (pd.Series): IMDb IDs ("tt0245712") or integer keys of the source.
+        unique (bool): Whether every film can appear only once in the source.
+
+    Raises:
+        ValueError: If `unique` and a film appears more than once.
+    """
+
+    def __init__(self, filmids, unique=True):
+        keys = filmids if pd.api.types.is_integer_dtype(filmids) else encode_filmid(filmids)
+        keys = np.asarray(keys, dtype=np.int64)
+        self.order = np.argsort(keys, kind='stable')
+        self.keys = keys[self.order]
+        if unique and len(self.keys) > 1 and (self.keys[1:] == self.keys[:-1]).any():
+            repetidas = np.unique(self.keys[1:][self.keys[1:] == self.keys[:-1]])
+            raise ValueError(f"Repeated films in a one-to-one source: {decode_filmid(pd.Series(repetidas[:5])).tolist()}")
+
+    def unique_keys(self):
+        """
+        Returns the sorted keys without repetitions.
+        """
+        if len(self.keys) == 0:
+            return self.keys
+        return self.keys[np.r_[True, self.keys[1:] != self.keys[:-1]]]
+
+    def rows(self, keys):
+        """
+        Returns the row of each key in the source, or -1 where the key is not in it.
+        """
+        if len(self.keys) == 0:
+            return np.full(len(keys), -1, dtype=np.int64)
+        posiciones = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        return np.where(self.keys[posiciones] == keys, self.order[posiciones], -1)
+
+    def ranges(self, keys):
+        """
+        Returns the first and last (excluded) positions of every key in the sorted index.
+        """
+        return np.searchsorted(self.keys, keys, 'left'), np.searchsorted(self.keys, keys, 'right')
+
+
+def _take(series, rows):
+    # -1 en `rows` significa "sin fila": queda nulo
+    valores = series.array.take(rows, allow_fill=True) if (rows < 0).any() else series.array.take(rows)
+    return pd.Series(valores, name=series.name)
+
+
+def single_pass_join(sources, nominations=None, rule=ALL_NOMINATIONS, on_films=None):
+    """
+    Joins several sources by film in one pass: the key index of every source is built once, the
+    films of the result are found by intersecting the sorted keys, and every column is gathered
+    with the rows found, without intermediate DataFrames.
+
+    Args:
+        sources (list): Tuples `(df, columns, how)` of the one-row-per-film sources. `how` is
+            'inner' (the film must be in the source) or 'outer' (it is enough to be in one of the
+            'outer' sources, like the three box office scrapes).
+        nominations (tuple): Optional `(df, columns)` of the one-to-many source (e.g. kaggle_clean),
+            with a column 'winner' ('yes'/'no' or boolean) if `rule` is `ONE_PER_FILM`.
+        rule (str): What to do with the films nominated several times (see `NOMINATION_RULES`).
+        on_films (callable): Optional function `df -> df` applied to the one-row-per-film result
+            before the nominations are attached, so it runs once per film and not once per nomination.
+
+    Returns:
+        pd.DataFrame: 'filmid' as the integer key of `encode_filmid`, sorted, and the requested columns.
+
+    Raises:
+        ValueError: If the rule is unknown or a film appears twice in a one-row-per-film source.
+    """
+    if rule not in NOMINATION_RULES:
+        raise ValueError(f"Unknown nomination rule: {rule}")
+
+    indexes = [KeyIndex(df['filmid']) for df, _, _ in sources]
+    nom_index = KeyIndex(nominations[0]['filmid'], unique=False) if nominations else None
+
+    # Películas del resultado: las de todas las fuentes 'inner' y de alguna 'outer'
+    keys = None
+    for index, (_, _, how) in zip(indexes, sources):
+        if how == 'inner':
+            keys = index.unique_keys() if keys is None else np.intersect1d(keys, index.unique_keys(), assume_unique=True)
+    outer = [index.unique_keys() for index, (_, _, how) in zip(indexes, sources) if how == 'outer']
+    if outer:
+        union = outer[0]
+        for k in outer[1:]:
+            union = np.union1d(union, k)
+        keys = union if keys is None else np.intersect1d(keys, union, assume_unique=True)
+    if nom_index is not None:
+        keys = nom_index.unique_keys() if keys is None else np.intersect1d(keys, nom_index.unique_keys(), assume_unique=True)
+    keys = keys if keys is not None else np.array([], dtype=np.int64)
+
+    columnas = {'filmid': pd.Series(keys.astype(np.int32))}
+    for index, (df, columns, _) in zip(indexes, sources):
+        rows = index.rows(keys)
+        for column in columns:
+            columnas[column] = _take(df[column], rows)
+    df_join = pd.DataFrame(columnas)
+    if on_films is not None:
+        df_join = on_films(df_join)
+    if nom_index is None:
+        return df_join
+
+    df_nom, nom_columns = nominations
+    inicio, fin = nom_index.ranges(keys)
+    cuantas = fin - inicio
+    # Posiciones en el índice de las nominaciones de las películas del resultado, agrupadas por
+    # película: las de las películas que no están en las fuentes quedan fuera
+    desde = np.cumsum(cuantas) - cuantas
+    posiciones = np.arange(cuantas.sum()) - np.repeat(desde, cuantas) + np.repeat(inicio, cuantas)
+    if rule == ALL_NOMINATIONS:
+        # Cada película se repite una vez por nominación, en el orden de la fuente de nominaciones
+        repetidas = np.repeat(np.arange(len(keys)), cuantas)
+        filas = nom_index.order[posiciones]
+        df_join = df_join.take(repetidas).reset_index(drop=True)
+        return df_join.assign(**{column: _take(df_nom[column], filas) for column in nom_columns})
+
+    # Una fila por película: se ganó si ganó alguna nominación, y se toma la categoría de la
+    # nominación ganada (o la primera) y el primer año. Los tramos [desde, desde + cuantas) son
+    # contiguos en `posiciones`, así que reduceat no mezcla nominaciones de películas distintas
+    winner = df_nom['winner']
+    ganada = (winner if pd.api.types.is_bool_dtype(winner) else winner.astype('string').str.lower().eq('yes'))
+    ganada = ganada.fillna(False).to_numpy(dtype=bool)[nom_index.order[posiciones]]
+    gano = np.logical_or.reduceat(ganada, desde) if len(keys) else np.array([], dtype=bool)
+    elegida = np.where(gano, _first_true(ganada, desde, desde + cuantas), desde)
+    filas = nom_index.order[posiciones[elegida]]
+    columnas = {column: _take(df_nom[column], filas) for column in nom_columns if column not in ('winner', 'year')}
+    if 'year' in nom_columns:
+        years = df_nom['year'].to_numpy()[nom_index.order[posiciones]]
+        columnas['year'] = pd.Series(np.minimum.reduceat(years, desde) if len(keys) else years[:0])
+    if 'winner' in nom_columns:
+        columnas['winner'] = pd.Series(np.where(gano, 'yes', 'no'))
+    columnas['nominations'] = pd.Series(cuantas.astype(np.int32))
+    return df_join.assign(**columnas)
+
+
+def _first_true(flags, inicio, fin):
+    # Posición de la primera nominación ganada de cada tramo [inicio, fin), vectorizado
+    posiciones = np.flatnonzero(flags)
+    if len(posiciones) == 0:
+        return inicio.copy()
+    candidata = posiciones[np.minimum(np.searchsorted(posiciones, inicio), len(posiciones) - 1)]
+    return np.where((candidata >= inicio) & (candidata < fin), candidata, inicio)
+
+
+def join_final_dataset(df_imdb, df_boxoffice, df_budget, df_kaggle, rule=ALL_NOMINATIONS):
+    """
+    Builds the final dataset from the OMDb data, the combined box office, the clean budgets and
+    the Kaggle nominations in one pass, with the ROI and the first genre and country as in
+    `create_final_dataset(df_imdb, create_financial_data(df_budget, df_boxoffice), df_kaggle)`.
+
+    Args:
+        df_imdb (pd.DataFrame): DataFrame with IMDb information.
+        df_boxoffice (pd.DataFrame): Output of `create_boxoffice_dataset`.
+        df_budget (pd.DataFrame): Output of `clean_budget`.
+        df_kaggle (pd.DataFrame): Output of `cleaning_kaggle_info`.
+        rule (str): `ALL_NOMINATIONS` (one row per nomination) or `ONE_PER_FILM` (one row per
+            film, with the column 'nominations').
+
+    Returns:
+        pd.DataFrame: The final dataset sorted by film, with 'filmid' as the integer key of
+            `encode_filmid` (`compact_dataset.decode_filmid` gives back the IMDb IDs).
+    """
+    columnas_imdb = [column for column in df_imdb.columns if column != 'filmid']
+
+    def por_pelicula(df):
+        # ROI y primer género y país, una vez por película
+        presupuesto = df['budget'].where(df['budget'] > 0)
+        columnas = {'ROI': ((df['Worlwide boxoffice'] - presupuesto) / presupuesto).astype('float64').round(2)}
+        for column in ('genre', 'country'):
+            if column in df.columns:
+                columnas[column] = df[column].str.replace(r',.*$', '', regex=True).str.strip()
+        return df.assign(**columnas)
+
+    df_final = single_pass_join(
+        [(df_imdb, columnas_imdb, 'inner'), (df_boxoffice, ['Worlwide boxoffice'], 'inner'),
+         (df_budget, ['budget'], 'inner')],
+        nominations=(df_kaggle, ['year', 'winner', 'category']), rule=rule, on_films=por_pelicula
+    )
+    orden = ['filmid', *columnas_imdb, 'Worlwide boxoffice', 'budget', 'ROI', 'year', 'winner', 'category']
+    return df_final[orden + [c for c in df_final.columns if c not in orden]]
+
+
+def synthetic_sources(films=1_000_000, nominations=10_000_000, seed=0):
+    """
+    Builds synthetic OMDb, box office, budget and nomination sources to benchmark the joins:
+    every source covers about 90% of `films`, in a different order.
+
+    Returns:
+        tuple: (df_imdb, df_boxoffice, df_budget, df_kaggle).
+    """
+    rng = np.random.default_rng(seed)
+    keys = rng.choice(np.arange(1, 40_000_000), films, replace=False)
+    filmids = pd.Series(keys).map('tt{:07d}'.format).astype('string')
+
+    def subset(fraccion):
+        return rng.permutation(films)[:int(films * fraccion)]
+
+    i = subset(0.9)
+    df_imdb = pd.DataFrame({
+        'filmid': filmids.values[i], 'title': filmids.values[i],
+        'genre': rng.choice(['Drama, War', 'Comedy', 'Animation, Family'], len(i)),
+        'country': rng.choice(['Spain', 'France, Italy', 'United States'], len(i)),
+        'imdbRating': rng.uniform(1, 10, len(i)).round(1),
+    })
+    b = subset(0.9)
+    df_boxoffice = pd.DataFrame({
+        'filmid': filmids.values[b], 'title': filmids.values[b],
+        'domestic boxoffice': pd.array(rng.integers(0, 10 ** 9, len(b)), dtype='Int64'),
+        'international boxoffice': pd.array(rng.integers(0, 10 ** 9, len(b)), dtype='Int64'),
+        'Worlwide boxoffice': pd.array(rng.integers(0, 2 * 10 ** 9, len(b)), dtype='Int64'),
+    })
+    p = subset(0.9)
+    df_budget = pd.DataFrame({
+        'filmid': filmids.values[p], 'title': filmids.values[p],
+        'budget': pd.array(rng.integers(10 ** 5, 3 * 10 ** 8, len(p)), dtype='Int64'),
+    })
+    n = rng.integers(0, films, nominations)
+    df_kaggle = pd.DataFrame({
+        'year': rng.integers(1927, 2025, nominations).astype('int16'),
+        'canonicalcategory': pd.Categorical(rng.choice(['best picture', 'animated feature film'], nominations)),
+        'category': pd.Categorical(rng.choice(['best picture', 'animated feature film'], nominations)),
+        'film': filmids.values[n], 'filmid': filmids.values[n],
+        'winner': pd.Categorical.from_codes((rng.random(nominations) < 0.2).astype(int), ['no', 'yes']),
+    })
+    return df_imdb, df_boxoffice, df_budget, df_kaggle
+
+
+def benchmark_joins(films=1_000_000, nominations=10_000_000, seed=0, chained=True):
+    """
+    Measures `join_final_dataset` against the chained joins of `create_financial_data` and
+    `create_final_dataset` on synthetic sources.
+
+    Args:
+        films (int): Number of films.
+        nominations (int): Number of nominations.
+        seed (int): Seed of the synthetic data.
+        chained (bool): Whether to measure the chained joins too.
+
+    Returns:
+        pd.DataFrame: One row per method with 'rows', 'seconds' and 'peak MB' (the resident
+            memory of the process above the memory used before the join).
+    """
+    from data_function import create_final_dataset, create_financial_data
+
+    fuentes = synthetic_sources(films, nominations, seed)
+    df_imdb, df_boxoffice, df_budget, df_kaggle = fuentes
+    metodos = [('single pass', lambda: join_final_dataset(df_imdb, df_boxoffice, df_budget, df_kaggle)),
+               ('single pass, one per film', lambda: join_final_dataset(df_imdb, df_boxoffice, df_budget, df_kaggle,
+                                                                        ONE_PER_FILM))]
+    if chained:
+        metodos.append(('chained joins', lambda: create_final_dataset(
+            df_imdb, create_financial_data(df_budget, df_boxoffice, ruta_salida=None, guardar=False), df_kaggle,
+            ruta_salida=None, guardar=False
+        )))
+
+    filas = []
+    for nombre, funcion in metodos:
+        with PeakMemory() as memoria:
+            inicio = time.perf_counter()
+            resultado = funcion()
+            segundos = time.perf_counter() - inicio
+        filas.append({'method': nombre, 'films': films, 'nominations': nominations, 'rows': len(resultado),
+                      'seconds': round(segundos, 2), 'peak MB': round(memoria.delta_mb)})
+        del resultado
+    return pd.DataFrame(filas)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark of the single-pass join against the chained joins.')
+    parser.add_argument('--films', type=int, default=1_000_000, help='number of synthetic films')
+    parser.add_argument('--nominations', type=int, default=10_000_000, help='number of synthetic nominations')
+    parser.add_argument('--no-chained', action='store_true', help='skip the chained joins')
+    args = parser.parse_args()
+    print(benchmark_joins(args.films, args.nominations, chained=not args.no_chained).to_string(index=False))
@@ -0,0 +1,204 @@
+import argparse
+import os
+import time
+
+import pandas as pd
+from openpyxl import load_workbook
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # sin pyarrow la copia en caché se guarda en CSV y se filtra por bloques al leerla
+    pa = pq = None
+
+from artifact_store import ARTIFACTS_DIR, artifact_path, memory_usage, stored_format
+
+KAGGLE_XLSX = os.path.join('csv', 'raw', 'full_data.xlsx')
+
+# Nombre de la copia columnar del Excel en la carpeta de artefactos
+KAGGLE_SOURCE = 'kaggle_source'
+
+# Columnas del Excel que usa el proyecto; el resto no se lee
+KAGGLE_COLUMNS = ['Year', 'CanonicalCategory', 'Category', 'Film', 'FilmId', 'Winner']
+
+# Columnas de texto que se comparan en minúsculas
+TEXT_COLUMNS = ['canonicalcategory', 'category', 'film']
+
+# Categorías de películas del análisis
+FILM_CATEGORIES = ['best picture', 'animated feature film', 'international feature film']
+
+# Filas que se leen del Excel (o del CSV de la caché) de cada vez
+CHUNK_ROWS = 10_000
+
+
+def tidy_kaggle_chunk(df):
+    """
+    Converts a block of rows of the Kaggle Excel to the format of the cached copy: lowercase
+    column names, the year as an integer, the text columns in lowercase and 'winner' as a boolean.
+
+    The early ceremonies cover two years ("1927/28"); their year is the first one.
+
+    Args:
+        df (pd.DataFrame): Rows with the columns of `KAGGLE_COLUMNS`.
+
+    Returns:
+        pd.DataFrame: The converted rows.
+    """
+    df = df.rename(columns=str.lower)
+    return df.assign(
+        year=df['year'].astype('string').str[:4].astype('int16'),
+        **{column: df[column].astype('string').str.lower() for column in TEXT_COLUMNS},
+        filmid=df['filmid'].astype('string'),
+        winner=df['winner'].fillna(0).astype(bool),
+    )
+
+
+def _xlsx_chunks(path, chunk_rows):
+    # Lee el Excel en modo streaming, un bloque de filas cada vez
+    libro = load_workbook(path, read_only=True, data_only=True)
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        cabecera = list(next(filas))
+        posiciones = [cabecera.index(column) for column in KAGGLE_COLUMNS]
+        bloque = []
+        for fila in filas:
+            bloque.append([fila[i] for i in posiciones])
+            if len(bloque) == chunk_rows:
+                yield tidy_kaggle_chunk(pd.DataFrame(bloque, columns=KAGGLE_COLUMNS))
+                bloque = []
+        if bloque:
+            yield tidy_kaggle_chunk(pd.DataFrame(bloque, columns=KAGGLE_COLUMNS))
+    finally:
+        libro.close()
+
+
+def convert_kaggle_source(path=KAGGLE_XLSX, directory=ARTIFACTS_DIR, chunk_rows=CHUNK_ROWS):
+    """
+    Converts the Kaggle Excel into a columnar copy in the artifacts folder, block by block.
+
+    With pyarrow every block becomes a Parquet row group, so the year and category filters of
+    `load_kaggle` skip whole groups when reading.
+
+    Args:
+        path (str): Path of the Kaggle Excel.
+        directory (str): Folder of the artifacts.
+        chunk_rows (int): Rows read and written at a time.
+
+    Returns:
+        str: Path of the cached copy.
+    """
+    fmt = 'parquet' if pq is not None else 'csv'
+    destino = artifact_path(KAGGLE_SOURCE, directory, fmt)
+    temporal = destino + '.tmp'
+    os.makedirs(directory, exist_ok=True)
+
+    if pq is not None:
+        schema = pa.schema([
+            ('year', pa.int16()), ('canonicalcategory', pa.string()), ('category', pa.string()),
+            ('film', pa.string()), ('filmid', pa.string()), ('winner', pa.bool_()),
+        ])
+        with pq.ParquetWriter(temporal, schema) as writer:
+            for bloque in _xlsx_chunks(path, chunk_rows):
+                writer.write_table(pa.Table.from_pandas(bloque, schema=schema, preserve_index=False))
+    else:
+        for i, bloque in enumerate(_xlsx_chunks(path, chunk_rows)):
+            bloque.to_csv(temporal, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+    os.replace(temporal, destino)
+    print(f"✅ Kaggle source cached as: {destino}")
+    return destino
+
+
+def kaggle_source_path(path=KAGGLE_XLSX, directory=ARTIFACTS_DIR):
+    """
+    Returns the path of the cached copy of the Kaggle Excel, converting it first if it does not
+    exist or the Excel is newer.
+    """
+    stored = stored_format(KAGGLE_SOURCE, directory)
+    if stored is not None:
+        destino = artifact_path(KAGGLE_SOURCE, directory, stored)
+        if not os.path.exists(path) or os.path.getmtime(path) <= os.path.getmtime(destino):
+            return destino
+    return convert_kaggle_source(path, directory)
+
+
+def read_kaggle_source(path=KAGGLE_XLSX, directory=ARTIFACTS_DIR):
+    """
+    Returns every row of the cached copy of the Kaggle Excel (all years and categories), in the
+    format of `tidy_kaggle_chunk`. `cleaning_kaggle_info` accepts it instead of the Excel.
+    """
+    fuente = kaggle_source_path(path, directory)
+    if fuente.endswith('.parquet'):
+        return pd.read_parquet(fuente)
+    return pd.read_csv(fuente, dtype={'year': 'int16'})
+
+
+def _filter_chunk(df, year_min, year_max, categories):
+    mascara = pd.Series(True, index=df.index)
+    if year_min is not None:
+        mascara &= df['year'] >= year_min
+    if year_max is not None:
+        mascara &= df['year'] <= year_max
+    if categories is not None:
+        mascara &= df['canonicalcategory'].isin(categories)
+    return df[mascara]
+
+
+def load_kaggle(year_min=2000, year_max=None, categories=FILM_CATEGORIES, path=KAGGLE_XLSX, directory=ARTIFACTS_DIR):
+    """
+    Loads the Oscar nominations of the Kaggle dataset, reading only the rows of a year range and a
+    set of categories from the cached columnar copy (see `convert_kaggle_source`).
+
+    Args:
+        year_min (int): First year. None loads from 1927.
+        year_max (int): Last year. None loads up to the last ceremony.
+        categories (iterable): Canonical categories in lowercase (e.g. 'best picture'). None
+            loads every category.
+        path (str): Path of the Kaggle Excel.
+        directory (str): Folder of the artifacts.
+
+    Returns:
+        pd.DataFrame: Same columns as `cleaning_kaggle_info` ('year', 'canonicalcategory',
+            'category', 'film', 'filmid' and 'winner' as 'yes'/'no'), with categorical labels.
+    """
+    categories = None if categories is None else [c.lower() for c in categories]
+    fuente = kaggle_source_path(path, directory)
+
+    if fuente.endswith('.parquet'):
+        # Los filtros se aplican al leer: pyarrow descarta los grupos de filas que no cumplen
+        filters = []
+        if year_min is not None:
+            filters.append(('year', '>=', year_min))
+        if year_max is not None:
+            filters.append(('year', '<=', year_max))
+        if categories is not None:
+            filters.append(('canonicalcategory', 'in', categories))
+        df = pd.read_parquet(fuente, filters=filters or None)
+    else:
+        bloques = [
+            _filter_chunk(bloque, year_min, year_max, categories)
+            for bloque in pd.read_csv(fuente, chunksize=CHUNK_ROWS)
+        ]
+        df = pd.concat(bloques, ignore_index=True)
+
+    df = df.reset_index(drop=True)
+    return df.assign(
+        year=df['year'].astype('int16'),
+        canonicalcategory=df['canonicalcategory'].astype('category'),
+        category=df['category'].astype('category'),
+        winner=pd.Categorical.from_codes(df['winner'].astype(int), ['no', 'yes']),
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Loads the Kaggle Oscar nominations from the cached columnar copy.')
+    parser.add_argument('--from', dest='year_min', type=int, default=2000, help='first year')
+    parser.add_argument('--to', dest='year_max', type=int, help='last year')
+    parser.add_argument('--all-categories', action='store_true', help='load every category')
+    parser.add_argument('--xlsx', default=KAGGLE_XLSX, help='path of the Kaggle Excel')
+    parser.add_argument('--artifacts-dir', default=ARTIFACTS_DIR, help='folder of the artifacts')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    df = load_kaggle(args.year_min, args.year_max, None if args.all_categories else FILM_CATEGORIES,
+                     args.xlsx, args.artifacts_dir)
+    print(f"🏆 {len(df)} nominations loaded in {time.perf_counter() - inicio:.3f}s ({memory_usage(df)} MB)")
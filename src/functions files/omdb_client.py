@@ -0,0 +1,202 @@
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from fetch_engine import (DEFAULT_MAX_IN_FLIGHT, DEFAULT_RATE, CircuitOpenError, fetch_ordered, host_of,
+                          parse_retry_after)
+from http_cache import cached_get, is_cacheable
+from instrumentation import METRICS
+
+OMDB_URL = 'http://www.omdbapi.com/'
+
+# Mensajes de error con los que OMDb indica que se ha agotado la cuota diaria
+QUOTA_ERRORS = ('request limit reached',)
+
+# Mensajes de error con los que OMDb indica que no conoce el ID: es una respuesta, no un fallo
+NOT_FOUND_ERRORS = ('not found', 'incorrect imdb id')
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class OMDbQuotaExceeded(Exception):
+    """
+    Raised when OMDb answers that the daily request limit of the API key has been reached.
+    """
+
+
+def is_quota_error(data):
+    """
+    Checks whether an OMDb JSON answer is a daily quota error.
+    """
+    error = str(data.get('Error', '')).lower() if isinstance(data, dict) else ''
+    return any(message in error for message in QUOTA_ERRORS)
+
+
+def is_not_found(data):
+    """
+    Checks whether an OMDb JSON answer says that the IMDb ID does not exist.
+    """
+    if not isinstance(data, dict) or data.get('Response') != 'False':
+        return False
+    error = str(data.get('Error', '')).lower()
+    return any(message in error for message in NOT_FOUND_ERRORS)
+
+
+def _omdb_cacheable(response):
+    # Nunca guardar en caché los errores de cuota, aunque lleguen con status 200
+    if not is_cacheable(response):
+        return False
+    try:
+        return not is_quota_error(response.json())
+    except ValueError:
+        return False
+
+
+def parse_omdb(imdb_id, data, parse_func):
+    """
+    Applies `parse_func` to an answer of `OMDbClient.get`.
+
+    Args:
+        imdb_id (str): The IMDb ID of the movie.
+        data (dict): The answer of `OMDbClient.get`.
+        parse_func (callable): Function `(imdb_id, data) -> record` applied to a found movie.
+
+    Returns:
+        dict: The parsed record, {} if OMDb does not know the ID, or None if the request failed.
+    """
+    if data is None:
+        return None
+    if is_not_found(data):
+        return {}
+    return parse_func(imdb_id, data)
+
+
+class OMDbClient:
+    """
+    OMDb API client with keep-alive connection pooling, exponential backoff on 429/5xx
+    responses and detection of the daily quota error.
+
+    Args:
+        api_key (str): OMDb API key. Defaults to the `OMDB_API_KEY` environment variable.
+        pool_size (int): Maximum number of pooled connections (use the same value as `max_in_flight`).
+        max_retries (int): Number of retries for 429/5xx responses and connection errors.
+        backoff (float): Base delay in seconds; the n-th retry waits `backoff * 2 ** n` plus jitter, or the
+            `Retry-After` of the answer if it is longer.
+        timeout (float): Timeout of each request in seconds.
+    """
+
+    def __init__(self, api_key=None, pool_size=DEFAULT_MAX_IN_FLIGHT, max_retries=4, backoff=0.5, timeout=30):
+        self.api_key = api_key or os.environ.get('OMDB_API_KEY', '')
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.quota_exceeded = threading.Event()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get(self, imdb_id):
+        """
+        Fetches the raw OMDb record of an IMDb ID.
+
+        Args:
+            imdb_id (str): The IMDb ID of the movie.
+
+        Returns:
+            dict: The JSON answer of OMDb, also when the movie was not found (see `is_not_found`), or
+                None if the request failed after all the retries.
+
+        Raises:
+            OMDbQuotaExceeded: If the daily quota of the API key has been reached.
+        """
+        if self.quota_exceeded.is_set():
+            raise OMDbQuotaExceeded(imdb_id)
+
+        params = {'apikey': self.api_key, 'i': imdb_id}
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = cached_get(
+                    OMDB_URL, params=params, timeout=self.timeout,
+                    session=self.session, should_cache=_omdb_cacheable
+                )
+            except CircuitOpenError as e:
+                # Con el circuito abierto no tiene sentido reintentar
+                response, error = None, e
+                break
+            except requests.exceptions.RequestException as e:
+                response, error = None, e
+            else:
+                error = None
+
+            if response is not None and response.status_code not in RETRY_STATUS:
+                try:
+                    data = response.json()
+                except ValueError:
+                    return None
+                if is_quota_error(data):
+                    if not self.quota_exceeded.is_set():
+                        METRICS.increment('quota_exceeded', host_of(OMDB_URL))
+                    self.quota_exceeded.set()
+                    raise OMDbQuotaExceeded(imdb_id)
+                if response.status_code != 200:
+                    return None
+                if data.get('Response') == 'False' and not is_not_found(data):
+                    return None
+                return data
+
+            if attempt < self.max_retries:
+                METRICS.increment('retries', host_of(OMDB_URL))
+                espera = self.backoff * 2 ** attempt + random.uniform(0, self.backoff)
+                retry_after = parse_retry_after(response.headers.get('Retry-After')) if response is not None else None
+                time.sleep(max(espera, retry_after or 0))
+
+        status = response.status_code if response is not None else error
+        METRICS.error(host_of(OMDB_URL), f"{imdb_id}: giving up after {self.max_retries} retries ({status})")
+        return None
+
+    def fetch_many(self, imdb_ids, parse_func, done=None, max_in_flight=DEFAULT_MAX_IN_FLIGHT, rate=DEFAULT_RATE,
+                   on_result=None):
+        """
+        Fetches and parses a batch of IMDb IDs with bounded concurrency, skipping the IDs that
+        were already fetched successfully. IDs that OMDb does not know get an empty record, so they
+        count as done and are not requested again. If the daily quota is reached, the pending IDs
+        are left out of the result so they can be fetched on a later pass.
+
+        Args:
+            imdb_ids (iterable): IMDb IDs to fetch.
+            parse_func (callable): Function `(imdb_id, data) -> record` applied to each answer.
+            done (set): IMDb IDs already fetched successfully.
+            max_in_flight (int): Maximum number of simultaneous requests.
+            rate (float): Maximum number of requests per second.
+            on_result (callable): Optional function `(imdb_id, record)` called as each attempted ID finishes.
+
+        Returns:
+            dict: Records by IMDb ID. IDs not found map to {} and failed IDs to None; IDs skipped because
+                of the quota are missing.
+        """
+        done = done or set()
+        pendientes = [imdb_id for imdb_id in imdb_ids if imdb_id not in done]
+
+        def fetch_one(imdb_id):
+            try:
+                data = self.get(imdb_id)
+            except OMDbQuotaExceeded:
+                return imdb_id, False, None
+            record = parse_omdb(imdb_id, data, parse_func)
+            if on_result is not None:
+                on_result(imdb_id, record)
+            return imdb_id, True, record
+
+        results = fetch_ordered(
+            pendientes, fetch_one, host_of(OMDB_URL),
+            max_in_flight=max_in_flight, rate=rate, label='🔍 OMDb'
+        )
+        if self.quota_exceeded.is_set():
+            print("⚠️ OMDb daily request limit reached: pending IDs will be fetched on the next pass")
+        return {imdb_id: record for imdb_id, attempted, record in results if attempted}
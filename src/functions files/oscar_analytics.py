@@ -0,0 +1,250 @@
+import numpy as np
+import pandas as pd
+
+from artifact_store import load_artifact
+
+# Cada fila es una nominación: una película en una categoría y un año
+ROW_KEY = ['filmid', 'year', 'category']
+
+# Dimensiones por las que se pueden pedir las consultas (None es el total)
+DIMENSIONS = ['category', 'year', 'genre', 'country']
+
+# Métricas agregadas
+METRICS = ['imdbRating', 'metascore', 'ROI', 'budget', 'Worlwide boxoffice']
+
+# Métricas con valores discretos: se guarda su histograma (valor / resolución) para poder contar
+# las filas por encima de un umbral que cambia con los datos, como la media de las ganadoras
+HISTOGRAMS = {'imdbRating': 0.1, 'metascore': 1}
+
+# Filtros de los gráficos del proyecto: ROI sin valores extremos y presupuesto máximo
+ROI_OUTLIER = 1000
+BUDGET_CAP = 500_000_000
+FILTERS = {
+    'all': None,
+    'roi_below_outliers': lambda df: df['ROI'] < ROI_OUTLIER,
+    'budget_capped': lambda df: df['budget'] <= BUDGET_CAP,
+}
+
+
+def _winner_flags(winner):
+    if pd.api.types.is_bool_dtype(winner):
+        return winner.fillna(False).astype(bool)
+    return winner.astype('string').str.lower().eq('yes').fillna(False).astype(bool)
+
+
+def _prepare(df):
+    # Solo las columnas que se agregan, con 'winner' como 'yes'/'no' y las métricas como float
+    columnas = [c for c in ROW_KEY + ['genre', 'country', 'winner'] + METRICS if c in df.columns]
+    df = df[columnas]
+    return df.assign(
+        winner=np.where(_winner_flags(df['winner']), 'yes', 'no'),
+        **{m: df[m].astype('Float64').astype('float64') for m in METRICS if m in df.columns},
+    ).set_index(ROW_KEY)
+
+
+class WinnerAnalytics:
+    """
+    Winner vs non-winner statistics of the final dataset, precomputed by category, year, genre and
+    country, and kept up to date when rows are added or replaced, without rescanning the data.
+
+    For every dimension and filter it keeps, per group and winner, the number of rows and the
+    count, sum and sum of squares of every metric (from which means and standard deviations
+    come), plus histograms of the discrete metrics. Adding or replacing rows only adds the new
+    contributions and subtracts the old ones. The answers of the named queries are cached until
+    the next update. Infinite values (an ROI with a zero budget in old data) are left out of the
+    metric statistics, as in `significance`.
+
+    Args:
+        df (pd.DataFrame): Final dataset (one row per nomination). Can be empty and filled with `update`.
+    """
+
+    def __init__(self, df=None):
+        self.rows = _prepare(pd.DataFrame(columns=ROW_KEY + ['genre', 'country', 'winner'] + METRICS))
+        self.stats = {}
+        self.histograms = {}
+        self.version = 0
+        self._cache = {}
+        if df is not None and len(df):
+            self.update(df)
+
+    # --- Actualización incremental ---
+
+    def _contributions(self, df):
+        # Sumas por (grupo, ganadora) de cada dimensión y filtro
+        valores = {'rows': pd.Series(1, index=df.index)}
+        for m in METRICS:
+            # Solo valores finitos: un ROI infinito no se puede restar después (inf - inf es NaN)
+            v = df[m].where(np.isfinite(df[m]))
+            valores[f'{m}|n'] = v.notna().astype('int64')
+            valores[f'{m}|sum'] = v.fillna(0)
+            valores[f'{m}|sq'] = v.fillna(0) ** 2
+        valores = pd.DataFrame(valores)
+
+        stats = {}
+        histograms = {}
+        for dimension in [None] + DIMENSIONS:
+            grupo = df.index.get_level_values(dimension) if dimension in ROW_KEY else \
+                (df[dimension] if dimension else pd.Series('all', index=df.index))
+            grupo = np.asarray(grupo)
+            for nombre, filtro in FILTERS.items():
+                mascara = np.ones(len(df), dtype=bool) if filtro is None else filtro(df).fillna(False).to_numpy(bool)
+                stats[(dimension, nombre)] = valores[mascara].groupby(
+                    [grupo[mascara], df['winner'].to_numpy()[mascara]]
+                ).sum().rename_axis(['group', 'winner'])
+            for m, resolucion in HISTOGRAMS.items():
+                v = df[m].where(np.isfinite(df[m]))
+                con_valor = v.notna().to_numpy()
+                bins = np.round(v[con_valor].to_numpy() / resolucion).astype(np.int64)
+                histograms[(dimension, m)] = pd.Series(1, index=range(len(bins))).groupby(
+                    [grupo[con_valor], df['winner'].to_numpy()[con_valor], bins]
+                ).sum().rename_axis(['group', 'winner', 'bin'])
+        return stats, histograms
+
+    def _apply(self, df, sign):
+        stats, histograms = self._contributions(df)
+        for key, contrib in stats.items():
+            actual = self.stats.get(key)
+            nuevo = contrib * sign if actual is None else actual.add(contrib * sign, fill_value=0)
+            self.stats[key] = nuevo[nuevo['rows'] > 0]
+        for key, contrib in histograms.items():
+            actual = self.histograms.get(key)
+            nuevo = contrib * sign if actual is None else actual.add(contrib * sign, fill_value=0)
+            self.histograms[key] = nuevo[nuevo > 0]
+
+    def update(self, df):
+        """
+        Adds new rows (e.g. a new ceremony year) or replaces the rows with the same film, year and
+        category (e.g. refreshed financial data), updating every aggregate with only those rows.
+
+        Args:
+            df (pd.DataFrame): Rows with the columns of the final dataset.
+
+        Returns:
+            WinnerAnalytics: self.
+        """
+        nuevas = _prepare(df)
+        nuevas = nuevas[~nuevas.index.duplicated(keep='last')]
+        antiguas = self.rows[self.rows.index.isin(nuevas.index)]
+        if len(antiguas):
+            self._apply(antiguas, -1)
+        self._apply(nuevas, 1)
+        self.rows = pd.concat([self.rows[~self.rows.index.isin(nuevas.index)], nuevas])
+        self.version += 1
+        self._cache.clear()
+        return self
+
+    def remove(self, df):
+        """
+        Removes the rows with the film, year and category of the rows of `df`.
+        """
+        claves = df.set_index(ROW_KEY).index
+        antiguas = self.rows[self.rows.index.isin(claves)]
+        if len(antiguas):
+            self._apply(antiguas, -1)
+            self.rows = self.rows[~self.rows.index.isin(claves)]
+        self.version += 1
+        self._cache.clear()
+        return self
+
+    # --- Consultas ---
+
+    def _stats(self, by, filtro):
+        if by is not None and by not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension: {by} (use one of {DIMENSIONS})")
+        if filtro not in FILTERS:
+            raise ValueError(f"Unknown filter: {filtro} (use one of {list(FILTERS)})")
+        return self.stats.get((by, filtro), pd.DataFrame())
+
+    def winner_summary(self, metric, by=None, filtro='all'):
+        """
+        Returns the count, mean and standard deviation of a metric for winners and non-winners.
+
+        Args:
+            metric (str): One of `METRICS` (e.g. 'imdbRating').
+            by (str): Dimension of `DIMENSIONS`, or None for the whole dataset.
+            filtro (str): Filter of `FILTERS` (e.g. 'roi_below_outliers').
+
+        Returns:
+            pd.DataFrame: Index (group, winner) and the columns 'count', 'mean' and 'std'.
+        """
+        stats = self._stats(by, filtro)
+        if stats.empty:
+            return pd.DataFrame(columns=['count', 'mean', 'std'])
+        n = stats[f'{metric}|n']
+        media = stats[f'{metric}|sum'] / n.where(n > 0)
+        varianza = (stats[f'{metric}|sq'] - n * media ** 2) / (n - 1).where(n > 1)
+        resumen = pd.DataFrame({'count': n.astype('int64'), 'mean': media, 'std': np.sqrt(varianza.clip(lower=0))})
+        resumen.index = resumen.index.set_names(by or 'all', level='group')
+        return resumen.sort_index()
+
+    def winner_means(self, metric, by=None, filtro='all'):
+        """
+        Returns the mean of a metric with one column per winner value ('no', 'yes'), as
+        `df.groupby([by, 'winner'])[metric].mean().unstack()`.
+        """
+        return self.winner_summary(metric, by, filtro)['mean'].unstack('winner')
+
+    def counts(self, by=None, filtro='all'):
+        """
+        Returns the number of rows of winners and non-winners, one column per winner value.
+        """
+        stats = self._stats(by, filtro)
+        if stats.empty:
+            return pd.DataFrame(columns=['no', 'yes'])
+        counts = stats['rows'].astype('int64').unstack('winner', fill_value=0)
+        counts.index.name = by or 'all'
+        return counts.sort_index()
+
+    def above_winner_average(self, metric='imdbRating', by='genre'):
+        """
+        Returns, per group, the percentage of winners and of non-winners whose metric is above the
+        mean of all the winners (the genre comparison of `visualizacion.ipynb`).
+
+        Args:
+            metric (str): One of the metrics of `HISTOGRAMS`.
+            by (str): Dimension of `DIMENSIONS`.
+
+        Returns:
+            pd.DataFrame: Index by group and the columns 'percentage_winner' and 'percentage_no_winner'.
+        """
+        if metric not in HISTOGRAMS:
+            raise ValueError(f"No histogram for {metric} (use one of {list(HISTOGRAMS)})")
+        media_ganadoras = self.winner_summary(metric).loc[('all', 'yes'), 'mean']
+        histograma = self.histograms.get((by, metric), pd.Series(dtype='int64'))
+        valores = histograma.index.get_level_values('bin') * HISTOGRAMS[metric]
+        encima = histograma[valores > media_ganadoras + 1e-9].groupby(level=['group', 'winner']).sum()
+        encima = encima.unstack('winner', fill_value=0).reindex(columns=['no', 'yes'], fill_value=0)
+        totales = self.counts(by).reindex(columns=['no', 'yes'])
+        encima = encima.reindex(totales.index, fill_value=0)
+        porcentaje = encima / totales.where(totales > 0) * 100
+        resultado = pd.DataFrame({
+            'percentage_winner': porcentaje['yes'], 'percentage_no_winner': porcentaje['no'],
+        })
+        resultado.index.name = by
+        return resultado
+
+    QUERIES = {
+        'summary': 'winner_summary',
+        'means': 'winner_means',
+        'counts': 'counts',
+        'above_winner_average': 'above_winner_average',
+    }
+
+    def query(self, name, **params):
+        """
+        Runs a named query of `QUERIES` (e.g. `query('means', metric='ROI', by='year',
+        filtro='roi_below_outliers')`), caching the answer until the next update.
+        """
+        if name not in self.QUERIES:
+            raise ValueError(f"Unknown query: {name} (use one of {list(self.QUERIES)})")
+        key = (name, tuple(sorted(params.items())))
+        if key not in self._cache:
+            self._cache[key] = getattr(self, self.QUERIES[name])(**params)
+        return self._cache[key].copy()
+
+
+def load_analytics(csv_path='csv/final_dataset.csv'):
+    """
+    Builds the `WinnerAnalytics` of the 'final_dataset' artifact (imported from `csv_path` the first time).
+    """
+    return WinnerAnalytics(load_artifact('final_dataset', csv_path))
@@ -0,0 +1,375 @@
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+
+import pandas as pd
+
+from artifact_store import ARTIFACTS_DIR, load_artifact, read_artifact, stored_format, write_artifact
+from bridge_tables import BRIDGE_COLUMNS, bridge_name, build_bridge
+from data_function import (MANUAL_BUDGETS_PATH, clean_budget, cleaning_kaggle_info, create_boxoffice_dataset,
+                           create_financial_data, create_final_dataset, load_manual_budgets)
+from instrumentation import METRICS
+from kaggle_loader import read_kaggle_source
+
+# Ficheros de entrada del pipeline (rutas relativas a la raíz del proyecto)
+SOURCES = {
+    'kaggle_raw': os.path.join('csv', 'raw', 'full_data.xlsx'),
+    'imdb_data': os.path.join('csv', 'raw', 'imdb_data.csv'),
+    'domestic_boxoffice': os.path.join('csv', 'raw', 'domestic_boxoffice.csv'),
+    'international_boxoffice': os.path.join('csv', 'raw', 'international_boxoffice.csv'),
+    'worlwide_boxoffice': os.path.join('csv', 'raw', 'worlwide_boxoffice.csv'),
+    'movie_budgets': os.path.join('csv', 'raw', 'movie_budgets.csv'),
+}
+
+STATE_FILE = 'pipeline_state.json'
+
+# Carpeta de los módulos del proyecto: solo su código versiona las etapas, no el de las librerías
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _in_project(obj):
+    try:
+        path = inspect.getsourcefile(obj)
+    except TypeError:
+        return False
+    return path is not None and os.path.dirname(os.path.abspath(path)) == PROJECT_DIR
+
+
+def _is_data(valor):
+    # Constantes con un repr estable: números, textos y colecciones de ellos (no objetos como METRICS)
+    if isinstance(valor, (str, bytes, int, float, bool, type(None))):
+        return True
+    if isinstance(valor, dict):
+        return all(_is_data(k) and _is_data(v) for k, v in valor.items())
+    if isinstance(valor, (list, tuple, set, frozenset)):
+        return all(_is_data(v) for v in valor)
+    return False
+
+
+def _code_names(code):
+    # Nombres globales que usa una función, incluidos los de sus lambdas y comprensiones
+    nombres = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            nombres |= _code_names(const)
+    return nombres
+
+
+def code_dependencies(funcs):
+    """
+    Returns the code the output of some functions depends on: the functions themselves and,
+    recursively, the project functions, classes and constants they reference by name (e.g.
+    `normalize_columns` or `SCHEMAS`), resolved from their globals. Library code is left out, and
+    so are the functions of the same module they do not use.
+
+    Args:
+        funcs (list): Functions.
+
+    Returns:
+        dict: Source code (functions and classes) or `repr` (constants) by qualified name.
+    """
+    dependencias = {}
+    pendientes = [inspect.unwrap(func) for func in funcs]
+    while pendientes:
+        obj = pendientes.pop()
+        nombre = f'{obj.__module__}.{obj.__qualname__}'
+        if nombre in dependencias:
+            continue
+        dependencias[nombre] = inspect.getsource(obj)
+        funciones = [obj] if inspect.isfunction(obj) else \
+            [inspect.unwrap(f) for f in vars(obj).values() if inspect.isfunction(inspect.unwrap(f))]
+        for funcion in funciones:
+            for name in _code_names(funcion.__code__):
+                valor = funcion.__globals__.get(name)
+                if inspect.ismodule(valor) or valor is None:
+                    continue
+                if inspect.isfunction(valor) or inspect.isclass(valor):
+                    valor = inspect.unwrap(valor)
+                    if _in_project(valor):
+                        pendientes.append(valor)
+                elif _is_data(valor) and _in_project(inspect.getmodule(funcion)):
+                    # Constante global (esquemas, listas de categorías...): cuenta su valor
+                    if isinstance(valor, (set, frozenset)):
+                        valor = sorted(valor, key=repr)
+                    dependencias[f'{funcion.__module__}.{name}'] = repr(valor)
+    return dict(sorted(dependencias.items()))
+
+
+class Stage:
+    """
+    A step of the pipeline: a function that takes the DataFrames of its inputs (in order) and
+    returns the DataFrame of the artifact with the same name as the stage.
+
+    Args:
+        name (str): Name of the stage and of the artifact it produces.
+        func (callable): Function `(*input_dfs) -> pd.DataFrame`.
+        inputs (list): Names of the sources or artifacts it reads.
+        code (list): Functions whose code versions the stage. Defaults to `func`. The project
+            helpers and constants they use are hashed too (see `code_dependencies`), so a change
+            in a parser or a schema also invalidates the stage.
+        params (dict): JSON-serializable parameters that also change the output.
+    """
+
+    def __init__(self, name, func, inputs, code=None, params=None):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.code = code or [func]
+        self.params = params or {}
+
+    def code_hash(self):
+        """
+        Returns the hash of the source code of the stage functions and of the helpers they use.
+        """
+        digest = hashlib.sha256()
+        for nombre, codigo in code_dependencies(self.code).items():
+            digest.update(nombre.encode('utf-8'))
+            digest.update(codigo.encode('utf-8'))
+        return digest.hexdigest()
+
+    def fingerprint(self, input_fingerprints):
+        """
+        Returns the fingerprint of the output: a hash of the code, the parameters and the
+        fingerprints of the inputs. If none of them changes, the output does not change either.
+        """
+        payload = json.dumps(
+            {'stage': self.name, 'code': self.code_hash(), 'params': self.params, 'inputs': input_fingerprints},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def default_stages(presupuestos=None):
+    """
+    Returns the stages of the `data_function.py` pipeline.
+
+    Args:
+        presupuestos (dict): Manual budgets by title passed to `clean_budget`. Defaults to the ones
+            of the notebook, stored in `data_function.MANUAL_BUDGETS_PATH`; pass {} to use none.
+
+    Returns:
+        list: The stages.
+    """
+    if presupuestos is None:
+        presupuestos = load_manual_budgets(MANUAL_BUDGETS_PATH)
+    return [
+        # El Excel se lee con kaggle_loader, así que su código también versiona la etapa
+        Stage('kaggle_clean', cleaning_kaggle_info, ['kaggle_raw'], code=[cleaning_kaggle_info, read_kaggle_source]),
+        Stage('boxoffice_data', create_boxoffice_dataset,
+              ['domestic_boxoffice', 'international_boxoffice', 'worlwide_boxoffice']),
+        Stage('movie_budgets_clean',
+              lambda df_budget: clean_budget(df_budget, presupuestos, ruta_salida=None, guardar=False),
+              ['movie_budgets'], code=[clean_budget], params={'presupuestos': presupuestos}),
+        Stage('financial_data', partial(create_financial_data, ruta_salida=None, guardar=False),
+              ['movie_budgets_clean', 'boxoffice_data'], code=[create_financial_data]),
+        Stage('final_dataset', partial(create_final_dataset, ruta_salida=None, guardar=False),
+              ['imdb_data', 'financial_data', 'kaggle_clean'], code=[create_final_dataset]),
+        *[
+            Stage(bridge_name(column), partial(build_bridge, column=column), ['imdb_data'], code=[build_bridge],
+                  params={'column': column})
+            for column in BRIDGE_COLUMNS
+        ],
+    ]
+
+
+def file_hash(path):
+    """
+    Returns the SHA-256 of the content of a file.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(bloque)
+    return digest.hexdigest()
+
+
+def _load_source(name, path, directory):
+    if name == 'kaggle_raw':
+        # El Excel se convierte una vez a una copia columnar y las siguientes veces se lee esa copia
+        return read_kaggle_source(path, directory)
+    return load_artifact(name, path, directory=directory)
+
+
+def _needed_stages(stages, targets):
+    # Etapas necesarias para construir `targets`, incluidas las previas
+    necesarias = set()
+    pendientes = list(targets)
+    while pendientes:
+        name = pendientes.pop()
+        if name in stages and name not in necesarias:
+            necesarias.add(name)
+            pendientes.extend(stages[name].inputs)
+    return necesarias
+
+
+def plan_pipeline(targets=None, stages=None, sources=None, directory=ARTIFACTS_DIR, force=False):
+    """
+    Computes the fingerprint of every needed stage and decides which ones have to run.
+
+    Args:
+        targets (list): Artifacts to build. Defaults to every stage.
+        stages (list): Stages of the pipeline. Defaults to `default_stages()`.
+        sources (dict): Paths of the input files by name. Defaults to `SOURCES`.
+        directory (str): Folder of the artifacts and of the pipeline state.
+        force (bool): Run every needed stage even if its output is up to date.
+
+    Returns:
+        pd.DataFrame: One row per needed stage, in dependency order, with 'stage', 'inputs',
+            'fingerprint' and 'action' ('run' or 'skip').
+    """
+    stages = {stage.name: stage for stage in stages or default_stages()}
+    sources = sources or SOURCES
+    necesarias = _needed_stages(stages, targets or list(stages))
+    state = _read_state(directory)
+
+    fingerprints = {}
+    filas = []
+    resueltas = set()
+    while len(resueltas) < len(necesarias):
+        listas = [
+            name for name in stages
+            if name in necesarias and name not in resueltas
+            and all(i in resueltas or i not in stages for i in stages[name].inputs)
+        ]
+        if not listas:
+            raise ValueError(f"Cycle or missing stage among: {sorted(necesarias - resueltas)}")
+        for name in listas:
+            stage = stages[name]
+            entradas = []
+            for i in stage.inputs:
+                if i not in fingerprints:
+                    if i not in sources:
+                        raise ValueError(f"Unknown input '{i}' of stage '{name}'")
+                    fingerprints[i] = file_hash(sources[i])
+                entradas.append(fingerprints[i])
+            fingerprints[name] = stage.fingerprint(entradas)
+            actual = state.get(name) == fingerprints[name] and stored_format(name, directory) is not None
+            filas.append({
+                'stage': name, 'inputs': stage.inputs, 'fingerprint': fingerprints[name],
+                'action': 'skip' if actual and not force else 'run',
+            })
+            resueltas.add(name)
+
+    # Una etapa que se vuelve a ejecutar obliga a ejecutar las que dependen de ella
+    ejecutar = set()
+    for fila in filas:
+        if fila['action'] == 'run' or any(i in ejecutar for i in fila['inputs']):
+            fila['action'] = 'run'
+            ejecutar.add(fila['stage'])
+    return pd.DataFrame(filas, columns=['stage', 'inputs', 'fingerprint', 'action'])
+
+
+def _read_state(directory):
+    path = os.path.join(directory, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_state(directory, state):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, STATE_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def run_pipeline(targets=None, stages=None, sources=None, directory=ARTIFACTS_DIR, csv_dir=None, force=False,
+                 max_workers=3, dry_run=False):
+    """
+    Runs the stages needed to build `targets`, skipping the ones whose fingerprint did not change
+    since their artifact was written, and running independent branches (e.g. budget and box office)
+    in parallel.
+
+    Args:
+        targets (list): Artifacts to build. Defaults to every stage.
+        stages (list): Stages of the pipeline. Defaults to `default_stages()`.
+        sources (dict): Paths of the input files by name. Defaults to `SOURCES`.
+        directory (str): Folder of the artifacts and of the pipeline state.
+        csv_dir (str): If given, a CSV export of every artifact built is written in this folder.
+        force (bool): Run every needed stage even if its output is up to date.
+        max_workers (int): Maximum number of stages running at the same time.
+        dry_run (bool): Only return the plan, without running anything.
+
+    Returns:
+        pd.DataFrame: The plan of `plan_pipeline` with the columns 'status' ('ran', 'skipped' or
+            'planned') and 'seconds'.
+    """
+    stages_list = stages or default_stages()
+    stages = {stage.name: stage for stage in stages_list}
+    sources = sources or SOURCES
+    plan = plan_pipeline(targets, stages_list, sources, directory, force)
+    plan['status'] = plan['action'].map({'run': 'planned', 'skip': 'skipped'})
+    plan['seconds'] = 0.0
+    if dry_run:
+        return plan
+
+    acciones = dict(zip(plan['stage'], plan['action']))
+    fingerprints = dict(zip(plan['stage'], plan['fingerprint']))
+    state = _read_state(directory)
+    state_lock = threading.Lock()
+
+    def run_stage(name):
+        stage = stages[name]
+        inicio = time.perf_counter()
+        entradas = [
+            read_artifact(i, directory=directory) if i in stages else _load_source(i, sources[i], directory)
+            for i in stage.inputs
+        ]
+        with METRICS.stage(f'pipeline.{name}', sum(len(df) for df in entradas)) as info:
+            df = stage.func(*entradas)
+            info['rows_out'] = len(df)
+        csv_path = os.path.join(csv_dir, f'{name}.csv') if csv_dir else None
+        write_artifact(df, name, directory, csv_path=csv_path)
+        with state_lock:
+            state[name] = fingerprints[name]
+            _write_state(directory, state)
+        return time.perf_counter() - inicio
+
+    terminadas = {name for name, accion in acciones.items() if accion == 'skip'}
+    en_curso = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while len(terminadas) < len(acciones):
+            for name, accion in acciones.items():
+                listas = all(i in terminadas or i not in acciones for i in stages[name].inputs)
+                if accion == 'run' and name not in terminadas and name not in en_curso.values() and listas:
+                    print(f"▶️ Running stage: {name}")
+                    en_curso[executor.submit(run_stage, name)] = name
+            hechas, _ = wait(list(en_curso), return_when=FIRST_COMPLETED)
+            for future in hechas:
+                name = en_curso.pop(future)
+                # result() propaga el error de la etapa; las ya terminadas quedan guardadas
+                segundos = future.result()
+                plan.loc[plan['stage'] == name, ['status', 'seconds']] = ['ran', round(segundos, 3)]
+                terminadas.add(name)
+    return plan
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Builds the pipeline artifacts, skipping the stages that did not change.')
+    parser.add_argument('targets', nargs='*', help='artifacts to build (default: all)')
+    parser.add_argument('--artifacts-dir', default=ARTIFACTS_DIR, help='folder of the artifacts')
+    parser.add_argument('--csv-dir', help='also export every artifact built as CSV in this folder')
+    parser.add_argument('--budgets', default=MANUAL_BUDGETS_PATH,
+                        help='JSON file with manual budgets by title for clean_budget (default: %(default)s)')
+    parser.add_argument('--workers', type=int, default=3, help='stages running at the same time')
+    parser.add_argument('--force', action='store_true', help='run every stage even if it is up to date')
+    parser.add_argument('--dry-run', action='store_true', help='only print the plan')
+    parser.add_argument('--report', help='optional path to save the run report as JSON')
+    args = parser.parse_args()
+
+    presupuestos = load_manual_budgets(args.budgets) if args.budgets else {}
+    resultado = run_pipeline(
+        args.targets or None, default_stages(presupuestos), directory=args.artifacts_dir, csv_dir=args.csv_dir,
+        force=args.force, max_workers=args.workers, dry_run=args.dry_run
+    )
+    print(resultado[['stage', 'status', 'seconds']].to_string(index=False))
+    if args.report:
+        METRICS.write_report(args.report)
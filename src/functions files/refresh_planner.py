@@ -0,0 +1,169 @@
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from artifact_store import SCHEMAS, coerce_column
+from checkpoint import Checkpoint
+from http_cache import fresh_since
+
+# Años tras el estreno a partir de los cuales recaudación y votos ya no cambian
+FROZEN_AFTER_YEARS = 3
+
+DAY = 24 * 60 * 60
+# Intervalo de refresco (segundos) según la antigüedad de la película en años
+REFRESH_INTERVALS = {0: 1 * DAY, 1: 7 * DAY, 2: 30 * DAY}
+
+# Columnas que se actualizan en final_dataset.csv con cada fuente
+IMDB_COLUMNS = ['imdbRating', 'metascore', 'imdbVotes']
+FINANCIAL_COLUMNS = ['Worlwide boxoffice', 'budget', 'ROI']
+
+
+def plan_refresh(df_kaggle, checkpoint, now=None, frozen_after_years=FROZEN_AFTER_YEARS, intervals=None):
+    """
+    Decides which films have to be fetched again, based on the film year and the last time each
+    film was fetched successfully.
+
+    - Films never fetched (or whose last attempt failed) are always included.
+    - Films fetched when they were already `frozen_after_years` old are frozen and never refetched.
+    - The rest are refetched when their last fetch is older than the interval of their age.
+
+    Args:
+        df_kaggle (pd.DataFrame): DataFrame with the columns 'filmid' and 'year' (e.g. kaggle_clean.csv).
+        checkpoint (str | Checkpoint): Checkpoint of the collector with the last fetch of each film.
+        now (float): Current timestamp. Defaults to `time.time()`.
+        frozen_after_years (int): Age in years after which a film is frozen.
+        intervals (dict): Refresh interval in seconds by age in years. Defaults to `REFRESH_INTERVALS`.
+
+    Returns:
+        list: The IMDb IDs to fetch, in the order of `df_kaggle`.
+    """
+    if isinstance(checkpoint, str):
+        checkpoint = Checkpoint(checkpoint)
+    now = now or time.time()
+    intervals = intervals or REFRESH_INTERVALS
+    current_year = datetime.fromtimestamp(now).year
+    fetched_at = checkpoint.fetched_at()
+
+    years = df_kaggle.drop_duplicates('filmid').set_index('filmid')['year'].astype(int)
+    ids = []
+    for imdb_id, year in years.items():
+        last_fetch = fetched_at.get(imdb_id)
+        if last_fetch is None:
+            ids.append(imdb_id)
+            continue
+        if datetime.fromtimestamp(last_fetch).year - year >= frozen_after_years:
+            continue
+        age = max(current_year - year, 0)
+        interval = intervals.get(age, max(intervals.values()))
+        if now - last_fetch > interval:
+            ids.append(imdb_id)
+    return ids
+
+
+def refresh_collector(collector, df_kaggle, checkpoint, df_input=None, **kwargs):
+    """
+    Runs a collector (e.g. `boxoffice_summary_df`, `films_budget_df`, `films_df_imdb`) fetching only
+    the films planned by `plan_refresh`. The rest of the films are served from the checkpoint.
+    The responses cached before the refresh are not used, since their TTL (see
+    `http_cache.DEFAULT_TTLS`) is longer than most refresh intervals.
+
+    Args:
+        collector (callable): Collector function that accepts a `checkpoint` argument.
+        df_kaggle (pd.DataFrame): DataFrame with the columns 'filmid' and 'year'.
+        checkpoint (str): Checkpoint file of the collector.
+        df_input (pd.DataFrame): Input DataFrame of the collector. Defaults to `df_kaggle`.
+        **kwargs: Extra arguments for the collector.
+
+    Returns:
+        tuple: (DataFrame returned by the collector, list of the IMDb IDs that were refreshed).
+    """
+    checkpoint = Checkpoint(checkpoint)
+    inicio = time.time()
+    ids = plan_refresh(df_kaggle, checkpoint, now=inicio)
+    checkpoint.expire(ids)
+    print(f"🗓️ Refresh plan: {len(ids)} of {df_kaggle['filmid'].nunique()} films to fetch")
+    # Sin esto la caché HTTP devolvería la misma página que se descargó la última vez
+    with fresh_since(inicio):
+        df_result = collector(df_input if df_input is not None else df_kaggle, checkpoint=checkpoint, **kwargs)
+    return df_result, ids
+
+
+def _typed(series, column):
+    # Tipo de la columna en el dataset final: "261,019" y 261019 pasan a ser el mismo valor
+    dtype = SCHEMAS['final_dataset'].get(column)
+    return coerce_column(series, dtype) if dtype else series
+
+
+def _same_values(actuales, nuevos):
+    # Igualdad que trata dos nulos como iguales (y los decimales con tolerancia)
+    if pd.api.types.is_numeric_dtype(actuales) and pd.api.types.is_numeric_dtype(nuevos):
+        a = actuales.astype('Float64').to_numpy('float64', na_value=np.nan)
+        b = nuevos.astype('Float64').to_numpy('float64', na_value=np.nan)
+        return pd.Series(np.isclose(a, b, rtol=1e-9, atol=0, equal_nan=True), index=actuales.index)
+    iguales = (actuales.astype('string') == nuevos.astype('string')).fillna(False).astype(bool)
+    return iguales | (actuales.isna() & nuevos.isna())
+
+
+def merge_changed_rows(df_target, df_updates, columns, key='filmid'):
+    """
+    Copies into `df_target` the values of `columns` from `df_updates`, only for the rows whose
+    values actually changed. Rows of `df_target` sharing the same key (e.g. several nominations
+    of the same film) are all updated.
+
+    Both sides are converted to the types of the final dataset before comparing them (the scraped
+    texts such as "261,019" or "$5,408,467" become numbers), so a value that only changes its
+    format is not a change, and the updated columns keep those types.
+
+    Args:
+        df_target (pd.DataFrame): DataFrame to update (e.g. the final dataset).
+        df_updates (pd.DataFrame): DataFrame with the key column and the new values.
+        columns (list): Columns to update.
+        key (str): Column that identifies the film.
+
+    Returns:
+        tuple: (updated copy of `df_target`, sorted list of the keys whose rows changed).
+    """
+    df_result = df_target.copy()
+    updates = df_updates.drop_duplicates(key, keep='last').set_index(key)
+    changed = pd.Series(False, index=df_result.index)
+
+    for column in columns:
+        if column not in updates.columns or column not in df_result.columns:
+            continue
+        actuales = _typed(df_result[column], column)
+        nuevos = _typed(df_result[key].map(updates[column]), column)
+        diferente = nuevos.notna().fillna(False).astype(bool) & ~_same_values(actuales, nuevos)
+        df_result[column] = actuales.where(~diferente, nuevos)
+        changed |= diferente
+
+    return df_result, sorted(df_result.loc[changed, key].unique())
+
+
+def refresh_final_dataset(ruta_final, df_imdb=None, df_financial=None, ruta_salida=None):
+    """
+    Merges refreshed IMDb and financial rows into the final dataset, rewriting only the rows
+    that changed.
+
+    Args:
+        ruta_final (str): Path of the current final dataset (e.g. 'csv/final_dataset.csv').
+        df_imdb (pd.DataFrame): Refreshed OMDb data with 'filmid' and `IMDB_COLUMNS`.
+        df_financial (pd.DataFrame): Refreshed financial data with 'filmid' and `FINANCIAL_COLUMNS`.
+        ruta_salida (str): Path of the output file. Defaults to `ruta_final`.
+
+    Returns:
+        pd.DataFrame: The updated final dataset.
+    """
+    df_final = pd.read_csv(ruta_final)
+    cambiados = set()
+
+    for df_updates, columns in [(df_imdb, IMDB_COLUMNS), (df_financial, FINANCIAL_COLUMNS)]:
+        if df_updates is not None:
+            df_final, ids = merge_changed_rows(df_final, df_updates, columns)
+            cambiados.update(ids)
+
+    df_final = df_final.infer_objects()
+    df_final.to_csv(ruta_salida or ruta_final, index=False)
+    print(f"✅ {len(cambiados)} films updated in: {ruta_salida or ruta_final}")
+    return df_final
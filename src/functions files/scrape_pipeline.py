@@ -0,0 +1,202 @@
+import os
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from functools import partial
+
+import pandas as pd
+import requests
+
+from extractors import BOXOFFICE_COLUMNS, extract_boxoffice_summary, extract_budget
+from fetch_engine import DEFAULT_MAX_IN_FLIGHT, DEFAULT_RATE, fetch_error, get_limiter, host_of
+from http_cache import cached_get
+from instrumentation import METRICS, ProgressReporter, instrumented_stage
+from web_scraping_functions import BOXOFFICEMOJO_URL, THE_NUMBERS_URL, budget_error_record, film_url_fixed
+
+# Páginas descargadas que pueden esperar en cola antes de frenar a los descargadores
+DEFAULT_QUEUE_SIZE = 64
+
+_DONE = object()
+
+
+def fetch_html(url):
+    """
+    Downloads a page through the response cache.
+
+    Args:
+        url (str): URL of the page.
+
+    Returns:
+        tuple: (HTML of the page, None), or (None, error record of `fetch_engine.fetch_error`) if the request failed.
+    """
+    try:
+        response = cached_get(url, timeout=30)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        METRICS.error(host_of(url), f"{url}: {e}")
+        return None, fetch_error(url, e.response.status_code if e.response is not None else None, e)
+    return response.text, None
+
+
+def _fetch_stage(items, url_func, host, max_in_flight, rate, out_queue, errors):
+    limiter = get_limiter(host, max_in_flight, rate)
+
+    def worker(index):
+        with limiter:
+            html, error = fetch_html(url_func(items[index]))
+        # put() bloquea cuando la cola está llena: el análisis marca el ritmo de descarga
+        out_queue.put((index, html, error))
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_in_flight, len(items)))) as executor:
+            list(executor.map(worker, range(len(items))))
+    except Exception as e:
+        errors.append(e)
+    finally:
+        out_queue.put(_DONE)
+
+
+def run_scrape_pipeline(items, url_func, parse_func, host, max_in_flight=DEFAULT_MAX_IN_FLIGHT, rate=DEFAULT_RATE,
+                        parse_workers=None, queue_size=DEFAULT_QUEUE_SIZE, on_fetch_error=None, on_parse_error=None):
+    """
+    Staged scraping pipeline: fetch threads download the raw HTML, a bounded queue applies
+    backpressure, and a process pool runs the extraction so parsing scales with the CPU cores.
+
+    Args:
+        items (iterable): Items to scrape (IMDb IDs, titles...).
+        url_func (callable): Function `item -> url`.
+        parse_func (callable): Picklable function `html -> record`, run in the worker processes.
+        host (str): Host the requests go to, used to pick the shared limiter.
+        max_in_flight (int): Maximum number of simultaneous requests to the host.
+        rate (float): Maximum number of requests per second to the host.
+        parse_workers (int): Number of parse processes. Defaults to the number of CPU cores.
+        queue_size (int): Maximum number of downloaded pages waiting to be parsed.
+        on_fetch_error (callable): Function `error_record -> record` that builds the result of the
+            items whose page could not be downloaded. Defaults to None results.
+        on_parse_error (callable): Function `(url, exception) -> record` that builds the result of
+            the items whose page could not be parsed. Defaults to None results.
+
+    Returns:
+        list: The records, in the same order as `items`.
+    """
+    items = list(items)
+    parse_workers = parse_workers or os.cpu_count() or 1
+    results = [None] * len(items)
+    pages = queue.Queue(maxsize=queue_size)
+    errors = []
+    progress = ProgressReporter(f'⚙️ Parse {host}', len(items))
+
+    fetcher = threading.Thread(
+        target=_fetch_stage, args=(items, url_func, host, max_in_flight, rate, pages, errors), daemon=True
+    )
+    fetcher.start()
+
+    def collect(futures):
+        for future in futures:
+            try:
+                results[future.index] = future.result()
+                progress.update()
+            except Exception as e:
+                METRICS.error(host, f"{items[future.index]}: error processing the HTML - {e}")
+                results[future.index] = on_parse_error(url_func(items[future.index]), e) if on_parse_error else None
+                progress.update(failed=1)
+
+    with ProcessPoolExecutor(max_workers=parse_workers) as pool:
+        pending = set()
+        while True:
+            message = pages.get()
+            if message is _DONE:
+                break
+            index, html, error = message
+            if html is None:
+                results[index] = on_fetch_error(error) if on_fetch_error else None
+                progress.update(failed=1)
+                continue
+            future = pool.submit(parse_func, html)
+            future.index = index
+            pending.add(future)
+            # Como mucho dos páginas por proceso en vuelo: la cola sigue aplicando la contrapresión
+            if len(pending) >= 2 * parse_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        collect(pending)
+
+    fetcher.join()
+    if errors:
+        raise errors[0]
+    return results
+
+
+@instrumented_stage()
+def scrape_boxoffice_pipeline(df, max_in_flight=DEFAULT_MAX_IN_FLIGHT, rate=DEFAULT_RATE,
+                              parse_workers=None, queue_size=DEFAULT_QUEUE_SIZE, backend=None):
+    """
+    Same output as `boxoffice_summary_df`, but parsing the Box Office Mojo pages in a process pool.
+
+    Args:
+        df (pd.DataFrame): DataFrame containing a column 'filmid' with IMDb IDs and a column 'film' with movie titles.
+        max_in_flight (int): Maximum number of simultaneous requests to Box Office Mojo.
+        rate (float): Maximum number of requests per second to Box Office Mojo.
+        parse_workers (int): Number of parse processes. Defaults to the number of CPU cores.
+        queue_size (int): Maximum number of downloaded pages waiting to be parsed.
+        backend (str): Extractor backend. Defaults to `extractors.DEFAULT_BACKEND`.
+
+    Returns:
+        pd.DataFrame: The 'IMDb ID', 'title' and revenue columns, plus the other summary fields.
+    """
+    titulos = df.drop_duplicates('filmid').set_index('filmid')['film']
+    summaries = run_scrape_pipeline(
+        titulos.index, lambda imdb_id: BOXOFFICEMOJO_URL.format(imdb_id=imdb_id),
+        partial(extract_boxoffice_summary, backend=backend), host_of(BOXOFFICEMOJO_URL),
+        max_in_flight=max_in_flight, rate=rate, parse_workers=parse_workers, queue_size=queue_size,
+        on_fetch_error=lambda error: {**{column: None for column in BOXOFFICE_COLUMNS.values()}, 'fetch_error': error}
+    )
+    datos = [
+        {'IMDb ID': imdb_id, 'title': titulo, **(summary or {column: None for column in BOXOFFICE_COLUMNS.values()})}
+        for (imdb_id, titulo), summary in zip(titulos.items(), summaries)
+    ]
+    df_summary = pd.DataFrame(datos)
+    columnas = ['IMDb ID', 'title', *BOXOFFICE_COLUMNS.values()]
+    return df_summary.reindex(columns=columnas + [c for c in df_summary.columns if c not in columnas])
+
+
+@instrumented_stage()
+def scrape_budget_pipeline(df, max_in_flight=DEFAULT_MAX_IN_FLIGHT, rate=DEFAULT_RATE,
+                           parse_workers=None, queue_size=DEFAULT_QUEUE_SIZE, backend=None):
+    """
+    Same output as `films_budget_df`, but parsing The Numbers pages in a process pool.
+
+    Args:
+        df (pd.DataFrame): DataFrame containing a column 'filmid' with IMDb IDs and a column 'title' with movie titles.
+        max_in_flight (int): Maximum number of simultaneous requests to The Numbers.
+        rate (float): Maximum number of requests per second to The Numbers.
+        parse_workers (int): Number of parse processes. Defaults to the number of CPU cores.
+        queue_size (int): Maximum number of downloaded pages waiting to be parsed.
+        backend (str): Extractor backend. Defaults to `extractors.DEFAULT_BACKEND`.
+
+    Returns:
+        pd.DataFrame: The columns 'IMDb ID', 'title' and 'budget', plus 'fetch_error' if some page failed.
+    """
+    titulos = df.drop_duplicates('filmid').set_index('filmid')['title']
+    registros = run_scrape_pipeline(
+        titulos.values, lambda titulo: THE_NUMBERS_URL.format(film_url=film_url_fixed(titulo)),
+        partial(extract_budget, backend=backend), host_of(THE_NUMBERS_URL),
+        max_in_flight=max_in_flight, rate=rate, parse_workers=parse_workers, queue_size=queue_size,
+        on_fetch_error=budget_error_record,
+        on_parse_error=lambda url, e: budget_error_record(fetch_error(url, 200, e))
+    )
+    # Los procesos devuelven el presupuesto sin más; los fallos ya llegan como registro de budget_error_record
+    registros = [r if isinstance(r, dict) else {'budget': r} for r in registros]
+    for registro in registros:
+        if registro == {'budget': None}:
+            METRICS.increment('budget_not_found', host_of(THE_NUMBERS_URL))
+
+    df_budget = pd.DataFrame({
+        'IMDb ID': titulos.index,
+        'title': titulos.values,
+        'budget': [r['budget'] for r in registros]
+    })
+    errores = [r.get('fetch_error') for r in registros]
+    if any(errores):
+        df_budget['fetch_error'] = errores
+    return df_budget
@@ -0,0 +1,263 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Remuestreos que hace cada tarea del pool; las semillas se reparten por tarea, así que el
+# resultado con semilla es el mismo con cualquier número de procesos
+CHUNK_RESAMPLES = 5_000
+
+# Valores que se generan de una vez dentro de una tarea (remuestreos x filas)
+BATCH_ELEMENTS = 4_000_000
+
+STATISTICS = ('mean_diff', 'median_diff')
+
+
+def _statistic(x, y, statistic):
+    # Estadístico de cada fila de los lotes x e y (ganadoras - no ganadoras)
+    if statistic == 'mean_diff':
+        return x.mean(axis=-1) - y.mean(axis=-1)
+    return np.median(x, axis=-1) - np.median(y, axis=-1)
+
+
+def _batches(resamples, rows):
+    tamano = max(1, BATCH_ELEMENTS // max(rows, 1))
+    for inicio in range(0, resamples, tamano):
+        yield min(tamano, resamples - inicio)
+
+
+def _subset_sums(values, k, lote, rng):
+    # Suma de k valores elegidos sin reemplazo en cada remuestreo: se sortean k índices, se
+    # ordenan y se vuelven a sortear los repetidos hasta que no quede ninguno. Cuesta del orden
+    # de k por remuestreo en lugar de barajar las N filas
+    n = len(values)
+    dtype = np.uint16 if n <= np.iinfo(np.uint16).max else np.int32
+    indices = rng.integers(0, n, (lote, k), dtype=dtype)
+    indices.sort(axis=1)
+    while True:
+        repetidos = np.zeros(indices.shape, dtype=bool)
+        repetidos[:, 1:] = indices[:, 1:] == indices[:, :-1]
+        filas = np.flatnonzero(repetidos.any(axis=1))
+        if len(filas) == 0:
+            break
+        sub = indices[filas]
+        sub[repetidos[filas]] = rng.integers(0, n, int(repetidos[filas].sum()), dtype=dtype)
+        sub.sort(axis=1)
+        indices[filas] = sub
+    return values[indices].sum(axis=1)
+
+
+def _permutation_chunk(values, n_x, resamples, seed, statistic):
+    rng = np.random.default_rng(seed)
+    resultados = []
+    if statistic == 'mean_diff':
+        # La diferencia de medias solo depende de la suma de un grupo: se sortea el más pequeño
+        n, total = len(values), values.sum()
+        k = min(n_x, n - n_x)
+        for lote in _batches(resamples, k):
+            suma = _subset_sums(values, k, lote, rng)
+            suma_x = suma if k == n_x else total - suma
+            resultados.append(suma_x / n_x - (total - suma_x) / (n - n_x))
+        return np.concatenate(resultados)
+    for lote in _batches(resamples, len(values)):
+        # Cada fila es una permutación de las etiquetas ganadora / no ganadora
+        mezcla = rng.permuted(np.tile(values, (lote, 1)), axis=1)
+        resultados.append(_statistic(mezcla[:, :n_x], mezcla[:, n_x:], statistic))
+    return np.concatenate(resultados)
+
+
+def _bootstrap_chunk(x, y, resamples, seed, statistic):
+    rng = np.random.default_rng(seed)
+    dtype = np.uint16 if max(len(x), len(y)) <= np.iinfo(np.uint16).max else np.int32
+    resultados = []
+    for lote in _batches(resamples, len(x) + len(y)):
+        muestra_x = x[rng.integers(0, len(x), (lote, len(x)), dtype=dtype)]
+        muestra_y = y[rng.integers(0, len(y), (lote, len(y)), dtype=dtype)]
+        resultados.append(_statistic(muestra_x, muestra_y, statistic))
+    return np.concatenate(resultados)
+
+
+def _run_chunks(func, args, statistic, resamples, seed, workers, executor=None):
+    # Reparte los remuestreos en tareas con semillas independientes derivadas de `seed`
+    tareas = [CHUNK_RESAMPLES] * (resamples // CHUNK_RESAMPLES)
+    if resamples % CHUNK_RESAMPLES:
+        tareas.append(resamples % CHUNK_RESAMPLES)
+    semillas = np.random.SeedSequence(seed).spawn(len(tareas))
+    if executor is not None:
+        futures = [executor.submit(func, *args, n, s, statistic) for n, s in zip(tareas, semillas)]
+        return np.concatenate([future.result() for future in futures])
+    workers = min(workers or os.cpu_count() or 1, len(tareas))
+    if workers <= 1:
+        return np.concatenate([func(*args, n, s, statistic) for n, s in zip(tareas, semillas)])
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return _run_chunks(func, args, statistic, resamples, seed, workers, pool)
+
+
+def _as_values(values):
+    # Solo valores finitos: un ROI infinito (presupuesto 0 en datos antiguos) no es comparable
+    valores = pd.Series(values).astype('Float64').dropna().to_numpy(dtype=np.float64)
+    return valores[np.isfinite(valores)]
+
+
+def permutation_test(x, y, statistic='mean_diff', resamples=10_000, seed=None, workers=None, executor=None):
+    """
+    Two-sided permutation test of the difference between two groups (winners `x` and
+    non-winners `y`): the labels are shuffled `resamples` times, in NumPy batches spread over a
+    process pool.
+
+    Args:
+        x (array-like): Values of the first group. Missing and infinite values are ignored.
+        y (array-like): Values of the second group.
+        statistic (str): 'mean_diff' or 'median_diff'.
+        resamples (int): Number of permutations.
+        seed (int): Seed for a reproducible result (the same with any number of workers).
+        workers (int): Processes of the pool. Defaults to the number of CPU cores; 1 runs in this process.
+        executor (ProcessPoolExecutor): Pool to use instead of creating one.
+
+    Returns:
+        dict: 'statistic' (observed), 'p_value' and 'resamples'.
+    """
+    if statistic not in STATISTICS:
+        raise ValueError(f"Unknown statistic: {statistic} (use one of {STATISTICS})")
+    x, y = _as_values(x), _as_values(y)
+    if len(x) == 0 or len(y) == 0:
+        return {'statistic': np.nan, 'p_value': np.nan, 'resamples': 0}
+    observado = float(_statistic(x, y, statistic))
+    valores = np.concatenate([x, y])
+    permutados = _run_chunks(_permutation_chunk, (valores, len(x)), statistic, resamples, seed, workers, executor)
+    # Corrección +1: el valor observado cuenta como una de las permutaciones
+    extremos = np.count_nonzero(np.abs(permutados) >= abs(observado) - 1e-12)
+    return {'statistic': observado, 'p_value': float((extremos + 1) / (resamples + 1)), 'resamples': resamples}
+
+
+def bootstrap_ci(x, y, statistic='mean_diff', resamples=10_000, confidence=0.95, seed=None, workers=None,
+                 executor=None):
+    """
+    Percentile bootstrap confidence interval of the difference between two groups, resampling
+    each group with replacement.
+
+    Args:
+        x (array-like): Values of the first group. Missing and infinite values are ignored.
+        y (array-like): Values of the second group.
+        statistic (str): 'mean_diff' or 'median_diff'.
+        resamples (int): Number of bootstrap resamples.
+        confidence (float): Confidence level of the interval.
+        seed (int): Seed for a reproducible result (the same with any number of workers).
+        workers (int): Processes of the pool. Defaults to the number of CPU cores; 1 runs in this process.
+        executor (ProcessPoolExecutor): Pool to use instead of creating one.
+
+    Returns:
+        dict: 'statistic' (observed), 'ci_low' and 'ci_high'.
+    """
+    if statistic not in STATISTICS:
+        raise ValueError(f"Unknown statistic: {statistic} (use one of {STATISTICS})")
+    x, y = _as_values(x), _as_values(y)
+    if len(x) == 0 or len(y) == 0:
+        return {'statistic': np.nan, 'ci_low': np.nan, 'ci_high': np.nan}
+    remuestreos = _run_chunks(_bootstrap_chunk, (x, y), statistic, resamples, seed, workers, executor)
+    alfa = (1 - confidence) / 2
+    bajo, alto = np.quantile(remuestreos, [alfa, 1 - alfa])
+    return {'statistic': float(_statistic(x, y, statistic)), 'ci_low': float(bajo), 'ci_high': float(alto)}
+
+
+def effect_sizes(x, y):
+    """
+    Effect sizes of the difference between two groups.
+
+    Args:
+        x (array-like): Values of the first group. Missing and infinite values are ignored.
+        y (array-like): Values of the second group.
+
+    Returns:
+        dict: 'cohens_d' (difference of means over the pooled standard deviation), 'hedges_g'
+            (Cohen's d corrected for small samples) and 'cliffs_delta' (probability that a value of
+            `x` is greater than one of `y` minus the opposite, from -1 to 1).
+    """
+    x, y = _as_values(x), _as_values(y)
+    n_x, n_y = len(x), len(y)
+    if n_x < 2 or n_y < 2:
+        return {'cohens_d': np.nan, 'hedges_g': np.nan, 'cliffs_delta': np.nan}
+    combinada = np.sqrt(((n_x - 1) * x.var(ddof=1) + (n_y - 1) * y.var(ddof=1)) / (n_x + n_y - 2))
+    d = (x.mean() - y.mean()) / combinada if combinada > 0 else np.nan
+    g = d * (1 - 3 / (4 * (n_x + n_y) - 9))
+    # Delta de Cliff a partir de los rangos (U de Mann-Whitney), sin comparar todos los pares
+    rangos = pd.Series(np.concatenate([x, y])).rank().to_numpy()
+    u = rangos[:n_x].sum() - n_x * (n_x + 1) / 2
+    return {'cohens_d': float(d), 'hedges_g': float(g), 'cliffs_delta': float(2 * u / (n_x * n_y) - 1)}
+
+
+def compare_winners(df, metrics=('imdbRating', 'metascore', 'ROI'), by=None, year_window=None,
+                    statistic='mean_diff', resamples=10_000, confidence=0.95, seed=None, workers=None):
+    """
+    Tests whether winners and non-winners differ in each metric, for the whole dataset or for
+    every subgroup: permutation test, bootstrap confidence interval and effect sizes.
+
+    Args:
+        df (pd.DataFrame): Final dataset with the column 'winner' ('yes'/'no' or boolean).
+        metrics (iterable): Columns to compare.
+        by (str): Optional column that defines the subgroups (e.g. 'category').
+        year_window (int): If given, the rows are also grouped in windows of this many years
+            (e.g. 10 -> '2000-2009').
+        statistic (str): 'mean_diff' or 'median_diff'.
+        resamples (int): Permutations and bootstrap resamples per test.
+        confidence (float): Confidence level of the intervals.
+        seed (int): Seed for reproducible results. Every test uses the same seed.
+        workers (int): Processes of the pool shared by all the tests. Defaults to the number of CPU cores.
+
+    Returns:
+        pd.DataFrame: One row per subgroup and metric with the sizes and means of both groups,
+            the observed statistic, 'p_value', 'ci_low', 'ci_high' and the effect sizes.
+    """
+    winner = df['winner']
+    ganadora = winner.fillna(False).astype(bool) if pd.api.types.is_bool_dtype(winner) else \
+        winner.astype('string').str.lower().eq('yes').fillna(False)
+    claves = []
+    if by is not None:
+        claves.append(df[by].astype('string'))
+    if year_window:
+        inicio = df['year'].astype(int) // year_window * year_window
+        claves.append((inicio.astype(str) + '-' + (inicio + year_window - 1).astype(str)).rename('years'))
+    grupos = df.groupby(claves, observed=True).groups.items() if claves else [('all', df.index)]
+
+    workers = workers or os.cpu_count() or 1
+    filas = []
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for grupo, indice in grupos:
+            for metric in metrics:
+                x = df.loc[indice, metric][ganadora.loc[indice]]
+                y = df.loc[indice, metric][~ganadora.loc[indice]]
+                prueba = permutation_test(x, y, statistic, resamples, seed, 1, pool)
+                intervalo = bootstrap_ci(x, y, statistic, resamples, confidence, seed, 1, pool)
+                fila = {'group': grupo, 'metric': metric,
+                        'n_winners': len(_as_values(x)), 'n_non_winners': len(_as_values(y)),
+                        'mean_winners': _as_values(x).mean() if len(_as_values(x)) else np.nan,
+                        'mean_non_winners': _as_values(y).mean() if len(_as_values(y)) else np.nan,
+                        statistic: prueba['statistic'], 'p_value': prueba['p_value'],
+                        'ci_low': intervalo['ci_low'], 'ci_high': intervalo['ci_high']}
+                fila.update(effect_sizes(x, y))
+                filas.append(fila)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return pd.DataFrame(filas)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Winner vs non-winner significance tests on the final dataset.')
+    parser.add_argument('path', nargs='?', default=os.path.join('csv', 'final_dataset.csv'), help='CSV of the final dataset')
+    parser.add_argument('--by', help='column of the subgroups (e.g. category)')
+    parser.add_argument('--year-window', type=int, help='also group by windows of this many years')
+    parser.add_argument('--resamples', type=int, default=100_000, help='permutations and bootstrap resamples per test')
+    parser.add_argument('--seed', type=int, help='seed for reproducible results')
+    parser.add_argument('--workers', type=int, help='processes of the pool')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    resultado = compare_winners(pd.read_csv(args.path), by=args.by, year_window=args.year_window,
+                                resamples=args.resamples, seed=args.seed, workers=args.workers)
+    print(resultado.round(4).to_string(index=False))
+    print(f"⏱️ {len(resultado)} tests x {args.resamples} resamples in {time.perf_counter() - inicio:.2f}s")
@@ -0,0 +1,256 @@
+import json
+import os
+import threading
+import time
+import unicodedata
+from contextlib import nullcontext
+
+import pandas as pd
+import requests
+
+from checkpoint import fetch_with_checkpoint
+from extractors import extract_budget
+from fetch_engine import DEFAULT_MAX_IN_FLIGHT, DEFAULT_RATE, get_limiter, host_of
+from http_cache import cached_get
+from instrumentation import METRICS, instrumented_stage
+from web_scraping_functions import THE_NUMBERS_URL, film_url_fixed
+
+SLUG_INDEX_PATH = os.path.join('cache', 'the_numbers_slugs.jsonl')
+
+# Días que se recuerda un slug que no existe antes de volver a probarlo
+DAY = 24 * 60 * 60
+MISS_TTL = 90 * DAY
+
+
+def fold_accents(text):
+    """
+    Removes the accents of a text (e.g. "Amélie" -> "Amelie").
+    """
+    return ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+
+
+def slug_candidates(title, year=None, alt_titles=()):
+    """
+    Builds the The Numbers slugs worth trying for a film, most likely first and without duplicates.
+
+    For the title and every alternate title it tries the `film_url_fixed` slug, its accent-folded
+    version and the title-cased version (the Kaggle titles are lowercase), and then the same
+    slugs with the year suffix The Numbers uses for remakes and repeated titles ("Little-Women-(2019)").
+
+    Args:
+        title (str): Title of the film.
+        year (int): Year of the film. The year before and after are tried too.
+        alt_titles (iterable): Other titles of the film (e.g. the OMDb title).
+
+    Returns:
+        list: The candidate slugs.
+    """
+    titulos = [t for t in [title, *alt_titles] if isinstance(t, str) and t.strip()]
+    bases = []
+    for titulo in titulos:
+        for variante in [titulo, fold_accents(titulo), titulo.title(), fold_accents(titulo).title()]:
+            slug = film_url_fixed(variante)
+            if slug not in bases:
+                bases.append(slug)
+
+    candidatos = list(bases)
+    if year is not None and not pd.isna(year):
+        year = int(year)
+        for y in [year, year + 1, year - 1]:
+            candidatos.extend(f'{slug}-({y})' for slug in bases)
+    return candidatos
+
+
+class SlugIndex:
+    """
+    Persistent index of the The Numbers slug that works for each film.
+
+    Every check is appended as one JSONL line `{"filmid", "slug", "ok", "checked_at"}`. The
+    slug of the last successful check of a film is reused on the next runs, and the slugs
+    confirmed as misses (the page does not exist or has no budget) are skipped until they are
+    older than `miss_ttl`, so a wrong guess costs one request instead of one per run.
+
+    Args:
+        path (str): Path of the JSONL file. It is created if it does not exist.
+        miss_ttl (float): Seconds a confirmed miss is remembered.
+    """
+
+    def __init__(self, path=SLUG_INDEX_PATH, miss_ttl=MISS_TTL):
+        self.path = path
+        self.miss_ttl = miss_ttl
+        self.lock = threading.Lock()
+        self.slugs = {}
+        self.misses = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._apply(entry)
+        elif os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def _apply(self, entry):
+        filmid, slug = entry['filmid'], entry['slug']
+        if entry['ok']:
+            self.slugs[filmid] = slug
+            self.misses.get(filmid, {}).pop(slug, None)
+        else:
+            self.misses.setdefault(filmid, {})[slug] = entry['checked_at']
+            if self.slugs.get(filmid) == slug:
+                del self.slugs[filmid]
+
+    def get(self, filmid):
+        """
+        Returns the slug that worked for a film, or None if it was never resolved.
+        """
+        return self.slugs.get(filmid)
+
+    def is_miss(self, filmid, slug, now=None):
+        """
+        Returns True if `slug` is a confirmed miss of the film that has not expired yet.
+        """
+        checked_at = self.misses.get(filmid, {}).get(slug)
+        return checked_at is not None and (now or time.time()) - checked_at < self.miss_ttl
+
+    def record(self, filmid, slug, ok):
+        """
+        Saves the result of checking a slug. Safe to call from several threads.
+        """
+        entry = {'filmid': filmid, 'slug': slug, 'ok': ok, 'checked_at': time.time()}
+        with self.lock:
+            self._apply(entry)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def compact(self):
+        """
+        Rewrites the file keeping only the resolved slugs and the misses that have not expired.
+        """
+        now = time.time()
+        with self.lock:
+            entradas = [{'filmid': f, 'slug': s, 'ok': True, 'checked_at': now} for f, s in self.slugs.items()]
+            entradas += [
+                {'filmid': f, 'slug': s, 'ok': False, 'checked_at': t}
+                for f, slugs in self.misses.items() for s, t in slugs.items() if now - t < self.miss_ttl
+            ]
+            with open(self.path, 'w', encoding='utf-8') as f:
+                for entry in entradas:
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+def _check_slug(slug, limiter=None):
+    # Devuelve (presupuesto, es_fallo_confirmado); los errores de red no confirman nada
+    url = THE_NUMBERS_URL.format(film_url=slug)
+    try:
+        # Cada candidato ocupa su propio hueco del limitador: una película con muchos slugs no lo acapara
+        with limiter or nullcontext():
+            response = cached_get(url, timeout=30)
+    except requests.exceptions.RequestException as e:
+        METRICS.error(host_of(url), f"{slug}: {e}")
+        return None, False
+    if response.status_code == 200:
+        try:
+            presupuesto = extract_budget(response.text)
+        except ValueError as e:
+            # Presupuesto ilegible ("TBA"): no confirma que el slug sea un fallo, se prueba el siguiente
+            METRICS.error(host_of(url), f"{slug}: malformed budget - {e}")
+            return None, False
+        return presupuesto, presupuesto is None
+    if response.status_code in (404, 410):
+        return None, True
+    METRICS.error(host_of(url), f"{slug}: status code {response.status_code}")
+    return None, False
+
+
+def resolve_budget(filmid, title, year=None, alt_titles=(), index=None, limiter=None):
+    """
+    Fetches the budget of a film from The Numbers trying the candidate slugs, starting with the
+    slug stored in the index and skipping the confirmed misses.
+
+    Args:
+        filmid (str): IMDb ID of the film.
+        title (str): Title of the film.
+        year (int): Year of the film.
+        alt_titles (iterable): Other titles of the film (e.g. the OMDb title).
+        index (SlugIndex): Index of resolved slugs. Without it every candidate is tried.
+        limiter (HostGovernor): Governor of The Numbers (see `fetch_engine.get_limiter`), taken
+            for each slug tried. Without it the requests are not limited.
+
+    Returns:
+        int: The production budget of the film in dollars, or None if no candidate has it.
+    """
+    host = host_of(THE_NUMBERS_URL)
+    conocido = index.get(filmid) if index is not None else None
+    candidatos = slug_candidates(title, year, alt_titles)
+    if conocido is not None:
+        candidatos = [conocido] + [slug for slug in candidatos if slug != conocido]
+
+    for slug in candidatos:
+        if index is not None and slug != conocido and index.is_miss(filmid, slug):
+            METRICS.increment('slug_misses_skipped', host)
+            continue
+        presupuesto, fallo = _check_slug(slug, limiter)
+        if presupuesto is not None:
+            if index is not None and slug != conocido:
+                index.record(filmid, slug, True)
+            return presupuesto
+        if fallo and index is not None:
+            index.record(filmid, slug, False)
+
+    METRICS.increment('budget_not_found', host)
+    return None
+
+
+def omdb_alt_titles(df_imdb):
+    """
+    Returns the OMDb titles by IMDb ID, to use as alternate titles.
+
+    Args:
+        df_imdb (pd.DataFrame): OMDb data with the columns 'filmid' and 'title' (e.g. df_imdb.csv).
+
+    Returns:
+        dict: Lists of alternate titles by IMDb ID.
+    """
+    titulos = df_imdb.dropna(subset=['title']).drop_duplicates('filmid').set_index('filmid')['title']
+    return {filmid: [titulo] for filmid, titulo in titulos.items()}
+
+
+@instrumented_stage()
+def films_budget_resolved_df(df, index=None, alt_titles=None, max_in_flight=DEFAULT_MAX_IN_FLIGHT, rate=DEFAULT_RATE,
+                             checkpoint=None):
+    """
+    Same output as `films_budget_df`, but resolving the The Numbers slug of each film with
+    `resolve_budget` and a persistent `SlugIndex`. It is opt-in: the notebooks and the pipeline
+    keep using `films_budget_df`, and this can be called instead of it to build movie_budgets.csv.
+
+    Args:
+        df (pd.DataFrame): DataFrame with the columns 'filmid' and 'title', and optionally 'year'.
+        index (str | SlugIndex): Slug index or path of its file. Defaults to `SLUG_INDEX_PATH`.
+        alt_titles (dict): Lists of alternate titles by IMDb ID (see `omdb_alt_titles`).
+        max_in_flight (int): Maximum number of simultaneous requests to The Numbers.
+        rate (float): Maximum number of requests per second to The Numbers.
+        checkpoint (str | Checkpoint): Optional JSONL checkpoint, as in `films_budget_df`.
+
+    Returns:
+        pd.DataFrame: The columns 'IMDb ID', 'title' and 'budget'.
+    """
+    if not isinstance(index, SlugIndex):
+        index = SlugIndex(index or SLUG_INDEX_PATH)
+    alt_titles = alt_titles or {}
+    peliculas = df.drop_duplicates('filmid').set_index('filmid')
+    years = peliculas['year'] if 'year' in peliculas.columns else pd.Series(None, index=peliculas.index)
+    host = host_of(THE_NUMBERS_URL)
+    limiter = get_limiter(host, max_in_flight, rate)
+
+    # El limitador se toma por cada slug probado, no por película
+    presupuestos = fetch_with_checkpoint(
+        peliculas.index,
+        lambda imdb_id: resolve_budget(
+            imdb_id, peliculas.at[imdb_id, 'title'], years[imdb_id], alt_titles.get(imdb_id, ()), index, limiter
+        ),
+        host, checkpoint, max_in_flight=max_in_flight, rate=rate, label='🎬 Budget', acquire_per_item=False
+    )
+    return pd.DataFrame({'IMDb ID': peliculas.index, 'title': peliculas['title'].values, 'budget': presupuestos})
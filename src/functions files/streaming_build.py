@@ -0,0 +1,357 @@
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+
+import numpy as np
+import pandas as pd
+
+from api_function import FILM_COLUMNS, iter_films_imdb, reset_omdb_quota
+from artifact_store import ARTIFACTS_DIR, DEFAULT_FORMAT, ArtifactWriter, write_artifact
+from bridge_tables import BRIDGE_COLUMNS, bridge_name, build_bridges
+from compact_dataset import encode_filmid
+from data_function import (MANUAL_BUDGETS_PATH, clean_budget, create_boxoffice_dataset_from_summary, create_financial_data,
+                           create_final_dataset, load_manual_budgets)
+from extractors import BOXOFFICE_COLUMNS
+from fetch_engine import DEFAULT_MAX_IN_FLIGHT, DEFAULT_RATE
+from instrumentation import PeakMemory, ProgressReporter
+from kaggle_loader import CHUNK_ROWS, FILM_CATEGORIES, load_kaggle
+from web_scraping_functions import iter_boxoffice_summaries, iter_budgets
+
+# Películas que se descargan, normalizan, unen y escriben de cada vez
+DEFAULT_BATCH_SIZE = 1000
+
+# Artefactos que puede escribir la construcción por lotes y los que escribe por defecto
+STREAMED_DATASETS = [
+    'imdb_data', 'boxoffice_data', 'movie_budgets_clean', 'financial_data', 'final_dataset',
+    *[bridge_name(column) for column in BRIDGE_COLUMNS],
+]
+DEFAULT_OUTPUTS = ['final_dataset', *[bridge_name(column) for column in BRIDGE_COLUMNS]]
+
+SUMMARY_COLUMNS = ['IMDb ID', 'title', *BOXOFFICE_COLUMNS.values()]
+BUDGET_COLUMNS = ['IMDb ID', 'title', 'budget']
+
+
+def default_collectors(max_in_flight=DEFAULT_MAX_IN_FLIGHT, rate=DEFAULT_RATE, checkpoint_dir=None):
+    """
+    Returns the generator collectors of the streaming build, by name:
+        - 'imdb': IMDb IDs -> OMDb records (`iter_films_imdb`).
+        - 'boxoffice': (IMDb ID, Kaggle title) pairs -> Box Office Mojo records (`iter_boxoffice_summaries`).
+        - 'budget': (IMDb ID, OMDb title) pairs -> The Numbers records (`iter_budgets`).
+
+    Args:
+        max_in_flight (int): Maximum number of simultaneous requests per host.
+        rate (float): Maximum number of requests per second per host.
+        checkpoint_dir (str): Optional folder with one JSONL checkpoint per collector, to resume a run.
+
+    The OMDb quota reached by an earlier run is forgotten here, once per build, and not on every
+    batch: once it is reached the 'imdb' collector raises `OMDbQuotaExceeded` and the build stops.
+    """
+    def checkpoint(name):
+        return os.path.join(checkpoint_dir, f'{name}.jsonl') if checkpoint_dir else None
+
+    reset_omdb_quota(max_in_flight)
+    return {
+        'imdb': lambda ids: iter_films_imdb(ids, max_in_flight, rate, checkpoint('omdb'), reset_quota=False),
+        'boxoffice': lambda films: iter_boxoffice_summaries(films, max_in_flight, rate, checkpoint('boxoffice')),
+        'budget': lambda films: iter_budgets(films, max_in_flight, rate, checkpoint('budget')),
+    }
+
+
+def film_positions(nominations, chunk_rows=CHUNK_ROWS):
+    """
+    Sorts the nominations by film without copying them: returns the row positions in the order
+    of the integer key of each film (see `encode_filmid`) and the first of those positions of
+    every film. The keys are computed `chunk_rows` at a time, so besides the positions only
+    about 20 bytes per nomination are used.
+
+    Args:
+        nominations (pd.DataFrame): Nominations with the column 'filmid'.
+        chunk_rows (int): Rows whose key is computed at a time.
+
+    Returns:
+        tuple: (row positions sorted by film, indices of the first position of every film).
+
+    Raises:
+        ValueError: If a 'filmid' is not a valid IMDb ID.
+    """
+    validas = np.flatnonzero(nominations['filmid'].notna().to_numpy()).astype(np.int32)
+    claves = np.empty(len(validas), dtype=np.int32)
+    for desde in range(0, len(validas), chunk_rows):
+        filas = validas[desde:desde + chunk_rows]
+        claves[desde:desde + chunk_rows] = encode_filmid(nominations['filmid'].iloc[filas]).to_numpy()
+    orden = np.argsort(claves, kind='stable')
+    claves, posiciones = claves[orden], validas[orden]
+    # Primera fila de cada película
+    return posiciones, np.flatnonzero(np.r_[True, claves[1:] != claves[:-1]])
+
+
+def iter_film_batches(nominations, batch_size=DEFAULT_BATCH_SIZE, positions=None):
+    """
+    Splits the nominations into batches of at most `batch_size` films, all the nominations of a
+    film in the same batch, in the order of `film_positions`.
+
+    Args:
+        nominations (pd.DataFrame): Nominations with the columns 'filmid', 'film', 'year', 'winner'
+            and 'category' (e.g. the output of `load_kaggle`).
+        batch_size (int): Maximum number of films per batch.
+        positions (tuple): Output of `film_positions`, if already computed.
+
+    Yields:
+        tuple: (nominations of the batch, list of (IMDb ID, Kaggle title) pairs of its films).
+    """
+    posiciones, inicios = positions if positions is not None else film_positions(nominations)
+    limites = np.r_[inicios[::batch_size], len(posiciones)]
+    for desde, hasta in zip(limites[:-1], limites[1:]):
+        lote = nominations.iloc[posiciones[desde:hasta]]
+        primeras = lote.drop_duplicates('filmid')
+        yield lote, list(zip(primeras['filmid'], primeras['film']))
+
+
+def build_batch(nominations, films, collectors, presupuestos=None):
+    """
+    Builds every dataset of one batch of films: fetches their records with the collectors (box
+    office in parallel with OMDb, then the budgets with the OMDb titles) and runs the
+    `data_function.py` steps over them.
+
+    Args:
+        nominations (pd.DataFrame): Nominations of the films of the batch.
+        films (list): (IMDb ID, Kaggle title) pairs of the batch.
+        collectors (dict): Generator collectors, as returned by `default_collectors`.
+        presupuestos (dict): Manual budgets by title passed to `clean_budget`.
+
+    Returns:
+        dict: The DataFrame of every dataset of `STREAMED_DATASETS` for the batch, by name.
+    """
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        # Box Office Mojo y OMDb son hosts distintos: se consultan a la vez
+        summaries = executor.submit(lambda: pd.DataFrame(collectors['boxoffice'](films), columns=SUMMARY_COLUMNS))
+        df_imdb = pd.DataFrame(collectors['imdb'](imdb_id for imdb_id, _ in films), columns=FILM_COLUMNS)
+        # El presupuesto se busca con el título de OMDb, como en `films_budget_df`
+        df_budget = pd.DataFrame(collectors['budget'](zip(df_imdb['filmid'], df_imdb['title'])), columns=BUDGET_COLUMNS)
+        df_summary = summaries.result()
+
+    datasets = {'imdb_data': df_imdb}
+    datasets['boxoffice_data'] = create_boxoffice_dataset_from_summary(df_summary)
+    datasets['movie_budgets_clean'] = clean_budget(df_budget, presupuestos or {}, ruta_salida=None, guardar=False)
+    datasets['financial_data'] = create_financial_data(
+        datasets['movie_budgets_clean'], datasets['boxoffice_data'], ruta_salida=None, guardar=False
+    )
+    datasets['final_dataset'] = create_final_dataset(
+        df_imdb, datasets['financial_data'], nominations, ruta_salida=None, guardar=False
+    )
+    datasets.update(build_bridges(df_imdb))
+    return datasets
+
+
+def build_streaming(nominations, collectors=None, batch_size=DEFAULT_BATCH_SIZE, presupuestos=None,
+                    guardar=DEFAULT_OUTPUTS, directory=ARTIFACTS_DIR, csv_dir=None, fmt=DEFAULT_FORMAT):
+    """
+    Builds the final dataset (and the other artifacts requested) in batches of films: the
+    collectors yield their records as generators, every batch goes through the normalization and
+    the joins on its own, and its rows are appended to the artifacts before the next batch starts.
+    The memory used depends on `batch_size`, not on the number of films.
+
+    The rows come out in 'filmid' order instead of the order of the nominations.
+
+    Args:
+        nominations (pd.DataFrame): Nominations with the columns 'filmid', 'film', 'year', 'winner'
+            and 'category' (e.g. `load_kaggle(1927, None, None)` for every category and year).
+        collectors (dict): Generator collectors. Defaults to `default_collectors()`.
+        batch_size (int): Films per batch.
+        presupuestos (dict): Manual budgets by title passed to `clean_budget`.
+        guardar (iterable): Artifacts to write, by name (see `STREAMED_DATASETS`).
+        directory (str): Folder of the artifacts.
+        csv_dir (str): If given, a CSV export of every artifact is written in this folder too.
+        fmt (str): 'parquet' or 'csv'.
+
+    Returns:
+        dict: Rows written per artifact.
+
+    Raises:
+        ValueError: If an artifact is not in `STREAMED_DATASETS`.
+        OMDbQuotaExceeded: If the OMDb daily quota is reached. The artifacts are left as they were,
+            so a final dataset with films missing is never written; the records already fetched
+            stay in the checkpoints and the next run resumes from them.
+    """
+    guardar = list(guardar)
+    desconocidos = set(guardar) - set(STREAMED_DATASETS)
+    if desconocidos:
+        raise ValueError(f"Unknown datasets: {sorted(desconocidos)}")
+    collectors = collectors or default_collectors()
+
+    positions = film_positions(nominations)
+    progress = ProgressReporter('🧱 Streaming build', len(positions[1]))
+    with ExitStack() as stack:
+        writers = {
+            name: stack.enter_context(ArtifactWriter(
+                name, directory, fmt, csv_path=os.path.join(csv_dir, f'{name}.csv') if csv_dir else None
+            ))
+            for name in guardar
+        }
+        for lote, films in iter_film_batches(nominations, batch_size, positions):
+            datasets = build_batch(lote, films, collectors, presupuestos)
+            for name, writer in writers.items():
+                writer.write(datasets[name])
+            progress.update(len(films))
+
+    for name, writer in writers.items():
+        print(f"✅ {name}: {writer.rows} rows written to {writer.path}")
+    return {name: writer.rows for name, writer in writers.items()}
+
+
+def build_in_memory(nominations, collectors=None, presupuestos=None, guardar=DEFAULT_OUTPUTS, directory=ARTIFACTS_DIR,
+                    fmt=DEFAULT_FORMAT):
+    """
+    Same build as `build_streaming` the way the notebooks run it: every collector returns all its
+    records at once and each step works on the whole DataFrames. Used as the baseline of the
+    memory benchmark.
+    """
+    collectors = collectors or default_collectors()
+    films = list(nominations.drop_duplicates('filmid')[['filmid', 'film']].itertuples(index=False, name=None))
+    datasets = build_batch(nominations, films, collectors, presupuestos)
+    for name in guardar:
+        write_artifact(datasets[name], name, directory, fmt)
+    return {name: len(datasets[name]) for name in guardar}
+
+
+# --- Benchmark de memoria ---
+
+def synthetic_nominations(n_films, nominations_per_film=1.5, seed=0):
+    """
+    Builds `n_films` synthetic films with about `nominations_per_film` nominations each, in the
+    format of `load_kaggle`.
+    """
+    rng = np.random.default_rng(seed)
+    # Cada película al menos una vez, y el resto de nominaciones repartidas al azar
+    pelicula = np.r_[np.arange(n_films), rng.integers(0, n_films, max(0, int(n_films * (nominations_per_film - 1))))]
+    categorias = np.array(FILM_CATEGORIES)
+    return pd.DataFrame({
+        'year': rng.integers(2000, 2025, len(pelicula)).astype('int16'),
+        'category': pd.Categorical(categorias[rng.integers(0, len(categorias), len(pelicula))]),
+        'film': pd.array([f'benchmark film {i}' for i in pelicula], dtype='string'),
+        'filmid': pd.array([f'tt{9000000 + i:07d}' for i in pelicula], dtype='string'),
+        'winner': pd.Categorical.from_codes((rng.random(len(pelicula)) < 0.2).astype(int), ['no', 'yes']),
+    })
+
+
+def synthetic_collectors():
+    """
+    Returns generator collectors that make up the records of every ID (with the texts of the real
+    sources: "$1,234,567", "123 min", "Drama, Thriller"...) without any request, to measure the
+    build itself.
+    """
+    generos = ['Drama', 'Comedy', 'Thriller', 'Animation', 'Biography', 'History', 'Romance']
+
+    def imdb(ids):
+        for imdb_id in ids:
+            n = int(imdb_id[2:])
+            yield {
+                'filmid': imdb_id, 'title': f'Benchmark Film {n}', 'runtime': f'{80 + n % 100} min',
+                'genre': ', '.join(generos[(n + k) % len(generos)] for k in range(1 + n % 3)),
+                'director': f'Director {n % 5000}', 'actors': f'Actor {n % 997}, Actor {n % 991}, Actor {n % 983}',
+                'language': 'English, Spanish', 'country': 'United States, France',
+                'imdbRating': 5 + (n % 45) / 10, 'metascore': str(40 + n % 60), 'imdbVotes': f'{1000 + n * 7919 % 900000:,}',
+            }
+
+    def boxoffice(films):
+        for imdb_id, titulo in films:
+            n = int(imdb_id[2:])
+            domestico, internacional = n * 7919 % 300_000_000, n * 104729 % 500_000_000
+            yield {
+                'IMDb ID': imdb_id, 'title': titulo, 'domestic boxoffice': f'${domestico:,}',
+                'international boxoffice': f'${internacional:,}', 'Worlwide boxoffice': f'${domestico + internacional:,}',
+            }
+
+    def budget(films):
+        for imdb_id, titulo in films:
+            n = int(imdb_id[2:])
+            yield {'IMDb ID': imdb_id, 'title': titulo, 'budget': f'${1_000_000 + n * 15485863 % 200_000_000:,}'}
+
+    return {'imdb': imdb, 'boxoffice': boxoffice, 'budget': budget}
+
+
+def _benchmark_run(mode, n_films, batch_size, source):
+    # Se ejecuta en un proceso nuevo para que el pico de memoria de una medida no afecte a la siguiente
+    nominations = synthetic_nominations(n_films)
+    with tempfile.TemporaryDirectory() as directory, ExitStack() as stack:
+        if source == 'fixtures':
+            from benchmark_server import FixtureServer, redirect_sources
+            server = stack.enter_context(FixtureServer())
+            stack.enter_context(redirect_sources(server.base_url))
+            collectors = default_collectors(max_in_flight=16, rate=1000.0)
+        else:
+            collectors = synthetic_collectors()
+        inicio = time.perf_counter()
+        with PeakMemory() as memoria:
+            if mode == 'streaming':
+                filas = build_streaming(nominations, collectors, batch_size, directory=directory)
+            else:
+                filas = build_in_memory(nominations, collectors, directory=directory)
+    return {
+        'films': n_films, 'mode': mode, 'final rows': filas['final_dataset'],
+        'seconds': round(time.perf_counter() - inicio, 2),
+        'peak RSS MB': round(memoria.peak_mb, 1), 'build MB': round(memoria.delta_mb, 1),
+    }
+
+
+def benchmark_memory(sizes=(10_000, 40_000, 160_000), batch_size=DEFAULT_BATCH_SIZE, in_memory=True,
+                     source='synthetic'):
+    """
+    Measures the peak resident memory of the streaming build (and of the in-memory build) for a
+    growing number of films. Every measure runs in a new process.
+
+    Args:
+        sizes (iterable): Numbers of films.
+        batch_size (int): Films per batch of the streaming build.
+        in_memory (bool): Whether to measure the in-memory build too.
+        source (str): 'synthetic' (records made up in process, measures the build) or 'fixtures'
+            (the real collectors against the local server of `benchmark_server.py`, slower).
+
+    Returns:
+        pd.DataFrame: One row per measure with the films, the mode, the final rows, the seconds,
+            the peak RSS of the process and the memory used by the build above the starting RSS.
+    """
+    modos = ['streaming', 'in_memory'] if in_memory else ['streaming']
+    contexto = multiprocessing.get_context('spawn')
+    filas = []
+    for n_films in sizes:
+        for mode in modos:
+            with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+                filas.append(executor.submit(_benchmark_run, mode, n_films, batch_size, source).result())
+            print(f"📏 {mode} {n_films} films: {filas[-1]['peak RSS MB']} MB peak")
+    return pd.DataFrame(filas)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Streaming build of the final dataset in batches of films.')
+    parser.add_argument('--from', dest='year_min', type=int, default=2000, help='first year')
+    parser.add_argument('--to', dest='year_max', type=int, help='last year')
+    parser.add_argument('--all-categories', action='store_true', help='every category, not only the film ones')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='films per batch')
+    parser.add_argument('--csv-dir', help='folder for a CSV export of every artifact')
+    parser.add_argument('--budgets', default=MANUAL_BUDGETS_PATH,
+                        help='JSON file with manual budgets by title for clean_budget (default: %(default)s)')
+    parser.add_argument('--checkpoint-dir', help='folder of the JSONL checkpoints of the collectors')
+    parser.add_argument('--max-in-flight', type=int, default=DEFAULT_MAX_IN_FLIGHT, help='simultaneous requests per host')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help='requests per second per host')
+    parser.add_argument('--benchmark', action='store_true', help='measure the peak memory instead of building')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 40_000, 160_000], help='films per benchmark run')
+    parser.add_argument('--source', choices=['synthetic', 'fixtures'], default='synthetic',
+                        help='records of the benchmark')
+    parser.add_argument('--no-in-memory', action='store_true', help='benchmark only the streaming build')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        print(benchmark_memory(args.sizes, args.batch_size, not args.no_in_memory, args.source).to_string(index=False))
+    else:
+        inicio = time.perf_counter()
+        nominations = load_kaggle(args.year_min, args.year_max, None if args.all_categories else FILM_CATEGORIES)
+        build_streaming(
+            nominations, default_collectors(args.max_in_flight, args.rate, args.checkpoint_dir), args.batch_size,
+            presupuestos=load_manual_budgets(args.budgets) if args.budgets else {}, csv_dir=args.csv_dir
+        )
+        print(f"⏱️ Built in {time.perf_counter() - inicio:.1f}s")
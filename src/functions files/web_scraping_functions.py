@@ -1,46 +1,181 @@
-# Función para obtener recaudación internacional desde Box Office Mojo
-def film_world_boxoffice(imdb_id):
+import pandas as pd
+import requests
+
+from checkpoint import fetch_with_checkpoint, stream_with_checkpoint
+from extractors import BOXOFFICE_COLUMNS, extract_boxoffice_summary, extract_budget
+from fetch_engine import DEFAULT_MAX_IN_FLIGHT, DEFAULT_RATE, fetch_error, host_of
+from http_cache import cached_get
+from instrumentation import METRICS, instrumented_stage
+
+BOXOFFICEMOJO_URL = 'https://www.boxofficemojo.com/title/{imdb_id}/?ref_=bo_se_r_1'
+THE_NUMBERS_URL = 'https://www.the-numbers.com/movie/{film_url}#tab=summary'
+
+def parse_boxoffice_summary(html, backend=None):
     """
-    Fetches the worldwide box office revenue for a given IMDb ID from Box Office Mojo.
+    Parses a Box Office Mojo title page and extracts every field of its summary tables.
+
+    Args:
+        html (str): The HTML of the title page.
+        backend (str): Extractor backend ('bs4', 'fast' or 'lxml'). Defaults to `extractors.DEFAULT_BACKEND`.
+
+    Returns:
+        dict: A dictionary with the following keys:
+            - 'domestic boxoffice', 'international boxoffice', 'Worlwide boxoffice': The revenue
+              as a string (e.g., "$20,000,000"), or None if the figure is not on the page.
+            - Any other field of the summary values table (e.g., 'budget', 'release date',
+              'running time', 'genres'), keyed by its lowercase label.
+    """
+    return extract_boxoffice_summary(html, backend)
+
+
+def film_boxoffice_summary(imdb_id):
+    """
+    Fetches the Box Office Mojo title page for a given IMDb ID once and extracts the domestic,
+    international and worldwide revenue together with the rest of the summary fields.
 
     Args:
         imdb_id (str): The IMDb ID of the movie to fetch data for.
 
     Returns:
-        str: The worldwide box office revenue as a string (e.g., "$20,000,000").
-            Returns None if the revenue is not found or if an error occurs.
+        dict: The fields returned by `parse_boxoffice_summary`. If the page cannot be accessed,
+            the three revenue fields are None and the key 'fetch_error' holds the record built by
+            `fetch_engine.fetch_error` (URL, host, status, error).
     """
-    url = f'https://www.boxofficemojo.com/title/{imdb_id}/?ref_=bo_se_r_1'
+    url = BOXOFFICEMOJO_URL.format(imdb_id=imdb_id)
     try:
-        response = requests.get(url, timeout=30)
+        response = cached_get(url, timeout=30)
         response.raise_for_status()
     except requests.exceptions.RequestException as e:
-        print(f"❌ Error accessing the page for IMDb ID: {imdb_id} - {e}")
-        return 'Error accessing the page'
-
-    soup = BeautifulSoup(response.text, 'html.parser')
-    print(f"✅ Successfully received response for IMDb ID: {imdb_id}")
+        METRICS.error(host_of(url), f"{imdb_id}: {e}")
+        status = e.response.status_code if e.response is not None else None
+        return {**{column: None for column in BOXOFFICE_COLUMNS.values()}, 'fetch_error': fetch_error(url, status, e)}
 
     try:
-        # Search all performance summary sections
-        performance_sections = soup.select('div.mojo-performance-summary-table div.a-section.a-spacing-none')
-        for section in performance_sections:
-            if 'Worldwide' in section.get_text():
-                money_span = section.find('span', class_='money')
-                if money_span:
-                    return money_span.get_text(strip=True)
-        return None
+        return parse_boxoffice_summary(response.text)
     except Exception as e:
-        print(f"❌ Error processing the HTML: {e}")
-        return None
+        METRICS.error(host_of(url), f"{imdb_id}: error processing the HTML - {e}")
+        return {column: None for column in BOXOFFICE_COLUMNS.values()}
+
+
+@instrumented_stage()
+def boxoffice_summary_df(df, max_in_flight=DEFAULT_MAX_IN_FLIGHT, rate=DEFAULT_RATE, checkpoint=None):
+    """
+    Extracts the domestic, international and worldwide box office revenue (plus the rest of the
+    summary fields) for a list of IMDb IDs, downloading each title page only once.
+
+    Args:
+        df (pd.DataFrame): DataFrame containing a column 'filmid' with IMDb IDs and a column 'film' with movie titles.
+        max_in_flight (int): Maximum number of simultaneous requests to Box Office Mojo.
+        rate (float): Maximum number of requests per second to Box Office Mojo.
+        checkpoint (str | Checkpoint): Optional JSONL file where each result is saved as it arrives;
+            IDs already done in it are skipped and failed or expired ones are fetched again.
+
+    Returns:
+        pd.DataFrame: A DataFrame containing the following columns:
+            - 'IMDb ID': The IMDb ID of the movie.
+            - 'title': The title of the movie.
+            - 'domestic boxoffice', 'international boxoffice', 'Worlwide boxoffice': The revenue as a string.
+            - One extra column per additional summary field found on the pages.
+            - 'fetch_error': Only if some page failed, the error record of those films.
+    """
+    titulos = df.drop_duplicates('filmid').set_index('filmid')['film']
+
+    summaries = fetch_with_checkpoint(
+        titulos.index, film_boxoffice_summary, host_of(BOXOFFICEMOJO_URL), checkpoint,
+        is_ok=lambda summary: 'fetch_error' not in summary,
+        max_in_flight=max_in_flight, rate=rate, label='🌍 Box office'
+    )
+    datos = [
+        {'IMDb ID': imdb_id, 'title': titulo, **summary}
+        for (imdb_id, titulo), summary in zip(titulos.items(), summaries)
+    ]
+
+    # Create a DataFrame with the results
+    df_summary = pd.DataFrame(datos)
+    columnas = ['IMDb ID', 'title', *BOXOFFICE_COLUMNS.values()]
+    return df_summary.reindex(columns=columnas + [c for c in df_summary.columns if c not in columnas])
+
+
+def iter_boxoffice_summaries(films, max_in_flight=DEFAULT_MAX_IN_FLIGHT, rate=DEFAULT_RATE, checkpoint=None):
+    """
+    Generator version of `boxoffice_summary_df`: yields the record of each film as soon as it is
+    ready instead of building a list of all of them, for the streaming build.
+
+    Args:
+        films (iterable): Pairs (IMDb ID, title). Can be a generator.
+        max_in_flight (int): Maximum number of simultaneous requests to Box Office Mojo.
+        rate (float): Maximum number of requests per second to Box Office Mojo.
+        checkpoint (str | Checkpoint): Optional JSONL checkpoint, as in `boxoffice_summary_df`.
+
+    Yields:
+        dict: The keys 'IMDb ID', 'title' and the fields of `film_boxoffice_summary`, in the order of
+            `films`. A repeated IMDb ID is fetched and yielded once, with its first title.
+    """
+    titulos, vistos = {}, set()
+
+    def ids():
+        # Cada ID una sola vez, con el primer título, como drop_duplicates('filmid')
+        for imdb_id, titulo in films:
+            if imdb_id in vistos:
+                continue
+            vistos.add(imdb_id)
+            titulos[imdb_id] = titulo
+            yield imdb_id
+
+    summaries = stream_with_checkpoint(
+        ids(), film_boxoffice_summary, host_of(BOXOFFICEMOJO_URL), checkpoint,
+        is_ok=lambda summary: 'fetch_error' not in summary,
+        max_in_flight=max_in_flight, rate=rate
+    )
+    for imdb_id, summary in summaries:
+        yield {'IMDb ID': imdb_id, 'title': titulos.pop(imdb_id, None), **summary}
+
+
+def split_boxoffice_summary(df_summary):
+    """
+    Splits the output of `boxoffice_summary_df` into the three legacy box office DataFrames,
+    ready to be passed to `create_boxoffice_dataset`.
+
+    Args:
+        df_summary (pd.DataFrame): DataFrame returned by `boxoffice_summary_df`.
+
+    Returns:
+        tuple: (df_domestic_boxoffice, df_international_boxoffice, df_worldwide), each one with the
+            columns 'IMDb ID', 'title' and its revenue column.
+    """
+    return tuple(
+        df_summary[['IMDb ID', 'title', column]].copy()
+        for column in ['domestic boxoffice', 'international boxoffice', 'Worlwide boxoffice']
+    )
+
+
+# Función para obtener recaudación mundial desde Box Office Mojo
+def film_world_boxoffice(imdb_id):
+    """
+    Fetches the worldwide box office revenue for a given IMDb ID from Box Office Mojo.
+
+    Args:
+        imdb_id (str): The IMDb ID of the movie to fetch data for.
+
+    Returns:
+        str: The worldwide box office revenue as a string (e.g., "$20,000,000").
+            Returns None if the revenue is not found or if an error occurs.
+    """
+    return film_boxoffice_summary(imdb_id)['Worlwide boxoffice']
     
-# Función para extraer IMDb ID, título y recaudación internacional
-def worldwide_boxoffice_df(df):
+# Función para extraer IMDb ID, título y recaudación mundial
+@instrumented_stage()
+def worldwide_boxoffice_df(df, max_in_flight=DEFAULT_MAX_IN_FLIGHT, rate=DEFAULT_RATE, checkpoint=None):
     """
     Extracts worldwide box office revenue for a list of IMDb IDs, creates a DataFrame, and returns it.
+    Use `boxoffice_summary_df` + `split_boxoffice_summary` to get the three figures in one scrape.
 
     Args:
         df (pd.DataFrame): DataFrame containing a column 'filmid' with IMDb IDs and a column 'film' with movie titles.
+        max_in_flight (int): Maximum number of simultaneous requests to Box Office Mojo.
+        rate (float): Maximum number of requests per second to Box Office Mojo.
+        checkpoint (str | Checkpoint): Optional JSONL file where each result is saved as it arrives;
+            IDs already done in it are skipped and failed or expired ones are fetched again.
 
     Returns:
         pd.DataFrame: A DataFrame containing the following columns:
@@ -48,28 +183,7 @@ def worldwide_boxoffice_df(df):
             - 'title': The title of the movie.
             - 'Worlwide boxoffice': The worldwide box office revenue as a string (e.g., "$20,000,000").
     """
-    datos = []
-    ids = df['filmid'].unique()
-    total = len(ids)
-
-    for i, imdb_id in enumerate(ids, start=1):
-        print(f"🌍 ({i}/{total}) Querying worldwide box office for IMDb ID: {imdb_id}")
-        recaudacion = film_world_boxoffice(imdb_id)
-        time.sleep(0.25)
-        
-        # Get the corresponding title from the original DataFrame
-        titulo = df[df['filmid'] == imdb_id]['film'].values[0]
-
-        # Save the data in the list
-        datos.append({
-            'IMDb ID': imdb_id,
-            'title': titulo,
-            'Worlwide boxoffice': recaudacion
-        })
-
-    # Create a DataFrame with the results
-    df_worldwide = pd.DataFrame(datos)
-    return df_worldwide
+    return split_boxoffice_summary(boxoffice_summary_df(df, max_in_flight, rate, checkpoint))[2]
 
 # Función para obtener recaudación domestic desde Box Office Mojo
 def film_domestic_boxoffice(imdb_id):
@@ -83,37 +197,21 @@ def film_domestic_boxoffice(imdb_id):
         str: The domestic box office revenue as a string (e.g., "$20,000,000").
              Returns None if the revenue is not found or if an error occurs.
     """
-    url = f'https://www.boxofficemojo.com/title/{imdb_id}/?ref_=bo_se_r_1'
-    try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Error accessing the page for IMDb ID: {imdb_id} - {e}")
-        return 'Error accessing the page'
-
-    soup = BeautifulSoup(response.text, 'html.parser')
-    print(f"✅ Successfully received response for IMDb ID: {imdb_id}")
-
-    try:
-        # Search all performance summary sections
-        performance_sections = soup.select('div.mojo-performance-summary-table div.a-section.a-spacing-none')
-        for section in performance_sections:
-            if 'Domestic' in section.get_text():
-                money_span = section.find('span', class_='money')
-                if money_span:
-                    return money_span.get_text(strip=True)
-        return None
-    except Exception as e:
-        print(f"❌ Error processing the HTML: {e}")
-        return None
+    return film_boxoffice_summary(imdb_id)['domestic boxoffice']
 
 # Función para extraer IMDb ID, título y recaudación domestic
-def films_domestic_boxoffice_df(df):
+@instrumented_stage()
+def films_domestic_boxoffice_df(df, max_in_flight=DEFAULT_MAX_IN_FLIGHT, rate=DEFAULT_RATE, checkpoint=None):
     """
     Extracts domestic box office revenue for a list of IMDb IDs, creates a DataFrame, and returns it.
+    Use `boxoffice_summary_df` + `split_boxoffice_summary` to get the three figures in one scrape.
 
     Args:
         df (pd.DataFrame): DataFrame containing a column 'filmid' with IMDb IDs and a column 'film' with movie titles.
+        max_in_flight (int): Maximum number of simultaneous requests to Box Office Mojo.
+        rate (float): Maximum number of requests per second to Box Office Mojo.
+        checkpoint (str | Checkpoint): Optional JSONL file where each result is saved as it arrives;
+            IDs already done in it are skipped and failed or expired ones are fetched again.
 
     Returns:
         pd.DataFrame: A DataFrame containing the following columns:
@@ -121,28 +219,7 @@ def films_domestic_boxoffice_df(df):
             - 'title': The title of the movie.
             - 'domestic boxoffice': The domestic box office revenue as a string (e.g., "$20,000,000").
     """
-    datos = []
-    ids = df['filmid'].unique()
-    total = len(ids)
-
-    for i, imdb_id in enumerate(ids, start=1):
-        print(f"🌍 ({i}/{total}) Querying domestic box office for IMDb ID: {imdb_id}")
-        recaudacion = film_domestic_boxoffice(imdb_id)
-        time.sleep(0.25)
-        
-        # Get the corresponding title from the original DataFrame
-        titulo = df[df['filmid'] == imdb_id]['film'].values[0]
-
-        # Save the data in the list
-        datos.append({
-            'IMDb ID': imdb_id,
-            'title': titulo,
-            'domestic boxoffice': recaudacion
-        })
-
-    # Create a DataFrame with the results
-    df_domestic_boxoffice = pd.DataFrame(datos)
-    return 
+    return split_boxoffice_summary(boxoffice_summary_df(df, max_in_flight, rate, checkpoint))[0]
 
 # Function to obtain international box office revenue from Box Office Mojo
 def film_internacional_boxoffice(imdb_id):
@@ -156,27 +233,21 @@ def film_internacional_boxoffice(imdb_id):
         str: The international box office revenue as a string (e.g., "$20,000,000").
             Returns None if the revenue is not found or if an error occurs.
     """
-    url = f'https://www.boxofficemojo.com/title/{imdb_id}/?ref_=bo_se_r_1'
-    try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        for section in performance_sections:
-            if 'International' in section.get_text():
-                money_span = section.find('span', class_='money')
-                if money_span:
-                    return money_span.get_text(strip=True)
-        return None
-    except Exception as e:
-        print(f"❌ Error procesando el HTML: {e}")
-        return None
+    return film_boxoffice_summary(imdb_id)['international boxoffice']
     
 # Función para extraer IMDb ID, título y recaudación international
-def films_international_boxoffice_df(df):
+@instrumented_stage()
+def films_international_boxoffice_df(df, max_in_flight=DEFAULT_MAX_IN_FLIGHT, rate=DEFAULT_RATE, checkpoint=None):
     """
     Extracts international box office revenue for a list of IMDb IDs, creates a DataFrame, and returns it.
+    Use `boxoffice_summary_df` + `split_boxoffice_summary` to get the three figures in one scrape.
 
     Args:
         df (pd.DataFrame): DataFrame containing a column 'filmid' with IMDb IDs and a column 'film' with movie titles.
+        max_in_flight (int): Maximum number of simultaneous requests to Box Office Mojo.
+        rate (float): Maximum number of requests per second to Box Office Mojo.
+        checkpoint (str | Checkpoint): Optional JSONL file where each result is saved as it arrives;
+            IDs already done in it are skipped and failed or expired ones are fetched again.
 
     Returns:
         pd.DataFrame: A DataFrame containing the following columns:
@@ -184,28 +255,8 @@ def films_international_boxoffice_df(df):
             - 'title': The title of the movie.
             - 'international boxoffice': The international box office revenue as a string (e.g., "$20,000,000").
     """
-    datos = []
-    ids = df['filmid'].unique()
-    total = len(ids)
-
-    for i, imdb_id in enumerate(ids, start=1):
-        print(f"🌍 ({i}/{total}) Querying international box office for IMDb ID: {imdb_id}")
-        recaudacion = film_internacional_boxoffice(imdb_id)
-        time.sleep(0.25)
-        
-        # Get the corresponding title from the original DataFrame
-        titulo = df[df['filmid'] == imdb_id]['film'].values[0]
-
-        # Save the data in the list
-        datos.append({
-            'IMDb ID': imdb_id,
-            'title': titulo,
-            'international boxoffice': recaudacion
-        })
+    return split_boxoffice_summary(boxoffice_summary_df(df, max_in_flight, rate, checkpoint))[1]
 
-    # Create a DataFrame with the results
-    df_international_boxoffice = pd.DataFrame(datos)
-    return df_international_boxoffice
 
 def film_url_fixed(film_name):
     """
@@ -235,6 +286,11 @@ def film_url_fixed(film_name):
         film_name = film_name.replace(char1, "")
     return film_name
 
+
+# Respuestas de The Numbers que significan que la película no está en la web, no un fallo
+BUDGET_NOT_FOUND_STATUS = (404, 410)
+
+
 def film_budget(film_name):
     """
     Fetches the production budget of a film from The Numbers website.
@@ -245,65 +301,137 @@ def film_budget(film_name):
     Returns:
         int: The production budget of the film in dollars, or None if not found or an error occurs.
     """
+    return film_budget_record(film_name)['budget']
+
+
+def film_budget_record(film_name):
+    """
+    Same as `film_budget`, but returning a record that tells a missing budget from a failed request.
+
+    Args:
+        film_name (str): The name of the film.
+
+    Returns:
+        dict: {'budget': int or None}, plus the key 'fetch_error' with the error record if the
+            page could not be accessed or its budget could not be read.
+    """
     film_url = film_url_fixed(film_name)
-    url = f'https://www.the-numbers.com/movie/{film_url}#tab=summary'
-
-    response = requests.get(url)
-    if response.status_code == 200:
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        b_tags = soup.find_all('b', string='Production Budget:')
-        for b in b_tags:
-            td_parent = b.find_parent('td')
-            if td_parent:
-                td_siguiente = td_parent.find_next_sibling('td')
-                if td_siguiente:
-                    texto_completo = td_siguiente.text.strip()
-                    texto_dinero = texto_completo.split(' (')[0]  # "$2,000,000"
-                    # Clean and convert to int
-                    presupuesto = int(texto_dinero.replace('$', '').replace(',', ''))
-                    print(f"   ✅ Budget found: {presupuesto}")
-                    return presupuesto
-        print("   ⚠️ Budget not found")
-        return None
-    else:
-        print("   ❌ Error accessing the page")
-        return None
-    
-def films_budget_df(df):
+    url = THE_NUMBERS_URL.format(film_url=film_url)
+
+    try:
+        response = cached_get(url, timeout=30)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        status = e.response.status_code if e.response is not None else None
+        if status in BUDGET_NOT_FOUND_STATUS:
+            METRICS.increment('budget_not_found', host_of(url))
+        else:
+            METRICS.error(host_of(url), f"{film_name}: {e}")
+        return budget_error_record(fetch_error(url, status, e))
+
+    try:
+        presupuesto = extract_budget(response.text)
+    except ValueError as e:
+        # Página con un presupuesto que no se puede leer: se registra y se reintenta en la próxima ejecución
+        METRICS.error(host_of(url), f"{film_name}: malformed budget - {e}")
+        return budget_error_record(fetch_error(url, response.status_code, e))
+    if presupuesto is None:
+        METRICS.increment('budget_not_found', host_of(url))
+    return {'budget': presupuesto}
+
+
+def budget_error_record(error):
+    """
+    Builds the record of a The Numbers page whose budget could not be read. Shared by
+    `film_budget_record` and `scrape_pipeline.scrape_budget_pipeline` so both give the same rows.
+
+    Args:
+        error (dict): Error record of `fetch_engine.fetch_error` for the page.
+
+    Returns:
+        dict: {'budget': None} if the page does not exist (the film has no budget), otherwise
+            also the key 'fetch_error' with the error record, so the film is fetched again.
+    """
+    if error['status'] in BUDGET_NOT_FOUND_STATUS:
+        return {'budget': None}
+    return {'budget': None, 'fetch_error': error}
+
+
+@instrumented_stage()
+def films_budget_df(df, max_in_flight=DEFAULT_MAX_IN_FLIGHT, rate=DEFAULT_RATE, checkpoint=None):
     """
     Creates a DataFrame containing the budget information for a list of films.
 
     Args:
         df (pd.DataFrame): DataFrame containing a column 'filmid' with IMDb IDs and a column 'title' with movie titles.
+        max_in_flight (int): Maximum number of simultaneous requests to The Numbers.
+        rate (float): Maximum number of requests per second to The Numbers.
+        checkpoint (str | Checkpoint): Optional JSONL file where each result is saved as it arrives;
+            IDs already done in it are skipped and failed or expired ones are fetched again.
 
     Returns:
         pd.DataFrame: A DataFrame containing the following columns:
             - 'IMDb ID': The IMDb ID of the movie.
             - 'title': The title of the movie.
             - 'budget': The production budget of the movie.
+            - 'fetch_error': Only if some page failed, the error record of those films.
     """
-    datos = []
-    ids = df['filmid'].unique()
-    total = len(ids)
+    # Get the corresponding title of each IMDb ID from the original DataFrame
+    titulos = df.drop_duplicates('filmid').set_index('filmid')['title']
 
-    for i, imdb_id in enumerate(ids, start=1):
-        print(f"🎬 ({i}/{total}) Consulting budget for IMDb ID: {imdb_id}")
-        
-        # Get the corresponding title from the original DataFrame
-        titulo = df[df['filmid'] == imdb_id]['title'].values[0]
-
-        # Get the budget
-        presupuesto = film_budget(titulo)
-        time.sleep(0.25)
-
-        # Save the data in the list
-        datos.append({
-            'IMDb ID': imdb_id,
-            'title': titulo,
-            'budget': presupuesto
-        })
+    registros = fetch_with_checkpoint(
+        titulos.index, lambda imdb_id: film_budget_record(titulos[imdb_id]), host_of(THE_NUMBERS_URL), checkpoint,
+        is_ok=lambda record: 'fetch_error' not in record,
+        max_in_flight=max_in_flight, rate=rate, label='🎬 Budget'
+    )
+    # Los checkpoints antiguos guardan el presupuesto sin registro
+    registros = [r if isinstance(r, dict) else {'budget': r} for r in registros]
 
     # Create a DataFrame with the results
-    df_budget = pd.DataFrame(datos)
-    return df_budget
\ No newline at end of file
+    df_budget = pd.DataFrame({
+        'IMDb ID': titulos.index,
+        'title': titulos.values,
+        'budget': [r['budget'] for r in registros]
+    })
+    errores = [r.get('fetch_error') for r in registros]
+    if any(errores):
+        df_budget['fetch_error'] = errores
+    return df_budget
+
+
+def iter_budgets(films, max_in_flight=DEFAULT_MAX_IN_FLIGHT, rate=DEFAULT_RATE, checkpoint=None):
+    """
+    Generator version of `films_budget_df`: yields the budget record of each film as soon as it is
+    ready instead of building a list of all of them, for the streaming build.
+
+    Args:
+        films (iterable): Pairs (IMDb ID, title), the title being the one used to build the The
+            Numbers URL (the OMDb title). Can be a generator.
+        max_in_flight (int): Maximum number of simultaneous requests to The Numbers.
+        rate (float): Maximum number of requests per second to The Numbers.
+        checkpoint (str | Checkpoint): Optional JSONL checkpoint, as in `films_budget_df`.
+
+    Yields:
+        dict: The keys 'IMDb ID', 'title' and 'budget', plus 'fetch_error' if the page failed, in
+            the order of `films`. A repeated IMDb ID is fetched and yielded once, with its first title.
+    """
+    titulos, vistos = {}, set()
+
+    def ids():
+        # Cada ID una sola vez, con el primer título, como drop_duplicates('filmid')
+        for imdb_id, titulo in films:
+            if imdb_id in vistos:
+                continue
+            vistos.add(imdb_id)
+            titulos[imdb_id] = titulo
+            yield imdb_id
+
+    registros = stream_with_checkpoint(
+        ids(), lambda imdb_id: film_budget_record(titulos[imdb_id]), host_of(THE_NUMBERS_URL), checkpoint,
+        is_ok=lambda record: 'fetch_error' not in record,
+        max_in_flight=max_in_flight, rate=rate
+    )
+    for imdb_id, registro in registros:
+        # Los checkpoints antiguos guardan el presupuesto sin registro
+        registro = registro if isinstance(registro, dict) else {'budget': registro}
+        yield {'IMDb ID': imdb_id, 'title': titulos.pop(imdb_id, None), **registro}
@@ -0,0 +1,55 @@
+import json
+
+import pandas as pd
+import requests
+
+import api_function
+import http_cache
+from api_function import films_df_imdb
+from http_cache import ResponseCache
+from omdb_client import OMDbClient
+
+
+class _OMDbSession:
+    """Sesión que contesta como OMDb: 'Movie not found!' para los IDs de `missing` y un fallo 503 para los de `broken`."""
+
+    def __init__(self, missing=(), broken=()):
+        self.missing, self.broken = set(missing), set(broken)
+        self.requests = []
+
+    def get(self, url, params=None, timeout=None):
+        imdb_id = params['i']
+        self.requests.append(imdb_id)
+        response = requests.Response()
+        response.url = url
+        response.status_code = 503 if imdb_id in self.broken else 200
+        if imdb_id in self.missing:
+            data = {'Response': 'False', 'Error': 'Movie not found!'}
+        else:
+            data = {'Response': 'True', 'Title': f'Film {imdb_id}', 'imdbRating': '7.1'}
+        response._content = json.dumps(data).encode()
+        return response
+
+
+def _run(monkeypatch, tmp_path, session, nombre):
+    # Caché HTTP nueva en cada ejecución para contar solo lo que evita el checkpoint
+    monkeypatch.setattr(http_cache, '_default_cache', ResponseCache(str(tmp_path / f'http_{nombre}')))
+    client = OMDbClient('key', max_retries=0)
+    client.session = session
+    monkeypatch.setattr(api_function, 'get_client', lambda max_in_flight=None: client)
+    df = pd.DataFrame({'filmid': ['tt01', 'tt02', 'tt03']})
+    return films_df_imdb(df, str(tmp_path / f'{nombre}.csv'), rate=1000.0, retry_passes=0,
+                         checkpoint=str(tmp_path / 'omdb.jsonl'))
+
+
+def test_movies_not_found_are_not_requested_again(monkeypatch, tmp_path):
+    session = _OMDbSession(missing={'tt02'}, broken={'tt03'})
+    df = _run(monkeypatch, tmp_path, session, 'first')
+    assert list(df['filmid']) == ['tt01']
+    assert sorted(session.requests) == ['tt01', 'tt02', 'tt03']
+
+    # Solo se reintenta el fallo de red; la película que OMDb no conoce queda hecha
+    session = _OMDbSession(missing={'tt02'})
+    df = _run(monkeypatch, tmp_path, session, 'second')
+    assert session.requests == ['tt03']
+    assert list(df['filmid']) == ['tt01', 'tt03']
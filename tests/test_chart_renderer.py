@@ -0,0 +1,38 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import chart_renderer
+from chart_renderer import CHARTS, RENDER_STATE_FILE, Chart, render_charts
+
+
+def _broken(df):
+    raise RuntimeError('broken chart')
+
+
+def _final_dataset():
+    return pd.DataFrame({'winner': ['yes', 'no', 'no', 'yes'], 'ROI': [1.5, 0.2, 3.0, 12.0]})
+
+
+def test_render_charts_keeps_the_fingerprints_of_the_charts_that_rendered(monkeypatch, tmp_path):
+    monkeypatch.setitem(CHARTS, 'broken', Chart('broken', _broken, 'broken.png', ['winner']))
+    output_dir, directory = str(tmp_path / 'png'), str(tmp_path / 'artifacts')
+
+    with pytest.raises(RuntimeError, match='broken chart'):
+        render_charts(_final_dataset(), ['roi', 'broken'], output_dir=output_dir, directory=directory, workers=1)
+
+    with open(os.path.join(directory, RENDER_STATE_FILE), encoding='utf-8') as f:
+        state = json.load(f)
+    assert list(state) == [os.path.join(output_dir, CHARTS['roi'].filename)]
+
+    # El gráfico que sí se dibujó no se vuelve a dibujar
+    resultado = render_charts(_final_dataset(), ['roi'], output_dir=output_dir, directory=directory, workers=1)
+    assert resultado['action'].tolist() == ['skipped']
+
+
+def test_spec_hash_follows_the_winner_palette(monkeypatch):
+    antes = CHARTS['scores'].spec_hash()
+    monkeypatch.setitem(chart_renderer.WINNER_PALETTE, 'yes', 'orange')
+    assert CHARTS['scores'].spec_hash() != antes
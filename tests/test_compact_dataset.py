@@ -0,0 +1,15 @@
+import pandas as pd
+import pytest
+
+from compact_dataset import decode_filmid, encode_filmid
+
+
+def test_filmid_keys_round_trip():
+    filmids = pd.Series(['tt0245712', 'tt10272386', 'tt0000001'], dtype='string')
+    pd.testing.assert_series_equal(decode_filmid(encode_filmid(filmids)), filmids)
+
+
+@pytest.mark.parametrize('filmid', ['tt01234567', 'tt123456', 'nm0000001', None])
+def test_encode_filmid_rejects_ids_that_do_not_round_trip(filmid):
+    with pytest.raises(ValueError):
+        encode_filmid(pd.Series([filmid]))
@@ -0,0 +1,19 @@
+import fetch_engine
+from fetch_engine import get_limiter
+
+
+def test_get_limiter_updates_limits_in_place():
+    host = 'limits.example.com'
+    fetch_engine._limiters.pop(host, None)
+    governor = get_limiter(host, max_in_flight=8, rate=5.0)
+    governor.observe(503, 0.1)
+    governor.observe(429, 0.1, retry_after=30)
+
+    again = get_limiter(host, max_in_flight=4, rate=2.0)
+
+    assert again is governor
+    assert governor.max_in_flight == 4
+    assert governor.bucket.rate == 2.0
+    assert governor.failures == 2
+    assert governor.limit <= 4
+    assert governor.paused_until > 0
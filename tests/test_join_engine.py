@@ -0,0 +1,59 @@
+import pandas as pd
+
+from compact_dataset import decode_filmid
+from data_function import create_final_dataset, create_financial_data
+from join_engine import ONE_PER_FILM, join_final_dataset, single_pass_join, synthetic_sources
+
+
+def _chained(df_imdb, df_boxoffice, df_budget, df_kaggle):
+    df_financial = create_financial_data(df_budget, df_boxoffice, ruta_salida=None, guardar=False)
+    return create_final_dataset(df_imdb, df_financial, df_kaggle, ruta_salida=None, guardar=False)
+
+
+def _sorted(df, columns):
+    return df.sort_values(columns).reset_index(drop=True)
+
+
+def test_one_per_film_ignores_films_missing_from_the_sources():
+    # tt0000002 tiene nominación pero no está en las fuentes: no puede contar para tt0000001
+    df_source = pd.DataFrame({'filmid': ['tt0000001', 'tt0000003'], 'title': ['uno', 'tres']})
+    df_nom = pd.DataFrame({
+        'filmid': ['tt0000001', 'tt0000002', 'tt0000003'],
+        'year': [2005, 1999, 2010],
+        'winner': ['no', 'yes', 'no'],
+        'category': ['best picture', 'animated feature film', 'best picture'],
+    })
+
+    df = single_pass_join([(df_source, ['title'], 'inner')], (df_nom, ['year', 'winner', 'category']), ONE_PER_FILM)
+
+    assert df['title'].tolist() == ['uno', 'tres']
+    assert df['winner'].tolist() == ['no', 'no']
+    assert df['year'].tolist() == [2005, 2010]
+    assert df['category'].tolist() == ['best picture', 'best picture']
+    assert df['nominations'].tolist() == [1, 1]
+
+
+def test_join_matches_create_final_dataset_with_missing_films():
+    # Cada fuente cubre ~90% de las películas: hay nominaciones de películas que faltan en alguna
+    df_imdb, df_boxoffice, df_budget, df_kaggle = synthetic_sources(films=400, nominations=2000, seed=3)
+    esperado = _chained(df_imdb, df_boxoffice, df_budget, df_kaggle)
+    df_join = join_final_dataset(df_imdb, df_boxoffice, df_budget, df_kaggle)
+    df_join['filmid'] = decode_filmid(df_join['filmid'])
+
+    columnas = list(esperado.columns)
+    orden = ['filmid', 'year', 'category', 'winner']
+    pd.testing.assert_frame_equal(
+        _sorted(df_join[columnas].astype(str), orden), _sorted(esperado.astype(str), orden)
+    )
+
+    # Una fila por película: ganó si ganó alguna nominación, primer año y número de nominaciones
+    por_pelicula = esperado.assign(ganada=esperado['winner'].astype(str).eq('yes')).groupby('filmid').agg(
+        year=('year', 'min'), ganada=('ganada', 'any'), nominations=('year', 'size')
+    ).reset_index()
+    df_film = join_final_dataset(df_imdb, df_boxoffice, df_budget, df_kaggle, rule=ONE_PER_FILM)
+    df_film['filmid'] = decode_filmid(df_film['filmid'])
+    df_film = _sorted(df_film, ['filmid'])
+    assert df_film['filmid'].tolist() == por_pelicula['filmid'].tolist()
+    assert df_film['year'].tolist() == por_pelicula['year'].tolist()
+    assert df_film['winner'].eq('yes').tolist() == por_pelicula['ganada'].tolist()
+    assert df_film['nominations'].tolist() == por_pelicula['nominations'].tolist()
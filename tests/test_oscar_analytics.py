@@ -0,0 +1,40 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from artifact_store import load_artifact
+from oscar_analytics import DIMENSIONS, FILTERS, METRICS, WinnerAnalytics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _final_dataset(tmp_path):
+    csv_path = os.path.join(ROOT, 'csv', 'final_dataset.csv')
+    df = load_artifact('final_dataset', csv_path, directory=str(tmp_path)).reset_index(drop=True)
+    # Un ROI infinito como los de los datos antiguos con presupuesto 0
+    return df.assign(ROI=df['ROI'].astype('float64').mask(df.index % 7 == 0, np.inf))
+
+
+def _assert_same(incremental, completo):
+    for metric in METRICS:
+        for by in [None] + DIMENSIONS:
+            for filtro in FILTERS:
+                pd.testing.assert_frame_equal(
+                    incremental.winner_summary(metric, by, filtro), completo.winner_summary(metric, by, filtro),
+                    check_exact=False, rtol=1e-6
+                )
+
+
+def test_update_matches_a_full_rebuild(tmp_path):
+    df = _final_dataset(tmp_path)
+    ultimo = df['year'].max()
+
+    # Se añade el último año y después se refrescan (con otro ROI) las filas de un año anterior
+    incremental = WinnerAnalytics(df[df['year'] < ultimo]).update(df[df['year'] == ultimo])
+    refrescadas = df[df['year'] == ultimo - 1].assign(ROI=lambda d: d['ROI'] * 2)
+    incremental.update(refrescadas)
+
+    final = pd.concat([df[df['year'] != ultimo - 1], refrescadas])
+    _assert_same(incremental, WinnerAnalytics(final))
+    assert np.isfinite(incremental.winner_summary('ROI')['mean']).all()
@@ -0,0 +1,28 @@
+import os
+
+from data_function import clean_budget, create_final_dataset, load_manual_budgets
+from pipeline_dag import code_dependencies, default_stages
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_stage_code_includes_the_helpers_it_uses():
+    dependencias = code_dependencies([create_final_dataset])
+    # Los esquemas y parsers que usa versionan la etapa aunque la función no cambie
+    assert {'artifact_store.SCHEMAS', 'artifact_store.write_artifact', 'normalize.parse_field'} <= set(dependencias)
+    # Pero no el resto de funciones del módulo ni el código de los scrapers
+    assert 'data_function.clean_budget' not in dependencias
+    assert not any(nombre.startswith(('web_scraping_functions.', 'fetch_engine.')) for nombre in dependencias)
+    assert 'data_function.create_final_dataset' not in code_dependencies([clean_budget])
+
+
+def test_default_stages_use_the_manual_budgets(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    stages = {stage.name: stage for stage in default_stages()}
+    presupuestos = stages['movie_budgets_clean'].params['presupuestos']
+    assert presupuestos == load_manual_budgets()
+    assert presupuestos['Parasite'] == 11400000
+
+    sin_manuales = {stage.name: stage for stage in default_stages({})}
+    assert sin_manuales['movie_budgets_clean'].params['presupuestos'] == {}
+    assert sin_manuales['movie_budgets_clean'].fingerprint([]) != stages['movie_budgets_clean'].fingerprint([])
@@ -0,0 +1,93 @@
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+import requests
+
+import http_cache
+from artifact_store import apply_schema
+from checkpoint import fetch_with_checkpoint
+from http_cache import ResponseCache, cached_get
+from refresh_planner import DAY, FINANCIAL_COLUMNS, IMDB_COLUMNS, merge_changed_rows, refresh_collector
+
+FINAL_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'csv', 'final_dataset.csv')
+
+
+def _scraped_texts(df):
+    # Los mismos valores con el formato de las fuentes: "261,019", "$5,408,467", "N/A"
+    def texto(valor, formato):
+        return 'N/A' if pd.isna(valor) else formato.format(valor)
+
+    df = apply_schema(df, 'final_dataset')
+    return pd.DataFrame({
+        'filmid': df['filmid'],
+        'imdbRating': df['imdbRating'].map(lambda v: texto(v, '{}')),
+        'metascore': df['metascore'].map(lambda v: texto(v, '{:.0f}')),
+        'imdbVotes': df['imdbVotes'].map(lambda v: texto(v, '{:,.0f}')),
+        'Worlwide boxoffice': df['Worlwide boxoffice'].map(lambda v: texto(v, '${:,.0f}')),
+        'budget': df['budget'].map(lambda v: texto(v, '${:,.0f}')),
+        'ROI': df['ROI'],
+    })
+
+
+def test_merge_without_real_changes_changes_nothing():
+    df = pd.read_csv(FINAL_CSV)
+    updates = _scraped_texts(df)
+
+    result, changed = merge_changed_rows(df, updates, IMDB_COLUMNS + FINANCIAL_COLUMNS)
+
+    assert changed == []
+    assert pd.api.types.is_integer_dtype(result['imdbVotes'])
+    assert pd.api.types.is_integer_dtype(result['budget'])
+    assert result['imdbVotes'].equals(apply_schema(df, 'final_dataset')['imdbVotes'])
+
+
+def test_merge_detects_a_real_change():
+    df = pd.read_csv(FINAL_CSV)
+    updates = _scraped_texts(df)
+    filmid = df['filmid'].iloc[0]
+    updates.loc[updates['filmid'] == filmid, 'imdbVotes'] = '9,999,999'
+
+    result, changed = merge_changed_rows(df, updates, IMDB_COLUMNS)
+
+    assert changed == [filmid]
+    assert (result.loc[result['filmid'] == filmid, 'imdbVotes'] == 9_999_999).all()
+    assert pd.api.types.is_integer_dtype(result['imdbVotes'])
+
+
+class _CountingSession:
+    def __init__(self):
+        self.requests = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.requests += 1
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = f'{{"votes": {self.requests}}}'.encode()
+        return response
+
+
+def test_refresh_goes_past_the_http_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(http_cache, '_default_cache', ResponseCache(str(tmp_path / 'http')))
+    session = _CountingSession()
+
+    def collector(df, checkpoint):
+        return fetch_with_checkpoint(
+            df['filmid'].unique(), lambda imdb_id: cached_get(f'https://www.omdbapi.com/?i={imdb_id}', session=session).text,
+            'www.omdbapi.com', checkpoint, rate=1000
+        )
+
+    # Película del año en curso: se refresca cada día, y la caché de OMDb dura 30 días
+    df_kaggle = pd.DataFrame({'filmid': ['tt0000001'], 'year': [datetime.now().year]})
+    checkpoint = str(tmp_path / 'omdb.jsonl')
+    refresh_collector(collector, df_kaggle, checkpoint)
+    assert session.requests == 1
+
+    ahora = time.time()
+    monkeypatch.setattr(time, 'time', lambda: ahora + 2 * DAY)
+    resultado, ids = refresh_collector(collector, df_kaggle, checkpoint)
+    assert ids == ['tt0000001']
+    assert session.requests == 2
+    assert resultado == ['{"votes": 2}']
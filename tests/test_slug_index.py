@@ -0,0 +1,64 @@
+import requests
+
+import slug_index
+from slug_index import resolve_budget, slug_candidates
+
+
+class _CountingLimiter:
+    def __init__(self):
+        self.entered = 0
+        self.in_flight = 0
+
+    def __enter__(self):
+        self.entered += 1
+        self.in_flight += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.in_flight -= 1
+        return False
+
+
+def test_resolve_budget_takes_the_limiter_per_slug(monkeypatch, tmp_path):
+    candidatos = slug_candidates('Little Women', 2019)
+    bueno = candidatos[-1]
+    limiter = _CountingLimiter()
+
+    def fake_get(url, timeout):
+        # Cada petición se hace con el limitador tomado
+        assert limiter.in_flight == 1
+        response = requests.Response()
+        response.url = url
+        if url.endswith(f'/{bueno}#tab=summary'):
+            response.status_code = 200
+            response._content = b'<table><tr><td><b>Production Budget:</b></td><td>$40,000,000</td></tr></table>'
+        else:
+            response.status_code = 404
+        return response
+
+    monkeypatch.setattr(slug_index, 'cached_get', fake_get)
+    index = slug_index.SlugIndex(str(tmp_path / 'slugs.jsonl'))
+
+    assert resolve_budget('tt3281548', 'Little Women', 2019, index=index, limiter=limiter) == 40000000
+    assert limiter.entered == len(candidatos)
+    assert index.get('tt3281548') == bueno
+
+
+def test_resolve_budget_skips_unreadable_budgets(monkeypatch, tmp_path):
+    candidatos = slug_candidates('some film')
+    assert len(candidatos) > 1
+
+    def fake_get(url, timeout):
+        response = requests.Response()
+        response.url = url
+        response.status_code = 200
+        presupuesto = '$3,000,000' if url.endswith(f'/{candidatos[-1]}#tab=summary') else 'TBA'
+        response._content = f'<table><tr><td><b>Production Budget:</b></td><td>{presupuesto}</td></tr></table>'.encode()
+        return response
+
+    monkeypatch.setattr(slug_index, 'cached_get', fake_get)
+    index = slug_index.SlugIndex(str(tmp_path / 'slugs.jsonl'))
+
+    assert resolve_budget('tt0000001', 'some film', index=index) == 3000000
+    # Un presupuesto ilegible no se guarda como fallo confirmado
+    assert not index.misses.get('tt0000001')
@@ -0,0 +1,90 @@
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+import api_function
+from api_function import iter_films_imdb
+from artifact_store import read_artifact, stored_format
+from checkpoint import Checkpoint, stream_with_checkpoint
+from omdb_client import OMDbQuotaExceeded
+from streaming_build import build_in_memory, build_streaming, synthetic_collectors, synthetic_nominations
+
+
+class _FakeOMDb:
+    """Cliente OMDb que agota la cuota diaria después de `quota` peticiones."""
+
+    def __init__(self, quota=None):
+        self.quota = quota
+        self.calls = 0
+        self.lock = threading.Lock()
+        self.quota_exceeded = threading.Event()
+
+    def get(self, imdb_id):
+        with self.lock:
+            if self.quota_exceeded.is_set() or (self.quota is not None and self.calls >= self.quota):
+                self.quota_exceeded.set()
+                raise OMDbQuotaExceeded(imdb_id)
+            self.calls += 1
+        n = int(imdb_id[2:])
+        return {'Title': f'Benchmark Film {n}', 'Runtime': f'{80 + n % 100} min', 'Genre': 'Drama, Comedy',
+                'Director': 'Director', 'Actors': 'Actor A, Actor B', 'Language': 'English', 'Country': 'Spain',
+                'imdbRating': str(5 + (n % 45) / 10), 'Metascore': str(40 + n % 60), 'imdbVotes': '1,234'}
+
+
+def _collectors(checkpoint_dir):
+    collectors = synthetic_collectors()
+    collectors['imdb'] = lambda ids: iter_films_imdb(
+        ids, 4, 1000.0, os.path.join(checkpoint_dir, 'omdb.jsonl'), reset_quota=False
+    )
+    return collectors
+
+
+def _final(directory):
+    return read_artifact('final_dataset', directory=directory).sort_values(['filmid', 'year', 'category'],
+                                                                           ignore_index=True)
+
+
+def test_streaming_build_stops_at_the_omdb_quota_and_resumes(monkeypatch, tmp_path):
+    nominations = synthetic_nominations(60, seed=1)
+    checkpoints, streaming, memoria = str(tmp_path / 'checkpoints'), str(tmp_path / 'stream'), str(tmp_path / 'mem')
+    os.makedirs(checkpoints)
+
+    # Primer día: la cuota se agota a mitad de la construcción y no se escribe ningún artefacto incompleto
+    cliente = _FakeOMDb(quota=25)
+    monkeypatch.setattr(api_function, 'get_client', lambda max_in_flight=None: cliente)
+    with pytest.raises(OMDbQuotaExceeded):
+        build_streaming(nominations, _collectors(checkpoints), batch_size=10, directory=streaming)
+    assert stored_format('final_dataset', streaming) is None
+    assert cliente.calls == 25
+
+    # Día siguiente: se reanuda desde el checkpoint y el resultado es el de la construcción en memoria
+    cliente = _FakeOMDb()
+    monkeypatch.setattr(api_function, 'get_client', lambda max_in_flight=None: cliente)
+    build_streaming(nominations, _collectors(checkpoints), batch_size=10, directory=streaming)
+    assert cliente.calls == 60 - 25
+
+    build_in_memory(nominations, _collectors(str(tmp_path)), directory=memoria)
+    pd.testing.assert_frame_equal(_final(streaming), _final(memoria))
+    assert _final(streaming)['filmid'].nunique() == 60
+
+
+def test_stream_with_checkpoint_reads_done_records_from_the_file(tmp_path):
+    ruta = str(tmp_path / 'stream.jsonl')
+    pedidos = []
+
+    def fetch(item_id):
+        pedidos.append(item_id)
+        return {'id': item_id, 'título': f'Película {item_id}'}
+
+    primera = list(stream_with_checkpoint(range(5), fetch, 'example.com', ruta, max_in_flight=2, rate=1000.0))
+
+    # Al reanudar solo se guardan en memoria los IDs hechos; los registros se leen del archivo
+    checkpoint = Checkpoint(ruta, keep_records=False)
+    assert all('record' not in entry for entry in checkpoint.entries.values())
+    segunda = list(stream_with_checkpoint(range(8), fetch, 'example.com', checkpoint, max_in_flight=2, rate=1000.0))
+    assert segunda[:5] == primera
+    assert [item_id for item_id, _ in segunda] == list(range(8))
+    assert sorted(pedidos) == list(range(8))
+    assert Checkpoint(ruta).records() == Checkpoint(ruta, keep_records=False).records() == dict(segunda)
@@ -0,0 +1,78 @@
+import pandas as pd
+import requests
+
+import scrape_pipeline
+import web_scraping_functions
+from scrape_pipeline import scrape_budget_pipeline
+from web_scraping_functions import film_budget_record, films_budget_df, iter_boxoffice_summaries, iter_budgets
+
+
+def _budget_page(budget):
+    return f'<table><tr><td><b>Production Budget:</b></td><td>{budget}</td></tr></table>'
+
+
+# Respuesta de The Numbers de cada película de prueba: (status, presupuesto en la página)
+PAGES = {
+    'Found': (200, '$2,000,000'),
+    'Missing': (404, None),
+    'Broken': (500, None),
+    'Malformed': (200, 'TBA'),
+}
+
+
+def _fake_get(url, timeout):
+    for titulo, (status, presupuesto) in PAGES.items():
+        if url.endswith(f'/{titulo}#tab=summary'):
+            response = requests.Response()
+            response.status_code = status
+            response.url = url
+            response._content = _budget_page(presupuesto).encode() if presupuesto else b''
+            return response
+    raise requests.exceptions.ConnectionError(f'no route to {url}')
+
+
+def test_film_budget_record_reads_the_budget(monkeypatch):
+    monkeypatch.setattr(web_scraping_functions, 'cached_get', _fake_get)
+    assert film_budget_record('Found') == {'budget': 2000000}
+    assert film_budget_record('Missing') == {'budget': None}
+
+
+def test_film_budget_record_keeps_malformed_pages_as_errors(monkeypatch):
+    monkeypatch.setattr(web_scraping_functions, 'cached_get', _fake_get)
+    record = film_budget_record('Malformed')
+    assert record['budget'] is None
+    assert record['fetch_error']['status'] == 200
+    assert 'TBA' in record['fetch_error']['error']
+
+
+def test_budget_pipeline_matches_films_budget_df(monkeypatch):
+    monkeypatch.setattr(web_scraping_functions, 'cached_get', _fake_get)
+    monkeypatch.setattr(scrape_pipeline, 'cached_get', _fake_get)
+    df = pd.DataFrame({'filmid': [f'tt000000{i}' for i in range(len(PAGES))], 'title': list(PAGES)})
+
+    secuencial = films_budget_df(df, rate=1000)
+    pipeline = scrape_budget_pipeline(df, rate=1000, parse_workers=1)
+
+    pd.testing.assert_frame_equal(secuencial, pipeline)
+    assert secuencial['fetch_error'].notna().tolist() == [False, False, True, True]
+
+
+def test_iter_budgets_fetches_repeated_ids_once(monkeypatch):
+    monkeypatch.setattr(web_scraping_functions, 'cached_get', _fake_get)
+    films = [('tt0000001', 'Found'), ('tt0000001', 'Found'), ('tt0000002', 'Missing'), ('tt0000001', 'Found')]
+
+    registros = list(iter_budgets(iter(films), rate=1000))
+
+    assert registros == [
+        {'IMDb ID': 'tt0000001', 'title': 'Found', 'budget': 2000000},
+        {'IMDb ID': 'tt0000002', 'title': 'Missing', 'budget': None},
+    ]
+
+
+def test_iter_boxoffice_summaries_keeps_the_title_of_repeated_ids(monkeypatch):
+    monkeypatch.setattr(web_scraping_functions, 'film_boxoffice_summary', lambda imdb_id: {'domestic boxoffice': 1})
+    films = [('tt0000001', 'uno'), ('tt0000002', 'dos'), ('tt0000001', 'uno')]
+
+    registros = list(iter_boxoffice_summaries(iter(films), rate=1000))
+
+    assert [(r['IMDb ID'], r['title']) for r in registros] == [('tt0000001', 'uno'), ('tt0000002', 'dos')]